@@ -1,20 +1,35 @@
+import asyncio
 import logging
-from newsapi import NewsApiClient
+import os
+from typing import List, Optional
 from uagents import Agent, Context, Model
-from huggingface_hub import InferenceClient
-from portfolio_manager import PortfolioManager
+from huggingface_hub import AsyncInferenceClient
+from scripts.allocation_parser import JSON_RESPONSE_INSTRUCTIONS, parse_analysis
+from scripts.news_fetcher import NewsFetcher
+from scripts.portfolio_manager import PortfolioManager
 import json
 
-# Replace with your NewsAPI key
-NEWS_API_KEY = ""
+# Replace with your NewsAPI key (or set NEWS_API_KEY)
+NEWS_API_KEY = os.getenv("NEWS_API_KEY", "")
 HF_GROQ_API_KEY = ""
 
+# Largest holdings that get their own news query
+TOP_HOLDINGS = 3
+
+# News requests analyzed at once, and requests waiting before senders are held back
+NEWS_AGENT_CONCURRENCY = int(os.getenv("NEWS_AGENT_CONCURRENCY", "4"))
+NEWS_AGENT_QUEUE_SIZE = int(os.getenv("NEWS_AGENT_QUEUE_SIZE", "32"))
+LLM_TIMEOUT = 60  # seconds
+
+# Ask the model for a JSON object (see scripts/allocation_parser.py) instead of free text
+NEWS_AGENT_JSON_MODE = os.getenv("NEWS_AGENT_JSON_MODE", "").lower() in ("1", "true", "yes")
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 
 # Define message models
 class NewsRequest(Model):
-    pass
+    topic: str = "finance"
 
 class NewsResponse(Model):
     headlines: list
@@ -24,29 +39,29 @@ class UserConfirmation(Model):
     decision: str
     target_allocation: dict
     
-# Fetch news function
-def fetch_news(topic: str):
-    try:
-        newsapi = NewsApiClient(api_key=NEWS_API_KEY)
-        result = newsapi.get_top_headlines(q="finance", language="en", page_size=5)
+# Shared across requests so the connection pool and news cache are reused
+news_fetcher = NewsFetcher(api_key=NEWS_API_KEY)
 
-        #  TODO - lookup news on top holdings in portfolio as well?
+_llm_client: Optional[AsyncInferenceClient] = None
 
-        if result["status"] != "ok":
-            logging.warning(f"NewsAPI returned status: {result['status']}")
-            return []
+def llm_client() -> AsyncInferenceClient:
+    """Async inference client shared by all requests, created on first use"""
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = AsyncInferenceClient(
+            provider="groq",
+            api_key=HF_GROQ_API_KEY,
+            timeout=LLM_TIMEOUT,
+        )
+    return _llm_client
 
-        articles = result.get("articles", [])
-        if not articles:
+# Fetch news function
+async def fetch_news(portfolio_manager: PortfolioManager, topic: str = "finance", top_n: int = TOP_HOLDINGS):
+    """Headlines for the topic plus news on the top holdings, fetched concurrently"""
+    try:
+        headlines = await news_fetcher.fetch_headlines(portfolio_manager, top_n, topic)
+        if not headlines:
             logging.info("No articles found for the topic.")
-            return []
-
-        headlines = []
-        for article in articles:
-            title = article.get("title", "No title")
-            url = article.get("url", "")
-            headlines.append(f"{title} ({url})")
-
         return headlines
 
     except Exception as e:
@@ -106,6 +121,8 @@ async def analyze_headlines_async(headlines: list, assets: list):
             
         target allocations: [("stocks":"60%"), ("bonds":"20%"), ("crypto":"10%"), ("cash":"10%")]            
     """
+    if NEWS_AGENT_JSON_MODE:
+        SYSTEM_PROMPT += "\n" + JSON_RESPONSE_INSTRUCTIONS
 
     USER_PROMPT = (
         "Here are the top headlines for today: " 
@@ -120,12 +137,8 @@ async def analyze_headlines_async(headlines: list, assets: list):
         + "Based on this information, which changes should I make to my portfolio?"
     )
 
-    client = InferenceClient(
-        provider="groq",
-        api_key=HF_GROQ_API_KEY,
-    )
-    
-    completion = client.chat.completions.create(
+    # Awaited, so the agent keeps serving other messages during the round-trip
+    completion = await llm_client().chat.completions.create(
         model="meta-llama/Llama-3.3-70B-Instruct",
         messages=[
             {
@@ -137,30 +150,60 @@ async def analyze_headlines_async(headlines: list, assets: list):
                 "content": USER_PROMPT
             }
         ],
+        response_format={"type": "json_object"} if NEWS_AGENT_JSON_MODE else None,
     )
     
     #  use first choice for recommendation (for now)
     return completion.choices[0].message.content
     
-def parse_analysis(analysis: str):
-    allocation = analysis[analysis.index("{")+1:analysis.index("}")].split(",")
-    allocation = {
-        asset_type.split(":")[0].strip():float(
-            asset_type.split(":")[1].replace("%","")
-        ) 
-        for asset_type in allocation
-    }
-
-    return allocation    
-
 # Create the agent
 news_agent = Agent(name="news_agent")
 
+# The agent awaits each message handler before dispatching the next message, so
+# news requests are queued here and analyzed by NEWS_AGENT_CONCURRENCY workers
+news_requests: Optional[asyncio.Queue] = None
+news_workers: List[asyncio.Task] = []
+
+# Built once at startup and shared by every request
+portfolio_manager: Optional[PortfolioManager] = None
+
+async def news_worker():
+    while True:
+        ctx, sender, msg = await news_requests.get()
+        try:
+            await process_news_request(ctx, sender, msg)
+        except Exception as e:
+            ctx.logger.error(f"Error processing news request from {sender}: {e}")
+        finally:
+            news_requests.task_done()
+
+@news_agent.on_event("startup")
+async def start_news_workers(ctx: Context):
+    global news_requests, portfolio_manager
+    portfolio_manager = PortfolioManager()
+    news_requests = asyncio.Queue(maxsize=NEWS_AGENT_QUEUE_SIZE)
+    news_workers.extend(asyncio.create_task(news_worker()) for _ in range(NEWS_AGENT_CONCURRENCY))
+    ctx.logger.info(f"Started {NEWS_AGENT_CONCURRENCY} news workers")
+
+@news_agent.on_event("shutdown")
+async def stop_news_workers(ctx: Context):
+    for worker in news_workers:
+        worker.cancel()
+    await asyncio.gather(*news_workers, return_exceptions=True)
+    news_workers.clear()
+    await news_fetcher.aclose()
+    ctx.logger.info("Stopped news workers")
+
 @news_agent.on_message(model=NewsRequest)
 async def handle_news_request(ctx: Context, sender: str, msg: NewsRequest):
     ctx.logger.info(f"Received news request for topic: {msg.topic}")
+    # Waits only while the queue is full, holding back further messages
+    await news_requests.put((ctx, sender, msg))
+
+async def process_news_request(ctx: Context, sender: str, msg: NewsRequest):
 
-    headlines = fetch_news(msg.topic)
+    pm = portfolio_manager
+    headlines = await fetch_news(pm, msg.topic)
 
     if not headlines:
         ctx.logger.warning("No headlines found, sending empty response.")
@@ -168,8 +211,11 @@ async def handle_news_request(ctx: Context, sender: str, msg: NewsRequest):
         return
 
     ctx.logger.info("Sending headlines to LLaMA for analysis...")
-    analysis = await analyze_headlines_async(headlines)
-    target_allocation = parse_analysis(analysis)
+    analysis = await analyze_headlines_async(headlines, pm.portfolio.assets)
+    parsed = parse_analysis(analysis, symbols=[asset.symbol for asset in pm.portfolio.assets])
+    for error in parsed.errors:
+        ctx.logger.warning(f"Allocation parsing: {error}")
+    target_allocation = parsed.target_allocation
 
     if not target_allocation:
         await ctx.send(sender, "LLaMA did not provide a valid portfolio recommendation.")
@@ -179,7 +225,7 @@ async def handle_news_request(ctx: Context, sender: str, msg: NewsRequest):
     confirmation_message = "\nDo you want to proceed with this rebalancing? Reply with 'yes' or 'no'."
 
     # Send response with headlines and analysis
-    await ctx.send(sender, NewsResponse(headlines=headlines, analysis=analysis))
+    await ctx.send(sender, NewsResponse(headlines=headlines, analysis=parsed.text))
     
     # Send confirmation request
     await ctx.send(sender, confirmation_message)
@@ -195,7 +241,7 @@ async def handle_user_confirmation(ctx: Context, sender: str, msg: UserConfirmat
         ctx.logger.info("User confirmed rebalancing.")
 
         # Retrieve stored target allocation
-        pm = PortfolioManager()
+        pm = portfolio_manager
         pm.rebalance_portfolio(msg.target_allocation)
         portfolio_data = pm.to_dict()    
         print(json.dumps(portfolio_data))
@@ -1,17 +1,13 @@
 import { type NextRequest, NextResponse } from "next/server"
-import { exec } from "child_process"
-import { promisify } from "util"
-
-const execAsync = promisify(exec)
+import { callPythonWorker } from "@/lib/python-worker"
 
 export async function GET() {
   try {
-    const { stdout } = await execAsync("python scripts/portfolio_manager.py")
-    const portfolioData = JSON.parse(stdout.split("Portfolio Summary:")[0])
+    const portfolioData = await callPythonWorker("portfolio.get")
 
     return NextResponse.json(portfolioData)
   } catch (error) {
-    console.error("Error running Python portfolio script:", error)
+    console.error("Error loading portfolio data from Python worker:", error)
     return NextResponse.json({ error: "Internal server error while loading portfolio data." }, { status: 500 })
   }
 }
@@ -20,25 +16,26 @@ export async function POST(req: NextRequest) {
   try {
     const { action, data } = await req.json()
 
-    let command = ""
+    let result: unknown
     switch (action) {
       case "analyze":
-        command = `python scripts/ai_portfolio_advisor.py`
+        result = await callPythonWorker("advisor.analysis", { analysis_type: data?.analysis_type ?? "comprehensive" })
         break
       case "scenario":
-        command = `python scripts/scenario_analysis.py`
+        result = await callPythonWorker("scenario.summary", data?.seed !== undefined ? { seed: data.seed } : {})
         break
       case "risk_profile":
-        command = `python scripts/risk_profiler.py`
+        result = data?.answers
+          ? await callPythonWorker("risk_profile.assess", { answers: data.answers })
+          : await callPythonWorker("risk_profile.questions")
         break
       default:
         return NextResponse.json({ error: "Invalid action" }, { status: 400 })
     }
 
-    const { stdout } = await execAsync(command)
-    return NextResponse.json({ result: stdout })
+    return NextResponse.json({ result })
   } catch (error) {
-    console.error("Error running Python script:", error)
-    return NextResponse.json({ error: "Failed to execute Python script" }, { status: 500 })
+    console.error("Error calling Python worker:", error)
+    return NextResponse.json({ error: "Failed to execute Python analytics" }, { status: 500 })
   }
 }
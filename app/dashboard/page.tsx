@@ -93,16 +93,44 @@ Your portfolio shows good diversification with a balanced risk profile. How can
         body: JSON.stringify({
           message: message,
           conversation_history: chatMessages.slice(-10), // Keep last 10 messages for context
+          stream: true,
         }),
       })
 
-      const data = await response.json()
-
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
+        const data = await response.json()
         throw new Error(data.error || "Failed to get AI response")
       }
 
-      setChatMessages((prev) => [...prev, { role: "assistant", content: data.response }])
+      // Show the reply as soon as the first delta arrives, then append the rest
+      let started = false
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffered = ""
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffered += decoder.decode(value, { stream: true })
+        const lines = buffered.split("\n")
+        buffered = lines.pop() ?? ""
+
+        for (const line of lines) {
+          if (!line.trim()) continue
+          const event = JSON.parse(line)
+          if (event.error) throw new Error(event.error.message)
+          if (!event.delta) continue
+          if (!started) {
+            started = true
+            setIsLoading(false)
+            setChatMessages((prev) => [...prev, { role: "assistant", content: event.delta }])
+          } else {
+            setChatMessages((prev) => {
+              const last = prev[prev.length - 1]
+              return [...prev.slice(0, -1), { ...last, content: last.content + event.delta }]
+            })
+          }
+        }
+      }
     } catch (error) {
       console.error("Error sending message:", error)
       setChatMessages((prev) => [
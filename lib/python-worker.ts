@@ -0,0 +1,63 @@
+// Client for the persistent Python analytics worker (scripts/analytics_server.py)
+
+const PYTHON_WORKER_URL = process.env.PYTHON_WORKER_URL || "http://127.0.0.1:8765"
+
+let requestId = 0
+
+export class PythonWorkerError extends Error {
+  constructor(
+    message: string,
+    public code?: number,
+  ) {
+    super(message)
+    this.name = "PythonWorkerError"
+  }
+}
+
+export async function callPythonWorker<T = unknown>(method: string, params: Record<string, unknown> = {}): Promise<T> {
+  let response: Response
+  try {
+    response = await fetch(`${PYTHON_WORKER_URL}/rpc`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ jsonrpc: "2.0", id: ++requestId, method, params }),
+      cache: "no-store",
+    })
+  } catch (error) {
+    throw new PythonWorkerError(
+      `Python analytics worker is not reachable at ${PYTHON_WORKER_URL}. Start it with: make python-worker`,
+    )
+  }
+
+  const payload = await response.json()
+  if (payload.error) {
+    throw new PythonWorkerError(payload.error.message, payload.error.code)
+  }
+  return payload.result as T
+}
+
+// Start a streaming worker method. The returned body is newline-delimited JSON:
+// {"delta": "..."} lines as text is produced, then {"done": true} or {"error": {...}}.
+export async function streamPythonWorker(
+  method: string,
+  params: Record<string, unknown> = {},
+): Promise<ReadableStream<Uint8Array>> {
+  let response: Response
+  try {
+    response = await fetch(`${PYTHON_WORKER_URL}/stream`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json", Accept: "application/x-ndjson" },
+      body: JSON.stringify({ jsonrpc: "2.0", id: ++requestId, method, params }),
+      cache: "no-store",
+    })
+  } catch (error) {
+    throw new PythonWorkerError(
+      `Python analytics worker is not reachable at ${PYTHON_WORKER_URL}. Start it with: make python-worker`,
+    )
+  }
+
+  if (!response.ok || !response.body) {
+    throw new PythonWorkerError(`Python analytics worker stream failed with status ${response.status}`)
+  }
+  return response.body
+}
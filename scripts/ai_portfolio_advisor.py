@@ -1,12 +1,100 @@
 import os
+import sys
 import json
-from typing import Dict, List, Any, Optional
-from groq import Groq
-from dotenv import load_dotenv
+import threading
+import weakref
+from typing import Dict, List, Any, AsyncIterator, Iterator, Optional, Tuple
+if __package__ in (None, ""):
+    # Run as a file (python scripts/<name>.py): make the repository root importable for scripts.*
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.chat_context import DEFAULT_PROMPT_TOKEN_BUDGET, ChatContext, ChatContextBuilder
+from scripts.llm_cache import ResponseCache, cache_key, default_response_cache
+from scripts.llm_scheduler import RequestScheduler, default_request_scheduler, estimate_tokens
 from scripts.portfolio_manager import PortfolioManager
 
-# Load environment variables from .env file
-load_dotenv()
+DEFAULT_MODEL = "meta-llama/llama-4-maverick-17b-128e-instruct"
+
+# Fixed leading part of the chat system prompts; keep it byte-stable so
+# provider-side prompt caching can reuse it across turns
+CHAT_INSTRUCTIONS = """You are a senior AI Portfolio Manager for QuantAlpha with expertise in quantitative finance and investment strategy.
+
+**YOUR EXPERTISE:**
+- Portfolio optimization and rebalancing strategies
+- Risk management and downside protection
+- Market analysis and sector rotation
+- Tax-efficient investing and asset location
+- Behavioral coaching and investment discipline
+
+**COMMUNICATION STYLE:**
+- Professional yet approachable
+- Data-driven with clear reasoning
+- Specific and actionable recommendations
+- Reference client's actual portfolio when relevant
+- Concise responses (under 200 words)
+
+Always consider the client's current allocation, risk profile, and performance metrics when providing advice."""
+
+STREAM_CHAT_INSTRUCTIONS = """You are an expert AI Portfolio Manager for QuantAlpha.
+
+Provide specific, actionable investment advice. Keep responses under 200 words."""
+
+# Keep-alive connection pool shared by every advisor talking to the same endpoint
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+KEEPALIVE_EXPIRY = 60.0
+REQUEST_TIMEOUT = 60.0
+
+_sync_clients: Dict[Tuple[str, Optional[str]], Any] = {}
+_sync_clients_lock = threading.Lock()
+# Async clients are bound to the event loop that created their connections
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _connection_limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY
+    )
+
+
+def shared_groq_client(api_key: str, base_url: Optional[str] = None):
+    """Process-wide Groq client for an API key and endpoint, so connections are reused"""
+    key = (api_key, base_url)
+    with _sync_clients_lock:
+        if key not in _sync_clients:
+            import httpx
+            from groq import Groq
+
+            _sync_clients[key] = Groq(
+                api_key=api_key,
+                base_url=base_url,
+                max_retries=0,  # retries are handled by RequestScheduler
+                http_client=httpx.Client(limits=_connection_limits(), timeout=REQUEST_TIMEOUT)
+            )
+        return _sync_clients[key]
+
+
+def shared_async_groq_client(api_key: str, base_url: Optional[str] = None):
+    """AsyncGroq client shared by every coroutine on the running event loop"""
+    import asyncio
+
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    key = (api_key, base_url)
+    if key not in clients:
+        import httpx
+        from groq import AsyncGroq
+
+        clients[key] = AsyncGroq(
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=0,  # retries are handled by RequestScheduler
+            http_client=httpx.AsyncClient(limits=_connection_limits(), timeout=REQUEST_TIMEOUT)
+        )
+    return clients[key]
+
 
 class AIPortfolioAdvisor:
     """
@@ -14,9 +102,37 @@ class AIPortfolioAdvisor:
     
     Provides intelligent investment advice, portfolio analysis, and market insights
     based on real-time portfolio data and advanced AI reasoning.
+
+    Every advisor shares one pooled keep-alive client per API key and endpoint.
+    The ``*_async`` methods use a pooled AsyncGroq client instead, so independent
+    requests can run concurrently (see ``get_dashboard_insights``). ``base_url``
+    (or the GROQ_BASE_URL environment variable) points both at another
+    OpenAI-compatible endpoint, such as a local stub server.
+
+    Successful responses are cached by request content (see scripts.llm_cache),
+    shared across advisors unless a ``cache`` is passed. Chat methods take
+    ``use_cache=False`` for turns that should always reach the model.
+
+    Requests go through a RequestScheduler (see scripts.llm_scheduler) that
+    enforces the RPM/TPM limits, retries transient errors with backoff and
+    coalesces concurrent identical requests. Chat prompts are fitted to
+    ``prompt_token_budget`` tokens (see scripts.chat_context).
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        portfolio_manager: Optional[PortfolioManager] = None,
+        base_url: Optional[str] = None,
+        model: str = DEFAULT_MODEL,
+        cache: Optional[ResponseCache] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        prompt_token_budget: int = DEFAULT_PROMPT_TOKEN_BUDGET
+    ):
+        # dotenv is imported here so importing this module stays cheap
+        from dotenv import load_dotenv
+
+        # Load environment variables from .env file
+        load_dotenv()
         self.groq_api_key = os.getenv('GROQ_API_KEY')
         if not self.groq_api_key:
             raise ValueError(
@@ -24,53 +140,170 @@ class AIPortfolioAdvisor:
                 "Please check your .env file or run: poetry install && poetry shell"
             )
         
-        self.client = Groq(api_key=self.groq_api_key)
-        self.portfolio_manager = PortfolioManager()
-        
+        self.base_url = base_url or os.getenv('GROQ_BASE_URL')
+        self.model = model
+        self.client = shared_groq_client(self.groq_api_key, self.base_url)
+        self.cache = cache if cache is not None else default_response_cache()
+        self.scheduler = scheduler or default_request_scheduler()
+        self.chat_context_builder = ChatContextBuilder(max_prompt_tokens=prompt_token_budget)
+        self.stream_context_builder = ChatContextBuilder(max_prompt_tokens=prompt_token_budget, max_history_messages=4)
+        self.portfolio_manager = portfolio_manager or PortfolioManager()
+
+    @property
+    def async_client(self):
+        """Pooled AsyncGroq client for the running event loop"""
+        return shared_async_groq_client(self.groq_api_key, self.base_url)
+
+    def _completion_params(self, messages: List[Dict], max_tokens: int, temperature: float, stream: bool) -> Dict:
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_completion_tokens": max_tokens,
+            "top_p": 1,
+            "stream": stream,
+            "stop": None,
+        }
+        
+    def _cache_lookup(
+        self,
+        messages: List[Dict],
+        max_tokens: int,
+        temperature: float,
+        use_cache: bool
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """(cache key, cached response); the key is None when caching is off"""
+        if not use_cache:
+            return None, None
+        key = cache_key(self.model, messages, temperature, max_tokens)
+        return key, self.cache.get(key)
+
+    def _cache_store(self, key: Optional[str], response: str) -> None:
+        if key is not None and response:
+            self.cache.set(key, response)
+
     def _make_groq_request(
         self, 
         messages: List[Dict], 
         max_tokens: int = 1000, 
         stream: bool = False,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        use_cache: bool = True
     ) -> str:
-        """Make a request to Groq API using the official client"""
-        try:
-            completion = self.client.chat.completions.create(
-                model="meta-llama/llama-4-maverick-17b-128e-instruct",
-                messages=messages,
-                temperature=temperature,
-                max_completion_tokens=max_tokens,
-                top_p=1,
-                stream=stream,
-                stop=None,
-            )
-            
-            if stream:
-                # Handle streaming response
-                response_text = ""
-                for chunk in completion:
-                    if chunk.choices[0].delta.content:
-                        response_text += chunk.choices[0].delta.content
-                return response_text
-            else:
-                # Handle non-streaming response
-                return completion.choices[0].message.content
-                
-        except Exception as e:
-            return f"Error getting AI response: {str(e)}"
-    
-    def get_portfolio_analysis(self, analysis_type: str = "comprehensive") -> str:
         """
-        Get comprehensive AI analysis of the current portfolio.
-        
-        Args:
-            analysis_type: Type of analysis ('comprehensive', 'risk', 'performance', 'allocation')
-            
-        Returns:
-            Detailed portfolio analysis and recommendations
+        Make a request to Groq API using the official client.
+
+        Raises once the scheduler's retries are exhausted, so a failure is
+        never cached or handed to callers as if it were the model's answer.
         """
-        portfolio_data = self.portfolio_manager.to_dict()
+        if stream:
+            return "".join(self._stream_groq_request(messages, max_tokens, temperature, use_cache))
+
+        key, cached = self._cache_lookup(messages, max_tokens, temperature, use_cache)
+        if cached is not None:
+            return cached
+        params = self._completion_params(messages, max_tokens, temperature, stream=False)
+        response = self.scheduler.run(
+            lambda: self.client.chat.completions.create(**params).choices[0].message.content,
+            estimate_tokens(messages, max_tokens),
+            key=key
+        )
+        self._cache_store(key, response)
+        return response
+
+    def _stream_groq_request(
+        self,
+        messages: List[Dict],
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        use_cache: bool = True
+    ) -> Iterator[str]:
+        """
+        Yield response text from a streaming Groq request as each chunk arrives.
+
+        Failures are raised rather than yielded, so callers can tell them from
+        response text; a reply that fails part-way is not cached.
+        """
+        key, cached = self._cache_lookup(messages, max_tokens, temperature, use_cache)
+        if cached is not None:
+            yield cached
+            return
+
+        params = self._completion_params(messages, max_tokens, temperature, stream=True)
+        parts = []
+        # Only opening the stream is scheduled and retried; chunks are relayed as they arrive
+        completion = self.scheduler.run(
+            lambda: self.client.chat.completions.create(**params),
+            estimate_tokens(messages, max_tokens)
+        )
+        for chunk in completion:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield parts[-1]
+        self._cache_store(key, "".join(parts))
+
+    async def _complete_async(
+        self,
+        messages: List[Dict],
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        use_cache: bool = True
+    ) -> str:
+        """Cached, scheduled completion on the pooled AsyncGroq client; raises on failure"""
+        key, cached = self._cache_lookup(messages, max_tokens, temperature, use_cache)
+        if cached is not None:
+            return cached
+        params = self._completion_params(messages, max_tokens, temperature, stream=False)
+
+        async def request() -> str:
+            completion = await self.async_client.chat.completions.create(**params)
+            return completion.choices[0].message.content
+
+        response = await self.scheduler.run_async(request, estimate_tokens(messages, max_tokens), key=key)
+        self._cache_store(key, response)
+        return response
+
+    async def _make_groq_request_async(
+        self,
+        messages: List[Dict],
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        use_cache: bool = True
+    ) -> str:
+        """Async counterpart of _make_groq_request on the pooled AsyncGroq client; raises on failure"""
+        return await self._complete_async(messages, max_tokens, temperature, use_cache)
+
+    async def _stream_groq_request_async(
+        self,
+        messages: List[Dict],
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """Async counterpart of _stream_groq_request on the pooled AsyncGroq client; raises on failure"""
+        key, cached = self._cache_lookup(messages, max_tokens, temperature, use_cache)
+        if cached is not None:
+            yield cached
+            return
+
+        params = self._completion_params(messages, max_tokens, temperature, stream=True)
+        parts = []
+        completion = await self.scheduler.run_async(
+            lambda: self.async_client.chat.completions.create(**params),
+            estimate_tokens(messages, max_tokens)
+        )
+        async for chunk in completion:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield parts[-1]
+        self._cache_store(key, "".join(parts))
+
+    def _portfolio_analysis_messages(
+        self,
+        analysis_type: str,
+        portfolio_manager: Optional[PortfolioManager] = None
+    ) -> List[Dict]:
+        portfolio_data = (portfolio_manager or self.portfolio_manager).to_dict()
         
         system_prompt = """You are an expert investment portfolio manager AI with deep expertise in:
 - Modern Portfolio Theory and quantitative analysis
@@ -119,15 +352,45 @@ Your role is to provide professional, actionable investment advice based on rigo
         Keep response professional, data-driven, and under 400 words.
         """
         
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ]
+
+    def get_portfolio_analysis(self, analysis_type: str = "comprehensive") -> str:
+        """
+        Get comprehensive AI analysis of the current portfolio.
         
-        return self._make_groq_request(messages, max_tokens=1000, temperature=0.6)
+        Args:
+            analysis_type: Type of analysis ('comprehensive', 'risk', 'performance', 'allocation')
+            
+        Returns:
+            Detailed portfolio analysis and recommendations
+        """
+        return self._make_groq_request(
+            self._portfolio_analysis_messages(analysis_type), max_tokens=1000, temperature=0.6
+        )
+
+    async def get_portfolio_analysis_async(self, analysis_type: str = "comprehensive") -> str:
+        """Async version of get_portfolio_analysis"""
+        return await self._make_groq_request_async(
+            self._portfolio_analysis_messages(analysis_type), max_tokens=1000, temperature=0.6
+        )
+
+    async def analyze_account_async(
+        self,
+        portfolio_manager: PortfolioManager,
+        analysis_type: str = "comprehensive"
+    ) -> str:
+        """
+        get_portfolio_analysis for another account's portfolio, sharing this
+        advisor's client, cache and scheduler.
+        """
+        return await self._complete_async(
+            self._portfolio_analysis_messages(analysis_type, portfolio_manager), max_tokens=1000, temperature=0.6
+        )
     
-    def get_rebalancing_advice(self, target_allocation: Dict[str, float]) -> str:
-        """Get AI advice on portfolio rebalancing"""
+    def _rebalancing_messages(self, target_allocation: Dict[str, float]) -> List[Dict]:
         rebalancing_data = self.portfolio_manager.rebalance_portfolio(target_allocation)
         
         system_prompt = """You are an expert portfolio manager AI specializing in portfolio rebalancing and optimization. Provide clear, actionable advice on portfolio adjustments based on the rebalancing analysis provided."""
@@ -147,15 +410,20 @@ Your role is to provide professional, actionable investment advice based on rigo
         Keep your response concise and actionable.
         """
         
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ]
-        
-        return self._make_groq_request(messages, max_tokens=600)
+
+    def get_rebalancing_advice(self, target_allocation: Dict[str, float]) -> str:
+        """Get AI advice on portfolio rebalancing"""
+        return self._make_groq_request(self._rebalancing_messages(target_allocation), max_tokens=600)
+
+    async def get_rebalancing_advice_async(self, target_allocation: Dict[str, float]) -> str:
+        """Async version of get_rebalancing_advice"""
+        return await self._make_groq_request_async(self._rebalancing_messages(target_allocation), max_tokens=600)
     
-    def get_market_outlook(self) -> str:
-        """Get AI market outlook and portfolio implications"""
+    def _market_outlook_messages(self) -> List[Dict]:
         portfolio_data = self.portfolio_manager.to_dict()
         
         system_prompt = """You are a senior investment strategist AI with expertise in market analysis and portfolio management. Provide market outlook and specific implications for the given portfolio based on current market conditions and trends."""
@@ -188,17 +456,74 @@ Your role is to provide professional, actionable investment advice based on rigo
         Focus on actionable insights relevant to this portfolio's composition.
         """
         
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ]
-        
-        return self._make_groq_request(messages, max_tokens=700)
+
+    def get_market_outlook(self) -> str:
+        """Get AI market outlook and portfolio implications"""
+        return self._make_groq_request(self._market_outlook_messages(), max_tokens=700)
+
+    async def get_market_outlook_async(self) -> str:
+        """Async version of get_market_outlook"""
+        return await self._make_groq_request_async(self._market_outlook_messages(), max_tokens=700)
+
+    async def get_dashboard_insights(
+        self,
+        target_allocation: Dict[str, float],
+        analysis_type: str = "comprehensive"
+    ) -> Dict[str, str]:
+        """
+        Portfolio analysis, market outlook and rebalancing advice in one round trip.
+
+        The three requests are independent, so they run concurrently over the
+        pooled async client and the dashboard waits for the slowest one only.
+        """
+        import asyncio
+
+        analysis, outlook, advice = await asyncio.gather(
+            self.get_portfolio_analysis_async(analysis_type),
+            self.get_market_outlook_async(),
+            self.get_rebalancing_advice_async(target_allocation)
+        )
+        return {"analysis": analysis, "outlook": outlook, "advice": advice}
     
+    def _portfolio_context(self, detailed: bool) -> str:
+        """Portfolio block appended to the chat system prompts"""
+        portfolio_data = self.portfolio_manager.to_dict()
+        allocation = portfolio_data['asset_allocation']
+        metrics = portfolio_data['metrics']
+
+        if not detailed:
+            return f"""**Client Portfolio:** ${portfolio_data['total_value']:,.2f} | {portfolio_data['risk_profile']} risk
+**Allocation:** {allocation['stock']}% stocks, {allocation['bond']}% bonds, {allocation['crypto']}% crypto
+**Performance:** {metrics['portfolio_return']:.1f}% return, {metrics['sharpe_ratio']:.2f} Sharpe ratio"""
+
+        geography = portfolio_data['geographic_allocation']
+        return f"""**CURRENT CLIENT PORTFOLIO:**
+• Value: ${portfolio_data['total_value']:,.2f} | Risk: {portfolio_data['risk_profile']}
+• Allocation: {allocation['stock']}% stocks, {allocation['bond']}% bonds, {allocation['crypto']}% crypto, {allocation['cash']}% cash
+• Geography: {geography['US']}% US, {geography['Developed']}% developed, {geography['Emerging']}% emerging
+• Performance: {metrics['portfolio_return']:.1f}% return, {metrics['sharpe_ratio']:.2f} Sharpe, {metrics['portfolio_volatility']:.1f}% volatility"""
+
+    def chat_context(self, user_message: str, conversation_history: Optional[List[Dict]] = None) -> ChatContext:
+        """
+        Prompt for a chat turn, fitted to the prompt token budget.
+
+        The fixed instructions come first and the portfolio block (unchanged
+        until the portfolio is updated) follows, so every turn starts with the
+        same bytes and provider-side prompt caching can reuse the prefix.
+        """
+        system_prompt = CHAT_INSTRUCTIONS + "\n\n" + self._portfolio_context(detailed=True)
+        return self.chat_context_builder.build(system_prompt, user_message, conversation_history)
+
     def chat_with_advisor(
         self, 
         user_message: str, 
-        conversation_history: Optional[List[Dict]] = None
+        conversation_history: Optional[List[Dict]] = None,
+        use_cache: bool = True,
+        context: Optional[ChatContext] = None
     ) -> str:
         """
         Interactive chat with AI portfolio advisor.
@@ -206,66 +531,62 @@ Your role is to provide professional, actionable investment advice based on rigo
         Args:
             user_message: User's question or request
             conversation_history: Previous conversation messages for context
+            use_cache: Reuse a cached reply to an identical conversation
+            context: Prompt already built by chat_context, e.g. to report its token counts
             
         Returns:
             AI advisor's response with portfolio-specific insights
         """
-        portfolio_data = self.portfolio_manager.to_dict()
-        
-        system_prompt = f"""You are a senior AI Portfolio Manager for QuantAlpha with expertise in quantitative finance and investment strategy.
-
-**CURRENT CLIENT PORTFOLIO:**
-• Value: ${portfolio_data['total_value']:,.2f} | Risk: {portfolio_data['risk_profile']}
-• Allocation: {portfolio_data['asset_allocation']['stock']}% stocks, {portfolio_data['asset_allocation']['bond']}% bonds, {portfolio_data['asset_allocation']['crypto']}% crypto, {portfolio_data['asset_allocation']['cash']}% cash
-• Geography: {portfolio_data['geographic_allocation']['US']}% US, {portfolio_data['geographic_allocation']['Developed']}% developed, {portfolio_data['geographic_allocation']['Emerging']}% emerging
-• Performance: {portfolio_data['metrics']['portfolio_return']:.1f}% return, {portfolio_data['metrics']['sharpe_ratio']:.2f} Sharpe, {portfolio_data['metrics']['portfolio_volatility']:.1f}% volatility
-
-**YOUR EXPERTISE:**
-- Portfolio optimization and rebalancing strategies
-- Risk management and downside protection
-- Market analysis and sector rotation
-- Tax-efficient investing and asset location
-- Behavioral coaching and investment discipline
+        context = context or self.chat_context(user_message, conversation_history)
+        return self._make_groq_request(context.messages, max_tokens=500, temperature=0.7, use_cache=use_cache)
 
-**COMMUNICATION STYLE:**
-- Professional yet approachable
-- Data-driven with clear reasoning
-- Specific and actionable recommendations
-- Reference client's actual portfolio when relevant
-- Concise responses (under 200 words)
-
-Always consider the client's current allocation, risk profile, and performance metrics when providing advice."""
-        
-        messages = [{"role": "system", "content": system_prompt}]
-        
-        # Add conversation history (keep last 6 messages for context)
-        if conversation_history:
-            messages.extend(conversation_history[-6:])
-        
-        messages.append({"role": "user", "content": user_message})
-        
-        return self._make_groq_request(messages, max_tokens=500, temperature=0.7)
+    async def chat_with_advisor_async(
+        self,
+        user_message: str,
+        conversation_history: Optional[List[Dict]] = None,
+        use_cache: bool = True,
+        context: Optional[ChatContext] = None
+    ) -> str:
+        """Async version of chat_with_advisor"""
+        context = context or self.chat_context(user_message, conversation_history)
+        return await self._make_groq_request_async(
+            context.messages, max_tokens=500, temperature=0.7, use_cache=use_cache
+        )
     
-    def stream_chat_response(self, user_message: str, conversation_history: List[Dict] = None):
-        """Stream chat response for real-time interaction"""
-        portfolio_data = self.portfolio_manager.to_dict()
-        
-        system_prompt = f"""You are an expert AI Portfolio Manager for QuantAlpha.
+    def stream_chat_context(self, user_message: str, conversation_history: Optional[List[Dict]] = None) -> ChatContext:
+        """Shorter prompt used for streamed chat, fitted the same way as chat_context"""
+        system_prompt = STREAM_CHAT_INSTRUCTIONS + "\n\n" + self._portfolio_context(detailed=False)
+        return self.stream_context_builder.build(system_prompt, user_message, conversation_history)
 
-**Client Portfolio:** ${portfolio_data['total_value']:,.2f} | {portfolio_data['risk_profile']} risk
-**Allocation:** {portfolio_data['asset_allocation']['stock']}% stocks, {portfolio_data['asset_allocation']['bond']}% bonds, {portfolio_data['asset_allocation']['crypto']}% crypto
-**Performance:** {portfolio_data['metrics']['portfolio_return']:.1f}% return, {portfolio_data['metrics']['sharpe_ratio']:.2f} Sharpe ratio
+    def stream_chat_response(
+        self,
+        user_message: str,
+        conversation_history: List[Dict] = None,
+        use_cache: bool = True,
+        context: Optional[ChatContext] = None
+    ) -> Iterator[str]:
+        """
+        Stream chat response for real-time interaction.
 
-Provide specific, actionable investment advice. Keep responses under 200 words."""
-        
-        messages = [{"role": "system", "content": system_prompt}]
-        
-        if conversation_history:
-            messages.extend(conversation_history[-4:])
-        
-        messages.append({"role": "user", "content": user_message})
-        
-        return self._make_groq_request(messages, max_tokens=400, stream=True)
+        Yields response text incrementally as Groq produces it, so the first
+        words can be shown as soon as the model emits them. A cached reply is
+        yielded in one piece. Request failures are raised; the analytics
+        server turns them into an {"error": ...} stream event.
+        """
+        context = context or self.stream_chat_context(user_message, conversation_history)
+        yield from self._stream_groq_request(context.messages, max_tokens=400, use_cache=use_cache)
+
+    async def stream_chat_response_async(
+        self,
+        user_message: str,
+        conversation_history: List[Dict] = None,
+        use_cache: bool = True,
+        context: Optional[ChatContext] = None
+    ) -> AsyncIterator[str]:
+        """Async iterator version of stream_chat_response"""
+        context = context or self.stream_chat_context(user_message, conversation_history)
+        async for text in self._stream_groq_request_async(context.messages, max_tokens=400, use_cache=use_cache):
+            yield text
 
 def main():
     """Main function for testing the AI advisor"""
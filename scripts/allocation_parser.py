@@ -0,0 +1,599 @@
+"""
+Structured extraction of allocation recommendations from LLM responses.
+
+The news agent asks for two things in free text: allocation changes written
+as tuples such as ``("Bonds", 10%)`` and a closing block that starts with
+"target allocations" and lists the new asset class weights, e.g.
+``[("stocks":"60%"), ("bonds":"20%"), ...]``. Models vary the punctuation
+freely (braces, brackets, quotes, bullet lists, fractions), so the response
+is read by a small tokenizer in one left-to-right pass and two grammars
+applied to the token stream:
+
+* outside a target block, ``( label , number )`` is an allocation change;
+* inside one, every ``label [separators] number`` pair is a target weight.
+  The block ends at a blank line or when a bracketed list holding its
+  weights closes. Outside brackets, a pair whose label is not an asset class
+  (optionally region-qualified, "US stocks") is prose such as "This trims
+  stocks by 5%" and is dropped, unless another weight follows it. The last
+  block with weights wins.
+
+Labels are mapped onto PortfolioManager's asset types and regions; targets
+are validated and normalized to sum to 100. A block naming an unknown class
+or the same class twice is rejected as a whole rather than guessed at, since
+normalizing it would give wrong weights. Problems are reported as messages
+in ``ParsedAnalysis.errors`` rather than raised, so a partially usable answer
+is still usable.
+
+In JSON mode the model is asked for an object matching
+ALLOCATION_RESPONSE_SCHEMA instead and no free text is parsed at all.
+
+Run ``python -m scripts.allocation_parser`` to fuzz and benchmark the parser.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+ASSET_CLASSES = ("stock", "bond", "crypto", "cash")
+REGIONS = ("US", "Developed", "Emerging", "Global")
+
+# Label spellings seen in model output, lowercased, mapped to asset types
+ASSET_CLASS_ALIASES = {
+    "stock": "stock", "stocks": "stock", "equity": "stock", "equities": "stock", "shares": "stock",
+    "bond": "bond", "bonds": "bond", "fixed income": "bond", "treasuries": "bond",
+    "crypto": "crypto", "cryptos": "crypto", "cryptocurrency": "crypto", "cryptocurrencies": "crypto",
+    "cash": "cash", "cash & equivalents": "cash", "cash and equivalents": "cash", "money market": "cash",
+}
+REGION_ALIASES = {
+    "us": "US", "u.s": "US", "u.s.": "US", "usa": "US", "united states": "US", "domestic": "US",
+    "us markets": "US", "us market": "US",
+    "developed": "Developed", "developed markets": "Developed", "developed market": "Developed",
+    "international": "Developed",
+    "emerging": "Emerging", "emerging markets": "Emerging", "emerging market": "Emerging", "em": "Emerging",
+    "global": "Global",
+}
+
+TOTAL_TOLERANCE = 0.5  # percentage points a target may be off 100 without a warning
+MAX_LABEL_WORDS = 3
+_TICKER = re.compile(r"[A-Z][A-Z0-9]{0,5}(?:[.\-][A-Z0-9]{1,3})?")
+_MINUS = "−–"  # minus sign and en dash used as negative signs
+
+# One alternative per token kind; each is linear, so the whole scan is O(n).
+# Bracket and punctuation runs are single tokens to keep junk input cheap.
+_TOKENS = re.compile(
+    r"(?P<marker>target[ \t]+allocations?)"
+    r"|(?P<quoted>\"[^\"\n]{0,80}\"|'[^'\n]{0,80}'|“[^”\n]{0,80}”)"
+    r"|(?P<number>[+\-−–]?(?:\d+(?:\.\d+)?|\.\d+))[ \t]*(?P<percent>%|percent\b)?"
+    r"|(?P<word>[A-Za-z][A-Za-z0-9&.]*(?:-[A-Za-z0-9]+)*)"
+    r"|(?P<open>[(\[{]+)"
+    r"|(?P<close>[)\]}]+)"
+    r"|(?P<sep>[:=,])"
+    r"|(?P<para>\n[ \t\r]*\n)"
+    r"|(?P<other>[^\s\w\"'“”()\[\]{}:=,]+|[^\s\w])",
+    re.IGNORECASE
+)
+_QUOTED_NUMBER = re.compile(r"\s*([+\-−–]?(?:\d+(?:\.\d+)?|\.\d+))\s*(%|percent)?\s*", re.IGNORECASE)
+# Punctuation that may sit between a label and its number
+_PAIR_FILLER = set("-*_|>–—")
+
+ALLOCATION_RESPONSE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "required": ["analysis", "target_allocation"],
+    "properties": {
+        "analysis": {"type": "string", "description": "Reasoning behind the recommendations"},
+        "changes": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["target", "change"],
+                "properties": {
+                    "target": {"type": "string", "description": "Asset class, market or ticker"},
+                    "kind": {"enum": ["asset_class", "region", "asset"]},
+                    "change": {"type": "number", "description": "Allocation change in percentage points"},
+                },
+            },
+        },
+        "target_allocation": {
+            "type": "object",
+            "properties": {name: {"type": "number", "minimum": 0, "maximum": 100} for name in ASSET_CLASSES},
+            "additionalProperties": False,
+        },
+    },
+}
+
+JSON_RESPONSE_INSTRUCTIONS = (
+    "Respond with a single JSON object and nothing else. It must match this JSON schema, "
+    "with target_allocation in percent summing to 100:\n"
+    + json.dumps(ALLOCATION_RESPONSE_SCHEMA)
+)
+
+
+@dataclass
+class AllocationChange:
+    """A recommended change, in percentage points, to one asset class, region or asset"""
+    target: str
+    kind: str  # 'asset_class', 'region' or 'asset'
+    change: float
+
+
+@dataclass
+class ParsedAnalysis:
+    """Allocation recommendations extracted from one model response"""
+    text: str
+    target_allocation: Dict[str, float] = field(default_factory=dict)
+    changes: List[AllocationChange] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    raw_total: Optional[float] = None
+    source: str = "text"  # 'text' or 'json'
+
+    @property
+    def is_valid(self) -> bool:
+        return bool(self.target_allocation)
+
+
+def _clean_label(label: str) -> str:
+    return " ".join(label.strip(" \t\"'*_“”.").split()).lower()
+
+
+def canonical_asset_class(label: str) -> Optional[str]:
+    """Asset type for a label such as 'Bonds' or 'US stocks', or None"""
+    label = _clean_label(label)
+    if label in ASSET_CLASS_ALIASES:
+        return ASSET_CLASS_ALIASES[label]
+    for word in reversed(label.split()):
+        if word in ASSET_CLASS_ALIASES:
+            return ASSET_CLASS_ALIASES[word]
+    return None
+
+
+def split_class_label(label: str) -> Optional[Tuple[str, str]]:
+    """
+    (asset type, region qualifier) for a label that is an asset class preceded
+    only by region words, e.g. ('stock', 'US') for 'US stocks' and ('bond', '')
+    for 'fixed income'; None for anything else, such as 'trims stocks by'
+    """
+    words = _clean_label(label).split()
+    for start in range(len(words)):
+        name = ASSET_CLASS_ALIASES.get(" ".join(words[start:]))
+        if name is not None:
+            qualifier = words[:start]
+            if not all(word in REGION_ALIASES for word in qualifier):
+                return None
+            return name, " ".join(REGION_ALIASES[word] for word in qualifier)
+    return None
+
+
+def canonical_region(label: str) -> Optional[str]:
+    """Region for a label such as 'Emerging Markets', or None"""
+    label = _clean_label(label)
+    if label in REGION_ALIASES:
+        return REGION_ALIASES[label]
+    words = label.split()
+    return REGION_ALIASES.get(words[0]) if words else None
+
+
+def classify_target(label: str, symbols: Optional[Iterable[str]] = None) -> Optional[Tuple[str, str]]:
+    """(kind, canonical name) for the subject of an allocation change"""
+    stripped = label.strip(" \t\"'*_“”")
+    if symbols is not None and stripped.upper() in symbols:
+        return "asset", stripped.upper()
+    asset_class = canonical_asset_class(stripped)
+    if asset_class is not None:
+        return "asset_class", asset_class
+    region = canonical_region(stripped)
+    if region is not None:
+        return "region", region
+    if _TICKER.fullmatch(stripped):
+        return "asset", stripped
+    return None
+
+
+def _to_float(text: str) -> float:
+    return float(text.translate({ord(c): "-" for c in _MINUS}))
+
+
+def normalize_targets(targets: Dict[str, float], as_percent: bool, errors: List[str]) -> Tuple[Dict[str, float], float]:
+    """Validate target weights and scale them to sum to 100; returns (targets, raw total)"""
+    valid = {}
+    for name, value in targets.items():
+        if value < 0:
+            errors.append(f"negative target allocation for {name}: {value:g}")
+        else:
+            valid[name] = value
+
+    total = sum(valid.values())
+    if not as_percent and valid and total <= 1.5:
+        # Weights given as fractions ("stocks: 0.6")
+        valid = {name: value * 100 for name, value in valid.items()}
+        total *= 100
+    if total <= 0:
+        if valid:
+            errors.append("target allocations sum to 0%")
+        return {}, total
+    if abs(total - 100) > TOTAL_TOLERANCE:
+        errors.append(f"target allocations sum to {total:g}%; normalized to 100%")
+    return {name: value * 100 / total for name, value in valid.items()}, total
+
+
+def _finish_block(block: List[Tuple[str, float, bool]], errors: List[str]) -> Tuple[Dict[str, float], float]:
+    targets: Dict[str, float] = {}
+    qualifiers: Dict[str, List[str]] = {}
+    as_percent = False
+    rejected = False
+    for label, value, percent in block:
+        parsed = split_class_label(label)
+        if parsed is None:
+            errors.append(f"unrecognized asset class in target allocations: {label!r}")
+            rejected = True
+            continue
+        name, qualifier = parsed
+        seen = qualifiers.setdefault(name, [])
+        # "US stocks 40%, international stocks 20%" both count towards stock,
+        # but "stocks" twice, or "stocks" next to "US stocks", is ambiguous
+        if qualifier in seen or (seen and "" in seen + [qualifier]):
+            errors.append(f"duplicate target allocation for {name}: {label!r}")
+            rejected = True
+            continue
+        seen.append(qualifier)
+        targets[name] = targets.get(name, 0.0) + value
+        as_percent = as_percent or percent
+    if rejected:
+        errors.append("target allocations rejected")
+        return {}, sum(targets.values())
+    return normalize_targets(targets, as_percent, errors)
+
+
+def _close_brackets(brackets: List[List[int]], count: int, entries: int) -> bool:
+    """
+    Pop ``count`` brackets from a stack of [entries when opened, brackets]
+    runs; True if one that closed held two or more weights (the list ended)
+    """
+    closed_list = False
+    while count and brackets:
+        run = brackets[-1]
+        closing = min(count, run[1])
+        run[1] -= closing
+        count -= closing
+        closed_list = closed_list or entries - run[0] >= 2
+        if not run[1]:
+            brackets.pop()
+    return closed_list
+
+
+def parse_text_analysis(text: str, symbols: Optional[Iterable[str]] = None) -> ParsedAnalysis:
+    """
+    Extract allocation changes and target allocations from a free-text response.
+
+    Args:
+        text: Model response
+        symbols: Tickers held in the portfolio, recognized as change targets
+    """
+    symbols = {symbol.upper() for symbol in symbols} if symbols is not None else None
+    result = ParsedAnalysis(text=text)
+    block_errors: List[str] = []
+
+    # Change tuple automaton: 0 idle, 1 after '(', 2 in label, 3 after separator, 4 after number
+    tuple_state, tuple_label, tuple_value = 0, [], 0.0
+    # Target block state; brackets opened inside the block as [weights before them, count] runs
+    in_block = False
+    block: List[Tuple[str, float, bool]] = []
+    last_block: List[Tuple[str, float, bool]] = []
+    brackets: List[List[int]] = []
+    # Non-class pairs after the weights: prose, unless another weight follows
+    strays: List[Tuple[str, float, bool]] = []
+    label: List[str] = []
+    previous = None
+
+    for match in _TOKENS.finditer(text):
+        kind = match.lastgroup
+        value = match.group(kind)
+        percent = False
+        if kind == "percent":
+            kind, value, percent = "number", match.group("number"), True
+        if kind == "quoted":
+            quoted_number = _QUOTED_NUMBER.fullmatch(value[1:-1])
+            if quoted_number:
+                kind, value, percent = "number", quoted_number.group(1), bool(quoted_number.group(2))
+            else:
+                kind, value = "word", value[1:-1]
+        elif kind == "other" and value == "&" and previous == "word":
+            kind = "word"  # "cash & equivalents"
+
+        if kind == "marker":
+            if block:
+                last_block = block
+            in_block, block, label, brackets, strays = True, [], [], [], []
+            tuple_state = 0
+        elif kind == "para":
+            if in_block and block:
+                in_block, last_block, block = False, block, []
+            label = []
+            tuple_state = 0
+        elif in_block:
+            # label [separators] number
+            if kind == "word":
+                label = (label + [value] if previous == "word" else [value])[-MAX_LABEL_WORDS:]
+            elif kind == "number":
+                pair = (" ".join(label), _to_float(value), percent)
+                if label and (brackets or split_class_label(pair[0]) is not None):
+                    block.extend(strays)
+                    block.append(pair)
+                    strays = []
+                elif label and block:
+                    strays.append(pair)
+                label = []
+            elif kind == "open":
+                if brackets and brackets[-1][0] == len(block):
+                    brackets[-1][1] += len(value)
+                else:
+                    brackets.append([len(block), len(value)])
+            elif kind == "close":
+                if _close_brackets(brackets, len(value), len(block)):
+                    in_block, last_block, block = False, block, []
+                label = []
+            elif kind == "sep" or (kind == "other" and _PAIR_FILLER.issuperset(value)):
+                pass
+            else:
+                label = []
+        else:
+            # ( label , number )
+            if kind == "open":
+                tuple_state, tuple_label = 1, []
+            elif kind == "word" and tuple_state in (1, 2):
+                tuple_state = 2
+                tuple_label = (tuple_label + [value])[-MAX_LABEL_WORDS:]
+            elif kind == "sep" and value == "," and tuple_state == 2:
+                tuple_state = 3
+            elif kind == "number" and tuple_state == 3:
+                tuple_state, tuple_value = 4, _to_float(value)
+            elif kind == "close" and tuple_state == 4:
+                subject = " ".join(tuple_label)
+                classified = classify_target(subject, symbols)
+                if classified is None:
+                    result.errors.append(f"unrecognized allocation change target: {subject!r}")
+                else:
+                    result.changes.append(AllocationChange(classified[1], classified[0], tuple_value))
+                tuple_state = 0
+            else:
+                tuple_state = 0
+        previous = kind
+
+    if block:
+        last_block = block
+    if last_block:
+        result.target_allocation, result.raw_total = _finish_block(last_block, block_errors)
+        result.errors.extend(block_errors)
+    else:
+        result.errors.append("no target allocations found")
+    return result
+
+
+def parse_json_analysis(text: str, symbols: Optional[Iterable[str]] = None) -> ParsedAnalysis:
+    """Validate a JSON-mode response against ALLOCATION_RESPONSE_SCHEMA"""
+    symbols = {symbol.upper() for symbol in symbols} if symbols is not None else None
+    body = text.strip()
+    if body.startswith("```"):
+        body = body.strip("`")
+        body = body[body.find("{"):]
+    data = json.loads(body)
+
+    result = ParsedAnalysis(text=text, source="json")
+    if not isinstance(data, dict):
+        result.errors.append("response is not a JSON object")
+        return result
+    if isinstance(data.get("analysis"), str):
+        result.text = data["analysis"]
+    else:
+        result.errors.append("'analysis' must be a string")
+
+    for change in data.get("changes") or []:
+        if not isinstance(change, dict) or not isinstance(change.get("change"), (int, float)):
+            result.errors.append(f"invalid change entry: {change!r}")
+            continue
+        classified = classify_target(str(change.get("target", "")), symbols)
+        if classified is None:
+            result.errors.append(f"unrecognized allocation change target: {change.get('target')!r}")
+            continue
+        result.changes.append(AllocationChange(classified[1], classified[0], float(change["change"])))
+
+    target_allocation = data.get("target_allocation")
+    if not isinstance(target_allocation, dict) or not target_allocation:
+        result.errors.append("'target_allocation' must be a non-empty object")
+        return result
+    targets = {}
+    for label, value in target_allocation.items():
+        name = canonical_asset_class(label)
+        if name is None:
+            result.errors.append(f"unrecognized asset class in target allocations: {label!r}")
+        elif not isinstance(value, (int, float)) or isinstance(value, bool):
+            result.errors.append(f"target allocation for {name} is not a number: {value!r}")
+        else:
+            targets[name] = float(value)
+    result.target_allocation, result.raw_total = normalize_targets(targets, True, result.errors)
+    return result
+
+
+def parse_analysis(text: str, symbols: Optional[Iterable[str]] = None) -> ParsedAnalysis:
+    """Parse a response in JSON mode when it is a JSON object, as free text otherwise"""
+    stripped = text.lstrip()
+    if stripped.startswith("{") or stripped.startswith("```json"):
+        try:
+            return parse_json_analysis(text, symbols)
+        except ValueError as e:
+            result = parse_text_analysis(text, symbols)
+            result.errors.insert(0, f"invalid JSON response, parsed as text: {e}")
+            return result
+    return parse_text_analysis(text, symbols)
+
+
+# Fuzzing and benchmarking
+
+_PROSE = (
+    "Markets rallied on strong earnings while yields eased (10-year at 4.2%). "
+    "Given the headlines, a modest shift is warranted; volatility in crypto remains high. "
+    "Note: the Fed meets on 2024-06-12, and CPI printed 3.1% y/y {core: 3.6%}. "
+)
+# Rationale written straight after the target block, without a blank line
+_TRAILING_PROSE = (
+    "",
+    "\nRationale: reducing bonds by 5% and raising crypto to 10% reflects momentum.",
+    ". This trims stocks by 5%",
+    " - keeping cash near 10% adds a buffer, while equities return 7% a year.",
+)
+# (response, expected target allocation; empty when the block must be rejected)
+_REGRESSION_CASES = [
+    ('target allocations: [("stocks":"60%"), ("bonds":"20%"), ("crypto":"10%"), ("cash":"10%")]\n'
+     'Rationale: reducing bonds by 5% and raising crypto to 10% reflects momentum.',
+     {"stock": 60, "bond": 20, "crypto": 10, "cash": 10}),
+    ("target allocations: Stocks 60%, Bonds 20%, Crypto 10%, Cash 10%. This trims stocks by 5%",
+     {"stock": 60, "bond": 20, "crypto": 10, "cash": 10}),
+    ("target allocations: US stocks 40%, international stocks 20%, bonds 30%, cash 10%",
+     {"stock": 60, "bond": 30, "cash": 10}),
+    ("target allocations: stocks 60%, bonds 20%, stocks 10%, cash 10%", {}),
+    ("target allocations: stocks 50%, US stocks 10%, bonds 30%, cash 10%", {}),
+    ("target allocations: stocks 60%, bonds 20%, gold 10%, cash 10%", {}),
+]
+
+
+def _random_response(rng, targets: Dict[str, float], changes: List[Tuple[str, float]], noise_chars: int) -> str:
+    """A noisy response with the given target block and change tuples in a random format"""
+    names = {
+        "stock": ["stocks", "Stocks", "equities", "US stocks"],
+        "bond": ["bonds", "Bonds", "fixed income"],
+        "crypto": ["crypto", "Crypto", "cryptocurrency"],
+        "cash": ["cash", "Cash", "cash & equivalents"],
+    }
+    as_fraction = rng.random() < 0.2
+
+    def number(value: float) -> str:
+        if as_fraction:
+            return f"{value / 100:.4f}"
+        return f"{value:g}" + rng.choice(["%", " %", "", " percent"])
+
+    entries = []
+    for name, value in targets.items():
+        label = rng.choice(names[name])
+        template = rng.choice([
+            '("{l}":"{v}")', '{l}: {v}', '"{l}": {v}', '- **{l}**: {v}', '{l} - {v}', "('{l}', {v})", '{l}={v}',
+        ])
+        entries.append(template.format(l=label, v=number(value)))
+    separator = rng.choice([", ", "\n", "; ", " "])
+    opener, closer = rng.choice([("[", "]"), ("{", "}"), ("", ""), ("(", ")")])
+    block = rng.choice(["target allocations", "Target Allocations", "**Target allocation**"]) + \
+        rng.choice([": ", ":\n", " - "]) + opener + separator.join(entries) + closer
+
+    change_lines = [
+        f"{i + 1}.  For {rng.choice(['asset class', 'market', 'specific asset'])}: "
+        f'("{label}", {value:+g}%)' for i, (label, value) in enumerate(changes)
+    ]
+    noise = (_PROSE * (noise_chars // len(_PROSE) + 1))[:noise_chars]
+    junk = "".join(rng.choice(list("(((\"''::,,%%--{}[]− \n")) for _ in range(rng.randrange(0, 200)))
+    return "\n".join(change_lines) + "\n\n" + noise + junk + "\n\n" + block + rng.choice(_TRAILING_PROSE) + \
+        "\n\n" + noise[: noise_chars // 4]
+
+
+def fuzz(iterations: int = 2000, seed: int = 0) -> int:
+    """
+    Check the regression cases, then parse random noisy responses and check
+    the known allocations are recovered; returns failures
+    """
+    import random
+
+    rng = random.Random(seed)
+    failures = 0
+    for text, expected in _REGRESSION_CASES:
+        parsed = parse_analysis(text)
+        if parsed.target_allocation.keys() != expected.keys() or any(
+            abs(parsed.target_allocation[name] - value) > 1e-6 for name, value in expected.items()
+        ):
+            failures += 1
+            print(f"regression {text!r}\n  expected {expected}\n  got      {parsed.target_allocation}")
+    change_choices = [("Bonds", "asset_class", "bond"), ("Emerging", "region", "Emerging"),
+                      ("AAPL", "asset", "AAPL"), ("Developed Markets", "region", "Developed"),
+                      ("Cash", "asset_class", "cash")]
+    for i in range(iterations):
+        weights = [rng.randint(0, 50) for _ in ASSET_CLASSES]
+        if not sum(weights):
+            weights[0] = 1
+        targets = dict(zip(ASSET_CLASSES, weights))
+        chosen = rng.sample(change_choices, rng.randrange(0, len(change_choices) + 1))
+        changes = [(label, float(rng.randint(-20, 20))) for label, _, _ in chosen]
+        text = _random_response(rng, targets, changes, rng.randrange(0, 4000))
+
+        try:
+            parsed = parse_analysis(text)
+        except Exception as e:  # the parser must never raise on text input
+            failures += 1
+            print(f"#{i}: raised {e!r}")
+            continue
+
+        total = sum(targets.values())
+        expected = {name: value * 100 / total for name, value in targets.items()}
+        expected_changes = [(name, kind, value) for (_, kind, name), (_, value) in zip(chosen, changes)]
+        got_changes = [(c.target, c.kind, c.change) for c in parsed.changes]
+        ok = (
+            parsed.target_allocation.keys() == expected.keys()
+            and all(abs(parsed.target_allocation[n] - expected[n]) < 1e-6 for n in expected)
+            and abs(sum(parsed.target_allocation.values()) - 100) < 1e-6
+            and got_changes == expected_changes
+        )
+        if not ok:
+            failures += 1
+            if failures <= 5:
+                print(f"#{i}: mismatch\n  expected {expected} {expected_changes}\n"
+                      f"  got      {parsed.target_allocation} {got_changes}\n  errors   {parsed.errors}")
+    return failures
+
+
+def benchmark(sizes_kb: Iterable[int] = (10, 100, 1000, 10000), seed: int = 0) -> List[Dict[str, float]]:
+    """Parse time of noisy responses of increasing size, plus pathological inputs"""
+    import random
+    import time
+
+    rng = random.Random(seed)
+    targets = {"stock": 60, "bond": 20, "crypto": 10, "cash": 10}
+    cases = []
+    for size in sizes_kb:
+        cases.append((f"noisy {size} KB", _random_response(rng, targets, [("Bonds", 10.0)], size * 1024)))
+    size = max(sizes_kb) * 1024
+    cases += [
+        ("open parens", "(" * size),
+        ("quotes", '"' * size),
+        ("digits", "1" * size),
+        ("markers", "target allocations " * (size // 19)),
+        ("unclosed tuples", '("Bonds", 10%' * (size // 13)),
+    ]
+
+    results = []
+    for name, text in cases:
+        start = time.perf_counter()
+        parse_analysis(text)
+        elapsed = time.perf_counter() - start
+        megabytes = len(text) / 1e6
+        results.append({"case": name, "megabytes": megabytes, "seconds": elapsed,
+                        "mb_per_second": megabytes / elapsed if elapsed else float("inf")})
+    return results
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fuzz and benchmark the allocation parser")
+    parser.add_argument("--iterations", type=int, default=2000, help="Fuzz iterations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-kb", type=int, default=1000, help="Largest benchmark response")
+    args = parser.parse_args()
+
+    failures = fuzz(args.iterations, args.seed)
+    print(f"Fuzz: {args.iterations - failures}/{args.iterations} responses parsed correctly")
+
+    sizes = [size for size in (10, 100, 1000, 10000) if size <= args.max_kb] or [args.max_kb]
+    print(f"{'case':<18}{'MB':>8}{'seconds':>10}{'MB/s':>8}")
+    for row in benchmark(sizes, args.seed):
+        print(f"{row['case']:<18}{row['megabytes']:>8.2f}{row['seconds']:>10.3f}{row['mb_per_second']:>8.1f}")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
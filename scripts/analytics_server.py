@@ -0,0 +1,432 @@
+"""
+Persistent analytics worker for the Next.js API routes.
+
+Serves JSON-RPC 2.0 over HTTP on localhost and keeps a warm PortfolioManager,
+ScenarioAnalyzer, RiskProfiler and AIPortfolioAdvisor in memory, so a request
+costs a method call instead of interpreter start-up plus NumPy and Groq
+imports.
+
+Streaming methods are served from POST /stream with the same request body.
+Each piece of the response is written as soon as it is produced, as
+newline-delimited JSON ({"delta": ...} lines, then {"done": true}) or, when
+the client sends ``Accept: text/event-stream``, as server-sent events. A
+stream may also emit other events, such as {"prompt_tokens": {...}} first.
+
+Run from the repository root:
+    poetry run python -m scripts.analytics_server --port 8765
+"""
+
+import argparse
+import asyncio
+import contextlib
+import inspect
+import io
+import json
+import os
+import threading
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+import numpy as np
+
+from scripts.historical_var import DEFAULT_LOOKBACK
+from scripts.portfolio_manager import PortfolioManager
+from scripts.risk_profiler import RiskProfiler
+from scripts.scenario_analysis import ScenarioAnalyzer
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class RPCError(Exception):
+    """Error reported back to the caller as a JSON-RPC error object"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _to_json(value: Any) -> Any:
+    """json.dumps fallback for NumPy scalars and arrays"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _finite(value: Any) -> Any:
+    """Copy of a result with NaN and infinities replaced by None, which JSON can represent"""
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return _finite(value.tolist())
+    if isinstance(value, (float, np.floating)):
+        return float(value) if np.isfinite(value) else None
+    return value
+
+
+def _dumps(value: Any) -> bytes:
+    """Strict JSON: non-finite floats become null instead of the invalid NaN/Infinity tokens"""
+    try:
+        return json.dumps(value, default=_to_json, allow_nan=False).encode()
+    except ValueError:
+        return json.dumps(_finite(value), default=_to_json, allow_nan=False).encode()
+
+
+class EventLoopThread:
+    """
+    An asyncio event loop running forever on a daemon thread.
+
+    Async work submitted from the request threads shares this loop, so pooled
+    async clients bound to it keep their connections alive between requests.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="analytics-event-loop", daemon=True)
+        self._thread.start()
+
+    def run(self, coroutine: Awaitable[Any]) -> Any:
+        """Run a coroutine on the loop and block the calling thread for its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+
+class AnalyticsService:
+    """Long-lived analytics objects and the RPC methods that use them"""
+
+    def __init__(self):
+        self.portfolio_manager = PortfolioManager()
+        self.scenario_analyzer = ScenarioAnalyzer(self.portfolio_manager)
+        self.risk_profiler = RiskProfiler()
+        self._advisor = None
+        self.event_loop = EventLoopThread()
+        # Guards lazy construction of the advisor; portfolio reads and writes
+        # go through the portfolio manager's own lock
+        self._lock = threading.Lock()
+
+        self.methods: Dict[str, Callable[..., Any]] = {
+            "portfolio.get": self.portfolio_get,
+            "portfolio.rebalance": self.portfolio_rebalance,
+            "portfolio.update_prices": self.portfolio_update_prices,
+            "portfolio.refresh_market_data": self.portfolio_refresh_market_data,
+            "scenario.monte_carlo": self.scenario_monte_carlo,
+            "scenario.interest_rates": self.scenario_interest_rates,
+            "scenario.risk_analysis": self.scenario_risk_analysis,
+            "scenario.summary": self.scenario_summary,
+            "scenario.covariance": self.scenario_covariance,
+            "risk_profile.questions": self.risk_profile_questions,
+            "risk_profile.assess": self.risk_profile_assess,
+            "advisor.chat": self.advisor_chat,
+            "advisor.analysis": self.advisor_analysis,
+            "advisor.market_outlook": self.advisor_market_outlook,
+            "advisor.rebalancing_advice": self.advisor_rebalancing_advice,
+            "advisor.dashboard": self.advisor_dashboard,
+            "advisor.cache_stats": self.advisor_cache_stats,
+            "advisor.scheduler_stats": self.advisor_scheduler_stats,
+            "groq.test": self.groq_test,
+        }
+        self.streams: Dict[str, Callable[..., Iterator[Any]]] = {
+            "advisor.chat_stream": self.advisor_chat_stream,
+        }
+
+    @property
+    def advisor(self):
+        """AIPortfolioAdvisor, created on first use since it needs GROQ_API_KEY"""
+        with self._lock:
+            if self._advisor is None:
+                from scripts.ai_portfolio_advisor import AIPortfolioAdvisor
+
+                self._advisor = AIPortfolioAdvisor(self.portfolio_manager)
+            return self._advisor
+
+    @staticmethod
+    def _call(handlers: Dict[str, Callable[..., Any]], method: str, params: Optional[Dict[str, Any]]) -> Any:
+        handler = handlers.get(method)
+        if handler is None:
+            raise RPCError(-32601, f"Method not found: {method}")
+        params = params or {}
+        try:
+            inspect.signature(handler).bind(**params)
+        except TypeError as e:
+            raise RPCError(-32602, f"Invalid params for {method}: {e}")
+        return handler(**params)
+
+    def dispatch(self, method: str, params: Optional[Dict[str, Any]]) -> Any:
+        """Call an RPC method by name with keyword parameters"""
+        return self._call(self.methods, method, params)
+
+    def stream(self, method: str, params: Optional[Dict[str, Any]]) -> Iterator[Any]:
+        """Start a streaming method by name; yields text deltas or event dicts"""
+        return self._call(self.streams, method, params)
+
+    # Portfolio
+
+    def portfolio_get(self) -> bytes:
+        return self.portfolio_manager.to_json_bytes()
+
+    def portfolio_rebalance(self, target_allocation: Dict[str, float]) -> Dict[str, Any]:
+        return self.portfolio_manager.rebalance_portfolio(target_allocation)
+
+    def portfolio_update_prices(self, prices: Dict[str, float]) -> bytes:
+        # One critical section, so the response is the snapshot of this update
+        with self.portfolio_manager.lock:
+            self.portfolio_manager.update_prices(prices)
+            return self.portfolio_manager.to_json_bytes()
+
+    def portfolio_refresh_market_data(self, as_of: Optional[str] = None) -> Dict[str, Any]:
+        return self.portfolio_manager.refresh_market_data(as_of)
+
+    # Scenario analysis
+
+    def scenario_monte_carlo(
+        self,
+        num_simulations: int = 1000,
+        time_horizon: int = 252,
+        seed: Optional[int] = None,
+        variance_reduction: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return self.scenario_analyzer.monte_carlo_simulation(
+            num_simulations=num_simulations,
+            time_horizon=time_horizon,
+            seed=seed,
+            variance_reduction=variance_reduction
+        )
+
+    def scenario_interest_rates(self, seed: Optional[int] = None) -> Dict[str, Any]:
+        return self.scenario_analyzer.interest_rate_scenarios(seed=seed)
+
+    def scenario_risk_analysis(
+        self,
+        seed: Optional[int] = None,
+        variance_reduction: Optional[str] = None,
+        engine: str = "monte_carlo",
+        lookback: int = DEFAULT_LOOKBACK
+    ) -> Dict[str, Any]:
+        return self.scenario_analyzer.risk_analysis(
+            seed=seed, variance_reduction=variance_reduction, engine=engine, lookback=lookback
+        )
+
+    def scenario_summary(self, seed: Optional[int] = None) -> Dict[str, Any]:
+        """Everything the scenario_analysis.py script prints, as structured data"""
+        return {
+            "monte_carlo": self.scenario_monte_carlo(seed=seed)["statistics"],
+            "interest_rate_scenarios": self.scenario_interest_rates(seed=seed),
+            "risk_analysis": self.scenario_risk_analysis(seed=seed)
+        }
+
+    def scenario_covariance(self, method: str = "ledoit_wolf", window: int = 252) -> Dict[str, Any]:
+        """Historical covariance of the stored holdings; cached by the analyzer's covariance service"""
+        estimate = self.scenario_analyzer.historical_covariance(method, window)
+        if estimate is None:
+            raise RPCError(-32000, "No market data history for the portfolio's holdings")
+        return {
+            "symbols": estimate.symbols,
+            "method": estimate.method,
+            "as_of": str(estimate.as_of),
+            "observations": estimate.observations,
+            "shrinkage": estimate.shrinkage,
+            "volatilities": estimate.volatilities,
+            "correlation": estimate.correlation,
+            "covariance": estimate.matrix,
+            "condition_number": estimate.condition_number(),
+            "cache": self.scenario_analyzer.covariance_service.stats(),
+        }
+
+    # Risk profiling
+
+    def risk_profile_questions(self) -> Any:
+        return [asdict(question) for question in self.risk_profiler.questions]
+
+    def risk_profile_assess(self, answers: Dict[str, str]) -> Dict[str, Any]:
+        answers_by_id = {int(question_id): value for question_id, value in answers.items()}
+        profile = self.risk_profiler.determine_risk_profile(answers_by_id)
+        return {
+            "risk_score": self.risk_profiler.calculate_risk_score(answers_by_id),
+            "risk_profile": asdict(profile),
+            "recommendations": self.risk_profiler.get_personalized_recommendations(profile)
+        }
+
+    # AI advisor
+
+    def advisor_chat(
+        self,
+        message: str,
+        conversation_history: Optional[list] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        context = self.advisor.chat_context(message, conversation_history)
+        return {
+            "response": self.advisor.chat_with_advisor(message, conversation_history, use_cache, context),
+            "prompt_tokens": context.token_counts()
+        }
+
+    def advisor_analysis(self, analysis_type: str = "comprehensive") -> Dict[str, str]:
+        return {"analysis": self.advisor.get_portfolio_analysis(analysis_type)}
+
+    def advisor_market_outlook(self) -> Dict[str, str]:
+        return {"outlook": self.advisor.get_market_outlook()}
+
+    def advisor_rebalancing_advice(self, target_allocation: Dict[str, float]) -> Dict[str, str]:
+        return {"advice": self.advisor.get_rebalancing_advice(target_allocation)}
+
+    def advisor_dashboard(
+        self,
+        target_allocation: Dict[str, float],
+        analysis_type: str = "comprehensive"
+    ) -> Dict[str, str]:
+        """Analysis, outlook and rebalancing advice requested concurrently"""
+        return self.event_loop.run(self.advisor.get_dashboard_insights(target_allocation, analysis_type))
+
+    def advisor_chat_stream(
+        self,
+        message: str,
+        conversation_history: Optional[list] = None,
+        use_cache: bool = True
+    ) -> Iterator[Any]:
+        context = self.advisor.stream_chat_context(message, conversation_history)
+        yield {"prompt_tokens": context.token_counts()}
+        yield from self.advisor.stream_chat_response(message, conversation_history, use_cache, context)
+
+    def advisor_cache_stats(self) -> Dict[str, Any]:
+        return self.advisor.cache.stats()
+
+    def advisor_scheduler_stats(self) -> Dict[str, Any]:
+        return self.advisor.scheduler.stats()
+
+    def groq_test(self) -> Dict[str, Any]:
+        from scripts.test_groq_connection import test_groq_connection
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            success = test_groq_connection()
+        return {"success": success, "output": output.getvalue()}
+
+
+def encode_response(request_id: Any, result: Any = None, error: Optional[RPCError] = None) -> bytes:
+    """Encode a JSON-RPC response; bytes results are spliced in as pre-encoded JSON"""
+    envelope = b'{"jsonrpc": "2.0", "id": ' + json.dumps(request_id).encode()
+    if error is not None:
+        body = json.dumps({"code": error.code, "message": error.message}).encode()
+        return envelope + b', "error": ' + body + b"}"
+    if not isinstance(result, bytes):
+        result = _dumps(result)
+    return envelope + b', "result": ' + result + b"}"
+
+
+def encode_event(event: Dict[str, Any], sse: bool) -> bytes:
+    """Encode one streaming event as an NDJSON line or a server-sent event"""
+    data = _dumps(event)
+    return b"data: " + data + b"\n\n" if sse else data + b"\n"
+
+
+class RPCRequestHandler(BaseHTTPRequestHandler):
+    service: AnalyticsService
+    # Write each streamed delta to the socket immediately
+    disable_nagle_algorithm = True
+
+    def _send(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send(200, b'{"status": "ok"}')
+        else:
+            self._send(404, b'{"error": "not found"}')
+
+    def _read_request(self) -> Dict[str, Any]:
+        """Parse the JSON-RPC request body, raising RPCError(-32700) if malformed"""
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            request["method"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise RPCError(-32700, f"Invalid request: {e}")
+        return request
+
+    def do_POST(self) -> None:
+        if self.path == "/stream":
+            self._stream()
+            return
+        if self.path != "/rpc":
+            self._send(404, b'{"error": "not found"}')
+            return
+
+        try:
+            request = self._read_request()
+        except RPCError as e:
+            self._send(200, encode_response(None, error=e))
+            return
+
+        request_id, method = request.get("id"), request["method"]
+        try:
+            body = encode_response(request_id, self.service.dispatch(method, request.get("params")))
+        except RPCError as e:
+            body = encode_response(request_id, error=e)
+        except Exception as e:
+            body = encode_response(request_id, error=RPCError(-32000, str(e)))
+        self._send(200, body)
+
+    def _stream(self) -> None:
+        sse = "text/event-stream" in self.headers.get("Accept", "")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream" if sse else "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        chunks = None
+        try:
+            request = self._read_request()
+            chunks = self.service.stream(request["method"], request.get("params"))
+            for chunk in chunks:
+                event = chunk if isinstance(chunk, dict) else {"delta": chunk}
+                self.wfile.write(encode_event(event, sse))
+            event = {"done": True}
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away; stop generating
+            if chunks is not None:
+                chunks.close()
+            return
+        except RPCError as e:
+            event = {"error": {"code": e.code, "message": e.message}}
+        except Exception as e:
+            event = {"error": {"code": -32000, "message": str(e)}}
+        self.wfile.write(encode_event(event, sse))
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if os.getenv("ANALYTICS_SERVER_VERBOSE"):
+            super().log_message(format, *args)
+
+
+def create_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """Build the HTTP server with a fresh, warm AnalyticsService"""
+    handler = type("BoundRPCRequestHandler", (RPCRequestHandler,), {"service": AnalyticsService()})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    """Run the analytics worker until interrupted"""
+    parser = argparse.ArgumentParser(description="QuantAlpha persistent analytics worker")
+    parser.add_argument("--host", default=os.getenv("PYTHON_WORKER_HOST", DEFAULT_HOST))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PYTHON_WORKER_PORT", DEFAULT_PORT)))
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port)
+    print(f"🚀 QuantAlpha analytics worker listening on http://{args.host}:{args.port}/rpc")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Batch advisory commentary for many accounts.
+
+Builds each account's analysis prompt with AIPortfolioAdvisor's template and
+requests them concurrently: at most ``concurrency`` requests are in flight,
+and the advisor's RequestScheduler keeps the whole batch within the Groq rate
+limits. Each result is appended to a JSONL file as soon as it arrives; the
+file doubles as the checkpoint, so a rerun after a crash skips every account
+that already has a successful line and retries the rest.
+
+Run from the repository root:
+    poetry run python -m scripts.batch_advisory accounts.json --output commentary.jsonl
+    poetry run python -m scripts.batch_advisory --sample 20 --output commentary.jsonl
+
+The accounts file is a JSON list of
+    {"account_id": "...", "risk_profile": "moderate",
+     "holdings": [{"symbol": "AAPL", "name": "Apple Inc.", "asset_type": "stock",
+                   "region": "US", "value": 18862.58, "current_price": 185.5,
+                   "change_percent": 1.8}, ...]}
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+from scripts.ai_portfolio_advisor import AIPortfolioAdvisor
+from scripts.portfolio_manager import PortfolioManager
+
+DEFAULT_CONCURRENCY = 8
+
+Account = Tuple[str, PortfolioManager]
+
+
+def load_accounts(path: str) -> List[Account]:
+    """Accounts from a JSON file in the format described in the module docstring"""
+    with open(path) as f:
+        accounts = json.load(f)
+
+    loaded = []
+    for account in accounts:
+        records = [
+            (
+                holding["symbol"], holding.get("name", holding["symbol"]),
+                holding["asset_type"], holding["region"], 0.0, holding["value"],
+                holding.get("current_price", 1.0), holding.get("change_percent", 0.0)
+            )
+            for holding in account["holdings"]
+        ]
+        manager = PortfolioManager.from_records(records, account.get("risk_profile", "moderate"))
+        loaded.append((str(account["account_id"]), manager))
+    return loaded
+
+
+def sample_accounts(count: int, seed: int = 0) -> List[Account]:
+    """Randomly weighted accounts over the sample portfolio's holdings"""
+    rng = np.random.default_rng(seed)
+    universe = [asset.as_tuple() for asset in PortfolioManager().portfolio.assets]
+    risk_profiles = ["conservative", "moderate", "aggressive"]
+
+    accounts = []
+    for i in range(count):
+        values = rng.dirichlet(np.ones(len(universe))) * rng.uniform(5e4, 5e5)
+        # Same holdings, account-specific values (field 5 of the record tuple)
+        records = [(*record[:5], value, *record[6:]) for record, value in zip(universe, values)]
+        risk_profile = risk_profiles[rng.integers(len(risk_profiles))]
+        accounts.append((f"sample-{i:04d}", PortfolioManager.from_records(records, risk_profile)))
+    return accounts
+
+
+def completed_accounts(path: str) -> Set[str]:
+    """Account ids with a successful result in an existing output file"""
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # partial line left by a crash mid-write
+            if record.get("status") == "ok":
+                completed.add(record["account_id"])
+    return completed
+
+
+class BatchAdvisoryJob:
+    """
+    Concurrent, resumable portfolio analysis for a list of accounts.
+
+    Args:
+        advisor: Advisor whose prompt template, client, cache and scheduler are used
+        output_path: JSONL file results are appended to (and resumed from)
+        analysis_type: Passed to the analysis prompt, as in get_portfolio_analysis
+        concurrency: Most requests in flight at once
+    """
+
+    def __init__(
+        self,
+        advisor: AIPortfolioAdvisor,
+        output_path: str,
+        analysis_type: str = "comprehensive",
+        concurrency: int = DEFAULT_CONCURRENCY
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.advisor = advisor
+        self.output_path = output_path
+        self.analysis_type = analysis_type
+        self.concurrency = concurrency
+
+    def _open_output(self):
+        output = open(self.output_path, "a+b")
+        # Terminate a partial last line so the next record starts cleanly
+        if output.tell() > 0:
+            output.seek(-1, os.SEEK_END)
+            if output.read(1) != b"\n":
+                output.write(b"\n")
+        return output
+
+    def _write(self, output, record: Dict[str, Any]) -> None:
+        output.write(json.dumps(record).encode() + b"\n")
+        output.flush()
+        os.fsync(output.fileno())
+
+    async def _analyze(self, account_id: str, manager: PortfolioManager) -> Dict[str, Any]:
+        record = {
+            "account_id": account_id,
+            "analysis_type": self.analysis_type,
+            "risk_profile": manager.portfolio.risk_profile,
+            "total_value": manager.portfolio.total_value,
+        }
+        try:
+            record["analysis"] = await self.advisor.analyze_account_async(manager, self.analysis_type)
+            record["status"] = "ok"
+        except Exception as e:
+            record["error"] = str(e)
+            record["status"] = "error"
+        record["generated_at"] = datetime.now().isoformat()
+        return record
+
+    async def run(self, accounts: Iterable[Account]) -> Dict[str, Any]:
+        """Analyze every account not already completed in the output file"""
+        start = time.perf_counter()
+        accounts = list(accounts)
+        done = completed_accounts(self.output_path)
+        pending = iter([(account_id, manager) for account_id, manager in accounts if account_id not in done])
+        counts = {"completed": 0, "failed": 0}
+
+        with self._open_output() as output:
+            write_lock = asyncio.Lock()
+
+            async def worker() -> None:
+                # Workers share one iterator, so at most `concurrency` accounts are in flight
+                for account_id, manager in pending:
+                    record = await self._analyze(account_id, manager)
+                    # fsync blocks for milliseconds: keep it off the event loop, one record at a time
+                    async with write_lock:
+                        await asyncio.to_thread(self._write, output, record)
+                    counts["completed" if record["status"] == "ok" else "failed"] += 1
+
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+        return {
+            "accounts": len(accounts),
+            "skipped": len(accounts) - counts["completed"] - counts["failed"],
+            **counts,
+            "elapsed_seconds": time.perf_counter() - start,
+            "output": self.output_path,
+            "scheduler": self.advisor.scheduler.stats(),
+            "cache": self.advisor.cache.stats(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate advisory commentary for many accounts")
+    parser.add_argument("accounts", nargs="?", help="JSON file of accounts")
+    parser.add_argument("--sample", type=int, help="Use N randomly weighted sample accounts instead")
+    parser.add_argument("--output", default="advisory_commentary.jsonl")
+    parser.add_argument("--analysis-type", default="comprehensive")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    args = parser.parse_args()
+
+    if args.sample:
+        accounts = sample_accounts(args.sample)
+    elif args.accounts:
+        accounts = load_accounts(args.accounts)
+    else:
+        parser.error("pass an accounts file or --sample N")
+
+    job = BatchAdvisoryJob(AIPortfolioAdvisor(), args.output, args.analysis_type, args.concurrency)
+    summary = asyncio.run(job.run(accounts))
+    print(f"✅ {summary['completed']} completed, {summary['failed']} failed, "
+          f"{summary['skipped']} already done in {summary['elapsed_seconds']:.1f}s → {summary['output']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Token-aware prompt construction for advisor chat.
+
+Chat prompts are a long system prompt, the conversation so far and the new
+user message. ChatContextBuilder counts tokens locally and fits the prompt
+into a token budget:
+
+* the system prompt is passed through unchanged, so consecutive turns share a
+  byte-identical prefix that provider-side prompt caching can reuse;
+* history is kept newest first while it fits; a single oversized message is
+  shortened in the middle rather than dropping the whole turn;
+* older turns that no longer fit are replaced by a short extractive summary
+  placed after the system prompt, so the prefix stays stable.
+
+Token counts use a local approximation of Llama 3's tokenizer (about four
+characters per word piece, digits in groups of three, one token per symbol),
+which is close enough for budgeting without a tokenizer dependency.
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+DEFAULT_PROMPT_TOKEN_BUDGET = 3000
+MESSAGE_OVERHEAD_TOKENS = 4  # role and delimiter tokens around each message
+SUMMARY_LINE_CHARS = 160
+
+_TOKEN_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def count_tokens(text: str) -> int:
+    """Approximate Llama 3 token count of ``text``"""
+    tokens = 0
+    for piece in _TOKEN_PIECES.findall(text):
+        if piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif piece[0].isalpha() and piece.isascii():
+            tokens += math.ceil(len(piece) / 4)
+        else:
+            tokens += 1
+    return tokens
+
+
+def count_message_tokens(messages: List[Dict]) -> int:
+    """Approximate prompt tokens of a chat message list"""
+    return sum(count_tokens(str(message.get("content", ""))) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def shorten(text: str, max_tokens: int) -> str:
+    """Cut the middle out of ``text`` so it fits ``max_tokens``, keeping both ends"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    marker = " … "
+    keep = max(0, max_tokens - count_tokens(marker))
+    head, tail = text[:len(text) // 2], text[len(text) // 2:]
+    # Characters per token of this text, to size both halves in one pass
+    ratio = len(text) / max(count_tokens(text), 1)
+    chars = int(keep * ratio / 2)
+    shortened = head[:chars] + marker + tail[len(tail) - chars:] if chars else marker.strip()
+    while count_tokens(shortened) > max_tokens and chars > 0:
+        chars = int(chars * 0.9)
+        shortened = head[:chars] + marker + tail[len(tail) - chars:]
+    return shortened
+
+
+@dataclass
+class ChatContext:
+    """Messages for one chat request and their token accounting"""
+    messages: List[Dict]
+    system_tokens: int
+    history_tokens: int
+    user_tokens: int
+    budget: int
+    kept_messages: int = 0
+    dropped_messages: int = 0
+    truncated_messages: int = 0
+    summary: Optional[str] = None
+
+    @property
+    def prompt_tokens(self) -> int:
+        return self.system_tokens + self.history_tokens + self.user_tokens
+
+    def token_counts(self) -> Dict[str, int]:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "system_tokens": self.system_tokens,
+            "history_tokens": self.history_tokens,
+            "user_tokens": self.user_tokens,
+            "budget": self.budget,
+            "kept_messages": self.kept_messages,
+            "dropped_messages": self.dropped_messages,
+            "truncated_messages": self.truncated_messages,
+        }
+
+
+@dataclass
+class ChatContextBuilder:
+    """
+    Fits system prompt, history and user message into a prompt token budget.
+
+    Args:
+        max_prompt_tokens: Budget for the whole prompt (completion excluded)
+        max_history_messages: Most recent history messages considered at all
+        max_message_tokens: Longest a single history or user message may be
+        summary_tokens: Budget for the summary of dropped turns (0 disables it)
+    """
+    max_prompt_tokens: int = DEFAULT_PROMPT_TOKEN_BUDGET
+    max_history_messages: int = 6
+    max_message_tokens: int = 600
+    summary_tokens: int = 150
+    _token_cache: Dict[str, int] = field(default_factory=dict, repr=False)
+
+    def _system_tokens(self, system_prompt: str) -> int:
+        # The system prompt only changes with the portfolio; count it once per text
+        if system_prompt not in self._token_cache:
+            self._token_cache.clear()
+            self._token_cache[system_prompt] = count_message_tokens([{"content": system_prompt}])
+        return self._token_cache[system_prompt]
+
+    def _summarize(self, dropped: List[Dict]) -> Optional[str]:
+        """Extractive summary of dropped turns: the opening of each, oldest first"""
+        if not dropped or self.summary_tokens <= 0:
+            return None
+        lines = []
+        for message in dropped:
+            text = " ".join(str(message.get("content", "")).split())
+            first_sentence = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+            lines.append(f"- {message.get('role', 'user')}: {first_sentence[:SUMMARY_LINE_CHARS]}")
+        summary = "Summary of earlier conversation:\n" + "\n".join(lines)
+        return shorten(summary, self.summary_tokens)
+
+    def build(
+        self,
+        system_prompt: str,
+        user_message: str,
+        conversation_history: Optional[List[Dict]] = None
+    ) -> ChatContext:
+        """Messages for one turn, with history trimmed to the budget"""
+        system_tokens = self._system_tokens(system_prompt)
+        user_message = shorten(user_message, self.max_message_tokens)
+        user_tokens = count_message_tokens([{"content": user_message}])
+
+        history = [
+            {"role": message.get("role", "user"), "content": str(message.get("content", ""))}
+            for message in (conversation_history or [])
+        ]
+        candidates = history[-self.max_history_messages:] if self.max_history_messages else []
+        dropped = history[:len(history) - len(candidates)]
+
+        available = self.max_prompt_tokens - system_tokens - user_tokens
+        summary_reserve = self.summary_tokens + MESSAGE_OVERHEAD_TOKENS if history else 0
+        kept: List[Dict] = []
+        history_tokens = 0
+        truncated = 0
+        for position, message in enumerate(reversed(candidates)):
+            content = shorten(message["content"], self.max_message_tokens)
+            tokens = count_message_tokens([{"content": content}])
+            if history_tokens + tokens > available - summary_reserve:
+                dropped = dropped + candidates[:len(candidates) - position]
+                break
+            truncated += content != message["content"]
+            kept.append({"role": message["role"], "content": content})
+            history_tokens += tokens
+        kept.reverse()
+
+        messages = [{"role": "system", "content": system_prompt}]
+        summary = self._summarize(dropped)
+        if summary is not None:
+            messages.append({"role": "system", "content": summary})
+            history_tokens += count_message_tokens([{"content": summary}])
+        messages.extend(kept)
+        messages.append({"role": "user", "content": user_message})
+
+        return ChatContext(
+            messages=messages,
+            system_tokens=system_tokens,
+            history_tokens=history_tokens,
+            user_tokens=user_tokens,
+            budget=self.max_prompt_tokens,
+            kept_messages=len(kept),
+            dropped_messages=len(dropped),
+            truncated_messages=truncated,
+            summary=summary
+        )
@@ -0,0 +1,129 @@
+"""
+Import-time regression check for the scripts package.
+
+Routes that still spawn the scripts as fresh processes pay interpreter start-up
+plus every module-level import on each request. This check keeps that cost in
+budget:
+
+* each module below is imported under ``python -X importtime`` and must stay
+  within its cumulative import budget (median of several cold runs) without
+  pulling in any of the heavy dependencies that are supposed to load lazily
+  on first use;
+* ``python scripts/portfolio_manager.py`` must print its JSON within the
+  end-to-end budget (median of several cold runs).
+
+Run from the repository root:
+    poetry run python scripts/check_import_time.py
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import budget per module, in milliseconds: about 1.5x the median
+# measured on a clean checkout (in comments). Most of it is NumPy; the
+# simulation modules also load numpy.random.
+IMPORT_BUDGETS_MS = {
+    "scripts.portfolio_manager": 150,  # 102ms
+    "scripts.monte_carlo": 200,  # 124ms
+    "scripts.scenario_analysis": 200,  # 129ms
+    "scripts.risk_profiler": 30,  # 15ms
+    "scripts.ai_portfolio_advisor": 200,  # 133ms
+    "scripts.analytics_server": 300,  # 194ms
+}
+
+# Dependencies that must only be imported on first use, never at module import
+LAZY_DEPENDENCIES = ["pandas", "matplotlib", "scipy", "groq", "dotenv", "httpx", "yfinance"]
+
+# End-to-end budget for `python scripts/portfolio_manager.py`, 211ms measured
+# (about 70ms of it interpreter start-up)
+SCRIPT_BUDGET_MS = 325
+
+
+def import_profile(module: str) -> List[Tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) for every import triggered by ``module``"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+
+    profile = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile.append((name.strip(), int(self_us), int(cumulative_us)))
+    return profile
+
+
+def check_module(module: str, budget_ms: float, runs: int) -> List[str]:
+    """Problems found when importing ``module``; empty if within budget"""
+    profiles = [import_profile(module) for _ in range(runs)]
+    totals = [next((cumulative_us for name, _, cumulative_us in profile if name == module), 0) for profile in profiles]
+    total_ms = statistics.median(totals) / 1000
+    # The eager-import check and the slowest-module detail use the median run
+    profile = profiles[totals.index(sorted(totals)[(runs - 1) // 2])]
+    cumulative: Dict[str, int] = {name: cumulative_us for name, _, cumulative_us in profile}
+
+    problems = []
+    eager = sorted({name.split(".")[0] for name in cumulative} & set(LAZY_DEPENDENCIES))
+    if eager:
+        problems.append(f"{module} eagerly imports {', '.join(eager)}")
+    if total_ms > budget_ms:
+        slowest = sorted(profile, key=lambda entry: entry[1], reverse=True)[:5]
+        detail = ", ".join(f"{name} {self_us / 1000:.1f}ms" for name, self_us, _ in slowest)
+        problems.append(f"{module} took {total_ms:.1f}ms to import (budget {budget_ms}ms); slowest: {detail}")
+
+    status = "❌" if problems else "✅"
+    print(f"{status} {module:<32} {total_ms:7.1f}ms  (budget {budget_ms}ms, median of {runs})")
+    return problems
+
+
+def time_script(path: str, runs: int) -> float:
+    """Median wall-clock time in milliseconds to run a script to completion"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, path], cwd=REPO_ROOT,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the scripts package import-time budget")
+    parser.add_argument("--runs", type=int, default=5, help="Cold runs to take the median import and script times over")
+    parser.add_argument("--script-budget-ms", type=float, default=SCRIPT_BUDGET_MS)
+    args = parser.parse_args()
+
+    print("⏱️  Checking import-time budget...")
+    problems = []
+    for module, budget_ms in IMPORT_BUDGETS_MS.items():
+        problems.extend(check_module(module, budget_ms, args.runs))
+
+    script_ms = time_script(os.path.join("scripts", "portfolio_manager.py"), args.runs)
+    script_ok = script_ms <= args.script_budget_ms
+    print(f"{'✅' if script_ok else '❌'} {'scripts/portfolio_manager.py':<32} {script_ms:7.1f}ms  "
+          f"(budget {args.script_budget_ms:g}ms, median of {args.runs})")
+    if not script_ok:
+        problems.append(f"scripts/portfolio_manager.py took {script_ms:.1f}ms end to end")
+
+    if problems:
+        print("\n❌ Import-time regressions:")
+        for problem in problems:
+            print(f"  - {problem}")
+        return 1
+    print("\n🎉 Import-time budget met")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""
+Covariance estimates of asset returns from the market data store.
+
+Three estimators of daily simple returns, all annualized:
+
+* 'sample': the unbiased sample covariance over a window;
+* 'ledoit_wolf': the sample covariance over a window shrunk towards a scaled
+  identity with the Ledoit-Wolf (2004) optimal intensity, well conditioned
+  even with more assets than days;
+* 'ewma': RiskMetrics-style exponentially weighted, S = λS + (1 - λ) r rᵀ,
+  over the universe's whole common history (the decay is its window).
+
+CovarianceService caches each estimate together with its Cholesky and eigen
+factorizations, keyed by (universe, window, as-of date, method), so risk,
+optimization and simulation requests for the same inputs factorize once.
+EWMA estimates are kept as running trackers per universe: a newer as-of date
+folds in only the new days as rank-one updates of the matrix and of its
+Cholesky factor, O(N²) per day instead of an O(N²T) recomputation, with the
+same result as computing the estimate from scratch. Trackers are bounded by
+the same least-recently-used cap as the estimates.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from scripts.market_data import DateLike, MarketDataStore, to_day
+
+TRADING_DAYS = 252
+DEFAULT_WINDOW = 252
+DEFAULT_HALFLIFE = 30  # trading days; λ ≈ 0.977
+EWMA_SEED_DAYS = 21  # days whose second moment starts the EWMA recursion
+DEFAULT_MAX_ENTRIES = 32
+METHODS = ("sample", "ewma", "ledoit_wolf")
+
+
+def ewma_decay(halflife: float) -> float:
+    """Daily decay factor λ for an exponential weighting with this half-life in days"""
+    return 0.5 ** (1 / halflife)
+
+
+def sample_covariance(returns: np.ndarray) -> np.ndarray:
+    """Unbiased sample covariance of (days, assets) returns"""
+    centered = returns - returns.mean(axis=0)
+    return centered.T @ centered / (len(returns) - 1)
+
+
+def ewma_covariance(returns: np.ndarray, decay: float) -> np.ndarray:
+    """
+    Zero-mean EWMA covariance of (days, assets) returns: the recursion
+    S = λS + (1 - λ) r rᵀ over every day, started from the second moment of
+    the first EWMA_SEED_DAYS. ``EWMATracker.update`` continues exactly this
+    recursion, so the estimate depends only on the returns, not on how often
+    it was updated.
+    """
+    days = len(returns)
+    weights = (1 - decay) * decay ** np.arange(days - 1, -1, -1)
+    head = returns[:EWMA_SEED_DAYS]
+    seed = head.T @ head / len(head)
+    return decay ** days * seed + (returns * weights[:, None]).T @ returns
+
+
+def ledoit_wolf_covariance(returns: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Ledoit-Wolf shrinkage of the (maximum-likelihood) sample covariance
+    towards μI, μ being the average variance. Returns the matrix and the
+    shrinkage intensity in [0, 1].
+    """
+    days, assets = returns.shape
+    centered = returns - returns.mean(axis=0)
+    sample = centered.T @ centered / days
+    mu = np.trace(sample) / assets
+    squared = centered ** 2
+    # Distance of the sample covariance from the target, and the variance of its entries
+    delta = (np.sum(sample ** 2) - 2 * mu * np.trace(sample) + assets * mu ** 2) / assets
+    beta = (np.sum(squared.T @ squared) / days - np.sum(sample ** 2)) / (assets * days)
+    shrinkage = 0.0 if delta <= 0 else min(beta, delta) / delta
+    shrunk = (1 - shrinkage) * sample
+    shrunk.flat[::assets + 1] += shrinkage * mu
+    return shrunk, float(shrinkage)
+
+
+def cholesky(matrix: np.ndarray) -> np.ndarray:
+    """Lower Cholesky factor, adding the smallest diagonal jitter that makes a singular matrix factorizable"""
+    jitter = 0.0
+    scale = float(np.mean(np.diag(matrix))) or 1.0
+    for _ in range(10):
+        try:
+            return np.linalg.cholesky(matrix + jitter * np.eye(len(matrix)))
+        except np.linalg.LinAlgError:
+            jitter = scale * 1e-10 if jitter == 0 else jitter * 10
+    raise np.linalg.LinAlgError("Covariance matrix is not positive semi-definite")
+
+
+def cholesky_rank_one_update(factor: np.ndarray, vector: np.ndarray) -> np.ndarray:
+    """Cholesky factor of L Lᵀ + x xᵀ given L, in O(N²)"""
+    factor = factor.copy()
+    vector = np.array(vector, dtype=float)
+    for k in range(len(vector)):
+        diagonal = np.hypot(factor[k, k], vector[k])
+        cosine, sine = diagonal / factor[k, k], vector[k] / factor[k, k]
+        factor[k, k] = diagonal
+        factor[k + 1:, k] = (factor[k + 1:, k] + sine * vector[k + 1:]) / cosine
+        vector[k + 1:] = cosine * vector[k + 1:] - sine * factor[k + 1:, k]
+    return factor
+
+
+@dataclass
+class CovarianceEstimate:
+    """
+    An annualized covariance matrix and what it was estimated from. The
+    factorizations are computed on first use and kept with the estimate.
+    """
+    symbols: List[str]
+    matrix: np.ndarray
+    method: str
+    as_of: Optional[np.datetime64]
+    observations: int
+    shrinkage: Optional[float] = None
+    _cholesky: Optional[np.ndarray] = field(default=None, repr=False)
+
+    @property
+    def cholesky(self) -> np.ndarray:
+        """Lower Cholesky factor of the matrix"""
+        if self._cholesky is None:
+            self._cholesky = cholesky(self.matrix)
+        return self._cholesky
+
+    @cached_property
+    def eigh(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Eigenvalues (ascending) and eigenvectors of the matrix"""
+        return np.linalg.eigh(self.matrix)
+
+    @property
+    def volatilities(self) -> np.ndarray:
+        return np.sqrt(np.diag(self.matrix))
+
+    @property
+    def correlation(self) -> np.ndarray:
+        volatilities = self.volatilities
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.nan_to_num(self.matrix / np.outer(volatilities, volatilities))
+
+    def condition_number(self) -> Optional[float]:
+        """Ratio of the largest to the smallest eigenvalue; None for a singular matrix"""
+        values = self.eigh[0]
+        return float(values[-1] / values[0]) if values[0] > 0 else None
+
+
+class EWMATracker:
+    """
+    Running EWMA covariance of daily returns with its Cholesky factor, both
+    updated by one rank-one step per day.
+
+    Args:
+        returns: (days, assets) history the recursion is seeded from
+        decay: Daily decay factor λ
+    """
+
+    def __init__(self, returns: np.ndarray, decay: float):
+        self.decay = decay
+        self.covariance = ewma_covariance(returns, decay)
+        self.factor = cholesky(self.covariance)
+        self.observations = len(returns)
+
+    def update(self, returns: np.ndarray) -> None:
+        """Fold in one or more days of returns, oldest first"""
+        for day in np.atleast_2d(returns):
+            self.covariance *= self.decay
+            self.covariance += (1 - self.decay) * np.outer(day, day)
+            self.factor = cholesky_rank_one_update(np.sqrt(self.decay) * self.factor, np.sqrt(1 - self.decay) * day)
+            self.observations += 1
+
+
+class CovarianceService:
+    """
+    Cached covariance estimates over the market data store.
+
+    Args:
+        store: Market data store the closes are read from
+        max_entries: Estimates, and EWMA trackers, kept before the least
+            recently used is dropped
+        periods_per_year: Annualization factor for daily returns
+    """
+
+    def __init__(
+        self,
+        store: MarketDataStore,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        periods_per_year: int = TRADING_DAYS
+    ):
+        self.store = store
+        self.max_entries = max_entries
+        self.periods_per_year = periods_per_year
+        self._entries: "OrderedDict[Tuple, CovarianceEstimate]" = OrderedDict()
+        # (universe, halflife) -> (first date, last date, tracker)
+        self._trackers: "OrderedDict[Tuple, Tuple[np.datetime64, np.datetime64, EWMATracker]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Request threads share the service; the cache and EWMA trackers change in place
+        self._lock = threading.RLock()
+
+    def returns(
+        self,
+        symbols: Sequence[str],
+        window: Optional[int] = DEFAULT_WINDOW,
+        as_of: DateLike = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The last ``window`` (None: all) daily returns on or before ``as_of``
+        as (dates, (days, symbols) matrix), on the union of the symbols'
+        trading dates with closes carried forward over a symbol's missing days
+        """
+        dates, closes = self.store.aligned_closes(symbols, end=as_of)
+        # Carry each close forward, then keep days on which every symbol has traded
+        rows = np.where(np.isnan(closes), 0, np.arange(len(closes))[:, None])
+        np.maximum.accumulate(rows, axis=0, out=rows)
+        closes = closes[rows, np.arange(closes.shape[1])]
+        complete = ~np.isnan(closes).any(axis=1)
+        first = int(np.argmax(complete)) if complete.any() else len(closes)
+        if window is not None:
+            first = max(first, len(closes) - window - 1)
+        closes, dates = closes[first:], dates[first:]
+        return dates[1:], closes[1:] / closes[:-1] - 1
+
+    def estimate(
+        self,
+        symbols: Sequence[str],
+        window: int = DEFAULT_WINDOW,
+        as_of: DateLike = None,
+        method: str = "ledoit_wolf",
+        halflife: float = DEFAULT_HALFLIFE
+    ) -> CovarianceEstimate:
+        """
+        Annualized covariance of ``symbols`` over the last ``window`` trading
+        days up to ``as_of`` (default: the latest stored day). 'ewma' ignores
+        ``window`` and weights the whole common history by ``halflife``.
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown covariance method: {method} (expected one of {', '.join(METHODS)})")
+        with self._lock:
+            return self._estimate(list(symbols), window, as_of, method, halflife)
+
+    def _estimate(
+        self,
+        symbols: List[str],
+        window: Optional[int],
+        as_of: DateLike,
+        method: str,
+        halflife: float
+    ) -> CovarianceEstimate:
+        missing = [symbol for symbol in symbols if symbol not in self.store]
+        if missing:
+            raise KeyError(f"No market data for {', '.join(missing)}")
+
+        # Key on the last stored date, so 'latest' stays cached until new bars
+        # arrive, including bars another process appended to the store
+        self.store.reload(symbols)
+        last_dates = [self.store.high_water_mark(symbol) for symbol in symbols]
+        resolved = max(last_dates) if as_of is None else min(max(last_dates), to_day(as_of))
+        if method == "ewma":
+            window = None
+        key = (tuple(symbols), window, resolved, method, halflife if method == "ewma" else None)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            # Keep the universe's EWMA tracker as fresh as its cached estimate
+            if method == "ewma" and (tuple(symbols), halflife) in self._trackers:
+                self._trackers.move_to_end((tuple(symbols), halflife))
+            self.hits += 1
+            return entry
+        self.misses += 1
+
+        dates, returns = self.returns(symbols, window, resolved)
+        if len(returns) < 2:
+            raise ValueError(f"Need at least 2 days of common history, got {len(returns)}")
+        if method == "ewma":
+            entry = self._ewma_estimate(symbols, halflife, dates, returns)
+        elif method == "ledoit_wolf":
+            matrix, shrinkage = ledoit_wolf_covariance(returns)
+            entry = CovarianceEstimate(symbols, matrix * self.periods_per_year, method, dates[-1], len(returns), shrinkage)
+        else:
+            matrix = sample_covariance(returns)
+            entry = CovarianceEstimate(symbols, matrix * self.periods_per_year, method, dates[-1], len(returns))
+
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def _ewma_estimate(
+        self,
+        symbols: List[str],
+        halflife: float,
+        dates: np.ndarray,
+        returns: np.ndarray
+    ) -> CovarianceEstimate:
+        # A tracker over the same history that ends earlier is rolled forward day by day
+        tracker_key = (tuple(symbols), halflife)
+        tracked = self._trackers.get(tracker_key)
+        if tracked is not None and tracked[0] == dates[0] and tracked[1] <= dates[-1]:
+            _, last, tracker = tracked
+            tracker.update(returns[dates > last])
+        else:
+            tracker = EWMATracker(returns, ewma_decay(halflife))
+        self._trackers[tracker_key] = (dates[0], dates[-1], tracker)
+        self._trackers.move_to_end(tracker_key)
+        while len(self._trackers) > self.max_entries:
+            self._trackers.popitem(last=False)
+
+        scale = self.periods_per_year
+        return CovarianceEstimate(
+            symbols, tracker.covariance * scale, "ewma", dates[-1], tracker.observations,
+            _cholesky=tracker.factor * np.sqrt(scale)
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._trackers.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "ewma_trackers": len(self._trackers),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,188 @@
+"""
+Content-addressed cache for LLM responses.
+
+Advisor prompts are built almost entirely from the PortfolioManager snapshot,
+so between price updates the same request is sent over and over. Responses are
+cached under a SHA-256 of the request (model, messages, temperature and
+max_tokens): any change to the portfolio changes the prompt and therefore the
+key, so entries never need explicit invalidation. Entries expire after a TTL
+and the least recently used ones are evicted once the cache is full.
+
+ResponseCache keeps entries in memory; SQLiteResponseCache keeps them in a
+SQLite file so they survive worker restarts.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL = 15 * 60.0  # seconds
+
+
+def cache_key(model: str, messages: List[Dict], temperature: float, max_tokens: int) -> str:
+    """SHA-256 of the canonical JSON encoding of a chat completion request"""
+    request = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    encoded = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    In-memory LRU cache of responses with a TTL.
+
+    Args:
+        max_entries: Entries kept before the least recently used is evicted
+        ttl: Seconds an entry stays valid after it is stored
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response for ``key``, or None if absent or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: str) -> None:
+        """Store a response, evicting the least recently used entries if full"""
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size": len(self),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+        }
+
+
+class SQLiteResponseCache(ResponseCache):
+    """
+    ResponseCache persisted to a SQLite file.
+
+    Recency is tracked in a ``last_used`` column so LRU eviction carries over
+    across restarts. One connection is shared by all threads under the lock.
+    """
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        import sqlite3
+
+        super().__init__(max_entries, ttl)
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] <= now:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl, now)
+            )
+            excess = self._count() - self.max_entries
+            if excess > 0:
+                self._connection.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used LIMIT ?)", (excess,)
+                )
+                self.evictions += excess
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+
+    def _count(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def default_response_cache() -> ResponseCache:
+    """
+    Process-wide cache shared by every advisor.
+
+    Configured from the environment: LLM_CACHE_PATH selects the SQLite backend,
+    LLM_CACHE_TTL (seconds) and LLM_CACHE_MAX_ENTRIES bound it.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            ttl = float(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL))
+            max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+            path = os.getenv("LLM_CACHE_PATH")
+            if path:
+                _default_cache = SQLiteResponseCache(path, max_entries, ttl)
+            else:
+                _default_cache = ResponseCache(max_entries, ttl)
+        return _default_cache
@@ -0,0 +1,297 @@
+"""
+Client-side scheduling for Groq requests.
+
+Every advisor request passes through one RequestScheduler per process, which:
+
+* paces requests with two token buckets matched to the account tier's
+  requests-per-minute and tokens-per-minute limits, so bursts queue locally
+  instead of being rejected with 429s;
+* retries rate-limit, timeout, connection and 5xx errors with jittered
+  exponential backoff (honouring Retry-After when the server sends one);
+* coalesces concurrent identical requests (single flight), so they share one
+  upstream call and its result;
+* records queue depth, wait time, retries and coalesced requests.
+
+The same scheduler serves synchronous callers (``run``) and coroutines on
+any event loop (``run_async``). The Groq clients are created with their own
+retries disabled so that attempts are not multiplied.
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Groq free tier limits for the default model; override per account tier
+DEFAULT_REQUESTS_PER_MINUTE = 30
+DEFAULT_TOKENS_PER_MINUTE = 6000
+DEFAULT_MAX_RETRIES = 4
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_CAP = 20.0  # seconds
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at ``capacity`` tokens per minute.
+
+    ``reserve`` always succeeds and returns how long the caller must wait
+    before using the tokens: the balance may go negative, so callers are
+    served in the order they reserved.
+    """
+
+    def __init__(self, per_minute: float):
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0  # tokens per second
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Take ``amount`` tokens; returns the seconds until they are available"""
+        # A request larger than the bucket could never be admitted; cap it
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+
+def estimate_tokens(messages: List[Dict], max_tokens: int) -> int:
+    """Rough TPM cost of a request: ~4 characters per prompt token plus the completion budget"""
+    prompt_chars = sum(len(str(message.get("content", ""))) for message in messages)
+    return prompt_chars // 4 + max_tokens
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a failed Groq call is worth retrying"""
+    import groq
+
+    if isinstance(error, (groq.APITimeoutError, groq.APIConnectionError)):
+        return True
+    return isinstance(error, groq.APIStatusError) and error.status_code in RETRYABLE_STATUS_CODES
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Server-requested delay from a Retry-After header, if any"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """
+    Rate limiting, retry and request coalescing in front of the Groq client.
+
+    Args:
+        requests_per_minute: RPM limit of the account tier
+        tokens_per_minute: TPM limit of the account tier
+        max_retries: Retries after the first attempt for retryable errors
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = DEFAULT_TOKENS_PER_MINUTE,
+        max_retries: int = DEFAULT_MAX_RETRIES
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._async_in_flight: Dict[Tuple[int, str], "asyncio.Future"] = {}
+
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.total_requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.retries = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    # Limiter and metrics
+
+    def _reserve(self, tokens: int) -> float:
+        delay = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        with self._lock:
+            self.total_requests += 1
+            self.total_wait += delay
+            self.max_wait = max(self.max_wait, delay)
+            if delay > 0:
+                self.queue_depth += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        return delay
+
+    def _dequeue(self, delay: float) -> None:
+        if delay > 0:
+            with self._lock:
+                self.queue_depth -= 1
+
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        with self._lock:
+            self.retries += 1
+        requested = retry_after(error)
+        if requested is not None:
+            return min(requested, BACKOFF_CAP)
+        # Full jitter keeps retrying clients from synchronising
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+    def _failed(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, wait time and retry/coalescing counters"""
+        with self._lock:
+            return {
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "total_requests": self.total_requests,
+                "mean_wait": self.total_wait / self.total_requests if self.total_requests else 0.0,
+                "max_wait": self.max_wait,
+                "retries": self.retries,
+                "coalesced": self.coalesced,
+                "failures": self.failures,
+                "in_flight": len(self._in_flight) + len(self._async_in_flight),
+                "requests_per_minute": self.requests.capacity,
+                "tokens_per_minute": self.tokens.capacity,
+            }
+
+    # Synchronous callers
+
+    def _execute(self, call: Callable[[], Any], tokens: int) -> Any:
+        for attempt in range(self.max_retries + 1):
+            delay = self._reserve(tokens)
+            if delay > 0:
+                time.sleep(delay)
+                self._dequeue(delay)
+            try:
+                return call()
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    self._failed()
+                    raise
+                time.sleep(self._backoff(attempt, e))
+
+    def run(self, call: Callable[[], Any], tokens: int, key: Optional[str] = None) -> Any:
+        """
+        Run ``call`` under the rate limits, retrying retryable errors.
+
+        Concurrent calls with the same ``key`` share the first caller's
+        result (or exception) instead of issuing their own request.
+        """
+        if key is None:
+            return self._execute(call, tokens)
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._execute(call, tokens)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    # Coroutines
+
+    async def _execute_async(self, call: Callable[[], Awaitable[Any]], tokens: int) -> Any:
+        import asyncio
+
+        for attempt in range(self.max_retries + 1):
+            delay = self._reserve(tokens)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                self._dequeue(delay)
+            try:
+                return await call()
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    self._failed()
+                    raise
+                await asyncio.sleep(self._backoff(attempt, e))
+
+    async def run_async(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        tokens: int,
+        key: Optional[str] = None
+    ) -> Any:
+        """Coroutine version of ``run``; coalescing is per event loop"""
+        import asyncio
+
+        if key is None:
+            return await self._execute_async(call, tokens)
+
+        flight = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            future = self._async_in_flight.get(flight)
+            leader = future is None
+            if leader:
+                future = self._async_in_flight[flight] = asyncio.get_running_loop().create_future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return await asyncio.shield(future)
+
+        try:
+            result = await self._execute_async(call, tokens)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so a leader failure without followers is not reported as unhandled
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                del self._async_in_flight[flight]
+
+
+_default_scheduler: Optional[RequestScheduler] = None
+_default_scheduler_lock = threading.Lock()
+
+
+def default_request_scheduler() -> RequestScheduler:
+    """
+    Process-wide scheduler shared by every advisor, so limits apply to the
+    whole worker. Configured by GROQ_RPM_LIMIT, GROQ_TPM_LIMIT and
+    GROQ_MAX_RETRIES.
+    """
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler(
+                requests_per_minute=float(os.getenv("GROQ_RPM_LIMIT", DEFAULT_REQUESTS_PER_MINUTE)),
+                tokens_per_minute=float(os.getenv("GROQ_TPM_LIMIT", DEFAULT_TOKENS_PER_MINUTE)),
+                max_retries=int(os.getenv("GROQ_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+            )
+        return _default_scheduler
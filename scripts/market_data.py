@@ -0,0 +1,604 @@
+"""
+On-disk store of daily OHLCV bars.
+
+Each symbol has a directory holding one NumPy ``.npy`` file per column: a
+sorted ``datetime64[D]`` date index plus open, high, low, close and volume.
+Columns are opened with ``np.load(mmap_mode="r")``, so reading a date range
+is a ``searchsorted`` on the index and a slice of the mapped file. Nothing is
+parsed or copied, and only the pages touched are read from disk, so range
+reads over thousands of symbols stay cheap. Prices are split/dividend
+adjusted when the source provides adjusted closes.
+
+Daily refreshes append instead of rewriting: ``append`` keeps only bars
+after the symbol's high-water mark (its last stored date) and writes them as
+a small segment under ``segments/``. Reads see base and segments together
+(concatenated, so a symbol with pending segments is copied rather than
+mapped) until a background thread compacts the segments back into the base
+files once ``max_segments`` have accumulated.
+
+Bars are ingested from CSV files (per-symbol yfinance-style dumps, or one
+long file with a Symbol column) or downloaded with yfinance:
+
+    poetry run python -m scripts.market_data ingest-csv data/*.csv --root market_data
+    poetry run python -m scripts.market_data download AAPL MSFT --start 2020-01-01
+    poetry run python -m scripts.market_data update AAPL MSFT
+    poetry run python -m scripts.market_data info --root market_data
+
+PortfolioManager prices holdings from the store named by MARKET_DATA_PATH.
+One process should write to a store at a time. Readers in other processes
+cache each symbol's layout and memory maps; ``reload`` drops the cache for
+symbols whose files have changed since, so they see the writer's new bars.
+"""
+
+import argparse
+import datetime
+import os
+import queue
+import shutil
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+PRICE_FIELDS = ("open", "high", "low", "close")
+FIELDS = ("date",) + PRICE_FIELDS + ("volume",)
+SEGMENTS_DIR = "segments"
+DEFAULT_MAX_SEGMENTS = 8
+
+DateLike = Union[str, np.datetime64, datetime.date, None]
+
+
+def to_day(date: DateLike) -> Optional[np.datetime64]:
+    """Date-like value as datetime64[D]; None stays None"""
+    if date is None:
+        return None
+    return np.datetime64(date, "D")
+
+
+@dataclass
+class PriceHistory:
+    """
+    Daily bars for one symbol; arrays are read-only views onto the store's
+    files, and columns that were not requested are None
+    """
+    symbol: str
+    date: np.ndarray
+    close: np.ndarray
+    open: Optional[np.ndarray] = None
+    high: Optional[np.ndarray] = None
+    low: Optional[np.ndarray] = None
+    volume: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+    def returns(self) -> np.ndarray:
+        """Simple daily returns of the close"""
+        return self.close[1:] / self.close[:-1] - 1
+
+
+def _prepare_bars(date, open, high, low, close, volume) -> Dict[str, np.ndarray]:
+    """Columns sorted by date, duplicate dates keeping the last bar, bars without a close dropped"""
+    date = np.asarray(date, dtype="datetime64[D]")
+    values = {field: np.asarray(column, dtype=float) for field, column in zip(PRICE_FIELDS, (open, high, low, close))}
+    values["volume"] = np.asarray(volume, dtype=float)
+
+    order = np.argsort(date, kind="stable")
+    date = date[order]
+    keep = np.append(date[1:] != date[:-1], True) if len(date) else np.zeros(0, dtype=bool)
+    values = {field: column[order][keep] for field, column in values.items()}
+    values["date"] = date[keep]
+    valid = ~np.isnan(values["close"])
+    return {field: column[valid] for field, column in values.items()}
+
+
+def _save_columns(directory: str, values: Dict[str, np.ndarray], suffix: str = "") -> None:
+    for field in FIELDS:
+        np.save(os.path.join(directory, f"{field}{suffix}.npy"), values[field])
+
+
+class MarketDataStore:
+    """
+    Memory-mapped columnar store of daily bars, one directory per symbol.
+
+    Args:
+        root: Directory holding the store; created if missing
+        max_segments: Appended segments a symbol may have before it is compacted
+        background_compaction: Compact on a background thread (otherwise call ``compact``)
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_segments: int = DEFAULT_MAX_SEGMENTS,
+        background_compaction: bool = True
+    ):
+        self.root = root
+        self.max_segments = max_segments
+        self.background_compaction = background_compaction
+        os.makedirs(root, exist_ok=True)
+        # Per symbol: memory maps keyed by (base or segment directory, field)
+        self._maps: Dict[str, Dict[Tuple[str, str], np.ndarray]] = {}
+        # Per symbol: committed segments and the first bar of each not already in the base
+        self._segments: Dict[str, List[Tuple[str, int]]] = {}
+        # Per symbol: on-disk state the cached plan and maps were built from, see reload
+        self._signatures: Dict[str, Tuple] = {}
+        # Bumped when a symbol's history is replaced, so a compaction in flight is discarded
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._compaction_queue: "queue.Queue[str]" = queue.Queue()
+        self._compaction_pending: Set[str] = set()
+        self._compactor: Optional[threading.Thread] = None
+
+    # Layout
+
+    def _symbol_dir(self, symbol: str) -> str:
+        return os.path.join(self.root, quote(symbol, safe=""))
+
+    def symbols(self) -> List[str]:
+        """Symbols with stored bars"""
+        return sorted(
+            unquote(entry.name) for entry in os.scandir(self.root)
+            if entry.is_dir() and os.path.exists(os.path.join(entry.path, "date.npy"))
+        )
+
+    def __contains__(self, symbol: str) -> bool:
+        return os.path.exists(os.path.join(self._symbol_dir(symbol), "date.npy"))
+
+    def _disk_signature(self, symbol: str) -> Tuple:
+        """
+        Identity of a symbol's base date index and its committed segment names;
+        every write, append or compaction by any process changes it
+        """
+        directory = self._symbol_dir(symbol)
+        try:
+            stat = os.stat(os.path.join(directory, "date.npy"))
+            base = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            base = None
+        segments_dir = os.path.join(directory, SEGMENTS_DIR)
+        names = sorted(name for name in os.listdir(segments_dir) if name.isdigit()) \
+            if os.path.isdir(segments_dir) else []
+        return base, tuple(names)
+
+    def reload(self, symbols: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Drop cached maps of symbols whose files changed on disk, e.g. bars
+        appended by ``python -m scripts.market_data update`` in another
+        process; returns the symbols reloaded. Costs a few stat calls per symbol.
+        """
+        with self._lock:
+            cached = list(self._signatures) if symbols is None else [s for s in symbols if s in self._signatures]
+            changed = [symbol for symbol in cached if self._disk_signature(symbol) != self._signatures[symbol]]
+            for symbol in changed:
+                self._forget(symbol)
+        return changed
+
+    def _segment_plan(self, symbol: str) -> List[Tuple[str, int]]:
+        """(segment directory, first bar after everything before it) for each committed segment"""
+        plan = self._segments.get(symbol)
+        if plan is None:
+            # Taken before mapping, so a change made meanwhile is caught by the next reload
+            self._signatures[symbol] = self._disk_signature(symbol)
+            plan = []
+            segments_dir = os.path.join(self._symbol_dir(symbol), SEGMENTS_DIR)
+            names = sorted(name for name in os.listdir(segments_dir) if name.isdigit()) \
+                if os.path.isdir(segments_dir) else []
+            if names:
+                base_dates = self._map(symbol, self._symbol_dir(symbol), "date")
+                last = base_dates[-1] if len(base_dates) else None
+                for name in names:
+                    path = os.path.join(segments_dir, name)
+                    dates = self._map(symbol, path, "date")
+                    # Bars already merged by an interrupted compaction are skipped
+                    start = 0 if last is None else int(np.searchsorted(dates, last, side="right"))
+                    if start < len(dates):
+                        plan.append((path, start))
+                        last = dates[-1]
+            self._segments[symbol] = plan
+        return plan
+
+    def _map(self, symbol: str, directory: str, field: str) -> np.ndarray:
+        """Read-only memory map of one column file, opened on first use"""
+        maps = self._maps.setdefault(symbol, {})
+        column = maps.get((directory, field))
+        if column is None:
+            try:
+                column = np.load(os.path.join(directory, f"{field}.npy"), mmap_mode="r")
+            except FileNotFoundError:
+                raise KeyError(f"No market data for {symbol}") from None
+            maps[(directory, field)] = column
+        return column
+
+    def _pieces(self, symbol: str) -> List[Tuple[str, int]]:
+        """Base and pending segments as (directory, first bar to use)"""
+        return [(self._symbol_dir(symbol), 0)] + self._segment_plan(symbol)
+
+    # Reads
+
+    def column(self, symbol: str, field: str) -> np.ndarray:
+        """
+        A whole column of a symbol: the memory map itself, or a copy joining
+        base and pending segments until they are compacted
+        """
+        with self._lock:
+            pieces = [self._map(symbol, path, field)[start:] for path, start in self._pieces(symbol)]
+        return pieces[0] if len(pieces) == 1 else np.concatenate(pieces)
+
+    def high_water_mark(self, symbol: str) -> Optional[np.datetime64]:
+        """Last stored date of a symbol, or None if it has no bars"""
+        with self._lock:
+            if symbol not in self:
+                return None
+            path, _ = self._pieces(symbol)[-1]
+            dates = self._map(symbol, path, "date")
+            return dates[-1] if len(dates) else None
+
+    def high_water_marks(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, Optional[np.datetime64]]:
+        """High-water mark of each symbol (all stored symbols by default)"""
+        return {symbol: self.high_water_mark(symbol) for symbol in (self.symbols() if symbols is None else symbols)}
+
+    def _bounds(self, dates: np.ndarray, start: DateLike, end: DateLike) -> Tuple[int, int]:
+        lo = 0 if start is None else int(np.searchsorted(dates, to_day(start), side="left"))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, to_day(end), side="right"))
+        return lo, hi
+
+    def history(
+        self,
+        symbol: str,
+        start: DateLike = None,
+        end: DateLike = None,
+        fields: Sequence[str] = FIELDS
+    ) -> PriceHistory:
+        """
+        Bars with start <= date <= end (either bound optional). Only ``fields``
+        are mapped; date and close always are. A range within the base files
+        or one segment is a view; a range spanning pending segments is copied.
+        """
+        fields = ["date"] + [field for field in FIELDS[1:] if field in fields or field == "close"]
+        with self._lock:
+            ranges = []
+            for path, offset in self._pieces(symbol):
+                lo, hi = self._bounds(self._map(symbol, path, "date")[offset:], start, end)
+                if hi > lo or not ranges:
+                    ranges.append((path, offset + lo, offset + hi))
+            if len(ranges) > 1 and ranges[0][2] == ranges[0][1]:
+                ranges = ranges[1:]
+            columns = {
+                field: [self._map(symbol, path, field)[lo:hi] for path, lo, hi in ranges]
+                for field in fields
+            }
+        columns = {field: parts[0] if len(parts) == 1 else np.concatenate(parts) for field, parts in columns.items()}
+        return PriceHistory(symbol, **columns)
+
+    def histories(
+        self,
+        symbols: Iterable[str],
+        start: DateLike = None,
+        end: DateLike = None,
+        fields: Sequence[str] = FIELDS
+    ) -> Dict[str, PriceHistory]:
+        """Range reads for many symbols; symbols missing from the store are left out"""
+        histories = {}
+        for symbol in symbols:
+            try:
+                histories[symbol] = self.history(symbol, start, end, fields)
+            except KeyError:
+                continue
+        return histories
+
+    def latest_quotes(self, symbols: Iterable[str], as_of: DateLike = None) -> Dict[str, Tuple[float, float]]:
+        """
+        (close, daily change %) on or before ``as_of`` for each stored symbol;
+        the change is against the previous bar, 0 when there is none.
+        """
+        quotes = {}
+        for symbol, history in self.histories(symbols, end=as_of, fields=()).items():
+            if not len(history):
+                continue
+            close = float(history.close[-1])
+            previous = float(history.close[-2]) if len(history) > 1 else close
+            quotes[symbol] = (close, (close / previous - 1) * 100 if previous else 0.0)
+        return quotes
+
+    def aligned_closes(
+        self,
+        symbols: Sequence[str],
+        start: DateLike = None,
+        end: DateLike = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Closes of several symbols on the union of their dates, as (dates, matrix)
+        with one column per symbol and NaN where a symbol has no bar.
+        """
+        histories = [self.history(symbol, start, end, fields=()) for symbol in symbols]
+        dates = np.unique(np.concatenate([h.date for h in histories])) if histories else np.array([], "datetime64[D]")
+        matrix = np.full((len(dates), len(histories)), np.nan)
+        for column, history in enumerate(histories):
+            matrix[np.searchsorted(dates, history.date), column] = history.close
+        return dates, matrix
+
+    # Writes
+
+    def _replace_base(self, symbol: str, values: Dict[str, np.ndarray]) -> None:
+        directory = self._symbol_dir(symbol)
+        os.makedirs(directory, exist_ok=True)
+        # Every column is written before any is swapped in; the date index goes last
+        _save_columns(directory, values, ".tmp")
+        for field in FIELDS[1:] + FIELDS[:1]:
+            os.replace(os.path.join(directory, f"{field}.tmp.npy"), os.path.join(directory, f"{field}.npy"))
+
+    def _forget(self, symbol: str) -> None:
+        self._maps.pop(symbol, None)
+        self._segments.pop(symbol, None)
+        self._signatures.pop(symbol, None)
+
+    def write(
+        self,
+        symbol: str,
+        date: Sequence,
+        open: Sequence[float],
+        high: Sequence[float],
+        low: Sequence[float],
+        close: Sequence[float],
+        volume: Sequence[float]
+    ) -> int:
+        """Replace a symbol's history; bars are sorted and duplicate dates keep the last. Returns bar count"""
+        values = _prepare_bars(date, open, high, low, close, volume)
+        with self._lock:
+            self._replace_base(symbol, values)
+            shutil.rmtree(os.path.join(self._symbol_dir(symbol), SEGMENTS_DIR), ignore_errors=True)
+            self._forget(symbol)
+            self._generations[symbol] = self._generations.get(symbol, 0) + 1
+        return len(values["date"])
+
+    def append(
+        self,
+        symbol: str,
+        date: Sequence,
+        open: Sequence[float],
+        high: Sequence[float],
+        low: Sequence[float],
+        close: Sequence[float],
+        volume: Sequence[float]
+    ) -> int:
+        """
+        Add the bars dated after the symbol's high-water mark as a new segment;
+        earlier bars are ignored. Returns the number of bars added.
+        """
+        values = _prepare_bars(date, open, high, low, close, volume)
+        with self._lock:
+            if symbol not in self:
+                return self.write(symbol, **values)
+            high_water = self.high_water_mark(symbol)
+            if high_water is not None:
+                start = int(np.searchsorted(values["date"], high_water, side="right"))
+                values = {field: column[start:] for field, column in values.items()}
+            if not len(values["date"]):
+                return 0
+
+            segments_dir = os.path.join(self._symbol_dir(symbol), SEGMENTS_DIR)
+            os.makedirs(segments_dir, exist_ok=True)
+            existing = [int(name) for name in os.listdir(segments_dir) if name.isdigit()]
+            name = f"{max(existing, default=0) + 1:08d}"
+            # A segment is committed by renaming its complete directory into place
+            staging = os.path.join(segments_dir, f".{name}")
+            os.makedirs(staging, exist_ok=True)
+            _save_columns(staging, values)
+            os.rename(staging, os.path.join(segments_dir, name))
+
+            plan = self._segment_plan(symbol)
+            plan.append((os.path.join(segments_dir, name), 0))
+            base, names = self._signatures[symbol]
+            self._signatures[symbol] = (base, names + (name,))
+            if len(plan) >= self.max_segments:
+                self._schedule_compaction(symbol)
+        return len(values["date"])
+
+    # Compaction
+
+    def compact(self, symbol: str) -> int:
+        """Merge a symbol's segments into its base files; returns the segments merged"""
+        with self._lock:
+            plan = list(self._segment_plan(symbol)) if symbol in self else []
+            if not plan:
+                return 0
+            generation = self._generations.get(symbol, 0)
+            values = {field: self.column(symbol, field) for field in FIELDS}
+        # The merged columns are written without holding the lock; appends meanwhile
+        # land in new segments, which stay after the merged bars
+        directory = self._symbol_dir(symbol)
+        _save_columns(directory, values, ".compact")
+        with self._lock:
+            if self._generations.get(symbol, 0) != generation:
+                return 0
+            for field in FIELDS[1:] + FIELDS[:1]:
+                os.replace(os.path.join(directory, f"{field}.compact.npy"), os.path.join(directory, f"{field}.npy"))
+            for path, _ in plan:
+                shutil.rmtree(path, ignore_errors=True)
+            self._forget(symbol)
+        return len(plan)
+
+    def segment_counts(self) -> Dict[str, int]:
+        """Pending segments per symbol, for symbols that have any"""
+        with self._lock:
+            counts = {symbol: len(self._segment_plan(symbol)) for symbol in self.symbols()}
+        return {symbol: count for symbol, count in counts.items() if count}
+
+    def _schedule_compaction(self, symbol: str) -> None:
+        if not self.background_compaction:
+            return
+        if symbol in self._compaction_pending:
+            return
+        self._compaction_pending.add(symbol)
+        if self._compactor is None:
+            self._compactor = threading.Thread(target=self._compact_forever, name="market-data-compactor", daemon=True)
+            self._compactor.start()
+        self._compaction_queue.put(symbol)
+
+    def _compact_forever(self) -> None:
+        while True:
+            symbol = self._compaction_queue.get()
+            try:
+                with self._lock:
+                    self._compaction_pending.discard(symbol)
+                self.compact(symbol)
+            except Exception as e:
+                print(f"❌ Compacting {symbol} failed: {e}")
+            finally:
+                self._compaction_queue.task_done()
+
+    def wait_for_compaction(self) -> None:
+        """Block until scheduled background compactions have finished"""
+        self._compaction_queue.join()
+
+    # Ingestion
+
+    def ingest_frame(self, symbol: str, frame, incremental: bool = False) -> int:
+        """
+        Store bars from a pandas DataFrame with Date/Open/High/Low/Close[/Adj Close]/Volume
+        columns, replacing the history or, with ``incremental``, appending new bars
+        """
+        columns = {str(name).strip().lower().replace("_", " "): name for name in frame.columns}
+        if "date" in columns:
+            dates = frame[columns["date"]]
+        else:
+            dates = frame.index
+        dates = np.asarray(dates, dtype="datetime64[D]")
+
+        prices = {field: frame[columns[field]].to_numpy(dtype=float) for field in PRICE_FIELDS}
+        if "adj close" in columns:
+            # Scale the whole bar by the adjustment factor so OHLC stay consistent
+            with np.errstate(divide="ignore", invalid="ignore"):
+                factor = frame[columns["adj close"]].to_numpy(dtype=float) / prices["close"]
+            factor = np.where(np.isfinite(factor), factor, 1.0)
+            prices = {field: values * factor for field, values in prices.items()}
+        volume = frame[columns["volume"]].to_numpy(dtype=float) if "volume" in columns else np.zeros(len(dates))
+        store = self.append if incremental else self.write
+        return store(symbol, dates, volume=volume, **prices)
+
+    def ingest_csv(self, path: str, symbol: Optional[str] = None, incremental: bool = False) -> Dict[str, int]:
+        """
+        Ingest a CSV of daily bars. A file with a Symbol (or Ticker) column may
+        hold many symbols; otherwise the symbol defaults to the file name.
+        Returns bars stored per symbol.
+        """
+        import pandas as pd
+
+        frame = pd.read_csv(path)
+        symbol_column = next((c for c in frame.columns if str(c).strip().lower() in ("symbol", "ticker")), None)
+        if symbol_column is None:
+            symbol = symbol or os.path.splitext(os.path.basename(path))[0]
+            return {symbol: self.ingest_frame(symbol, frame, incremental)}
+        return {
+            str(name): self.ingest_frame(str(name), group, incremental)
+            for name, group in frame.groupby(symbol_column, sort=False)
+        }
+
+    def download(
+        self,
+        symbols: Sequence[str],
+        start: DateLike = None,
+        end: DateLike = None,
+        incremental: bool = False
+    ) -> Dict[str, int]:
+        """Download adjusted daily bars with yfinance and store them; returns bars stored per symbol"""
+        import yfinance as yf
+
+        data = yf.download(
+            list(symbols), start=None if start is None else str(to_day(start)),
+            end=None if end is None else str(to_day(end) + 1),  # yfinance's end is exclusive
+            group_by="ticker", auto_adjust=True, progress=False, threads=True
+        )
+        counts = {}
+        for symbol in symbols:
+            frame = data[symbol] if symbol in data.columns.get_level_values(0) else None
+            if frame is None or frame.dropna(how="all").empty:
+                continue
+            counts[symbol] = self.ingest_frame(symbol, frame.dropna(how="all"), incremental)
+        return counts
+
+    def update(self, symbols: Sequence[str], end: DateLike = None) -> Dict[str, int]:
+        """
+        Download only the bars after each symbol's high-water mark. Symbols
+        sharing a high-water mark are fetched together; new symbols get full history.
+        """
+        groups: Dict[Optional[np.datetime64], List[str]] = {}
+        for symbol, high_water in self.high_water_marks(symbols).items():
+            groups.setdefault(high_water, []).append(symbol)
+
+        counts = {}
+        for high_water, group in groups.items():
+            start = None if high_water is None else high_water + 1
+            if start is not None and end is not None and start > to_day(end):
+                continue
+            counts.update(self.download(group, start, end, incremental=True))
+        return counts
+
+
+_default_store: Optional[MarketDataStore] = None
+_default_store_lock = threading.Lock()
+
+
+def default_market_data() -> Optional[MarketDataStore]:
+    """Process-wide store at MARKET_DATA_PATH, or None when it is not set"""
+    global _default_store
+    path = os.getenv("MARKET_DATA_PATH")
+    if not path:
+        return None
+    with _default_store_lock:
+        if _default_store is None or _default_store.root != path:
+            _default_store = MarketDataStore(path)
+        return _default_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local market data store")
+    parser.add_argument("--root", default=os.getenv("MARKET_DATA_PATH", "market_data"), help="Store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest-csv", help="Ingest CSV files of daily bars")
+    ingest.add_argument("paths", nargs="+")
+    ingest.add_argument("--symbol", help="Symbol for a single-symbol file (defaults to the file name)")
+    ingest.add_argument("--append", action="store_true", help="Only add bars after each symbol's last stored date")
+
+    download = commands.add_parser("download", help="Download daily bars with yfinance")
+    download.add_argument("symbols", nargs="+")
+    download.add_argument("--start")
+    download.add_argument("--end")
+
+    update = commands.add_parser("update", help="Download only bars newer than what is stored")
+    update.add_argument("symbols", nargs="*", help="Defaults to every stored symbol")
+    update.add_argument("--end")
+
+    commands.add_parser("compact", help="Merge appended segments into the base files")
+    commands.add_parser("info", help="List stored symbols and their date ranges")
+    args = parser.parse_args()
+
+    store = MarketDataStore(args.root, background_compaction=False)
+    if args.command == "ingest-csv":
+        for path in args.paths:
+            for symbol, count in store.ingest_csv(path, args.symbol, args.append).items():
+                print(f"✅ {symbol}: {count} bars from {path}")
+    elif args.command == "download":
+        counts = store.download(args.symbols, args.start, args.end)
+        for symbol in args.symbols:
+            print(f"✅ {symbol}: {counts[symbol]} bars" if symbol in counts else f"❌ {symbol}: no data")
+    elif args.command == "update":
+        counts = store.update(args.symbols or store.symbols(), args.end)
+        print(f"✅ {sum(counts.values())} new bars across {sum(1 for c in counts.values() if c)} symbols")
+    elif args.command == "compact":
+        merged = sum(store.compact(symbol) for symbol in store.symbols())
+        print(f"✅ Merged {merged} segments")
+    else:
+        for symbol in store.symbols():
+            history = store.history(symbol)
+            if len(history):
+                print(f"{symbol:<10} {len(history):>6} bars  {history.date[0]} → {history.date[-1]}  "
+                      f"last close {history.close[-1]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
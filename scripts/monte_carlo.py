@@ -0,0 +1,737 @@
+"""
+Monte Carlo building blocks for scenario analysis.
+
+Paths are generated in fixed-size chunks and folded into running accumulators,
+so memory use depends on the chunk size rather than on the number of paths.
+Every accumulator can be merged with another one, which lets chunk results be
+combined in any grouping.
+
+Each chunk draws from its own generator spawned from a single SeedSequence,
+and chunk results are always merged in chunk order. A seeded run therefore
+produces bit-identical statistics whether the chunks are simulated in this
+process or spread across a process pool of any size.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 8192
+DEFAULT_BLOCK_SIZE = 21
+TRADING_DAYS = 252
+
+VARIANCE_REDUCTION_SCHEMES = ('none', 'antithetic', 'control_variate', 'sobol')
+MIN_REPLICATES = 16
+# Reported over all pooled paths, unweighted; replicates only give their standard errors
+POOLED_ESTIMATES = ('percentile_1', 'percentile_5', 'tail_mean_5')
+
+
+def standard_normals(
+    rng: np.random.Generator,
+    num_paths: int,
+    time_horizon: int,
+    scheme: str = 'none'
+) -> np.ndarray:
+    """
+    Draw a (num_paths, time_horizon) block of standard normal shocks.
+
+    'antithetic' pairs every draw with its negation, 'sobol' maps a scrambled
+    Sobol' sequence through the normal inverse CDF (one dimension per time
+    step). 'none' and 'control_variate' use plain pseudo-random draws.
+    """
+    if scheme == 'antithetic':
+        half = rng.standard_normal((-(-num_paths // 2), time_horizon))
+        return np.concatenate([half, -half])[:num_paths]
+    if scheme == 'sobol':
+        from scipy.stats import norm, qmc
+
+        points = qmc.Sobol(d=time_horizon, scramble=True, seed=rng).random(num_paths)
+        return norm.ppf(np.clip(points, 1e-12, 1 - 1e-12))
+    if scheme in ('none', 'control_variate'):
+        return rng.standard_normal((num_paths, time_horizon))
+    raise ValueError(f"Unknown variance reduction scheme: {scheme}")
+
+
+def paths_from_shocks(
+    shocks: np.ndarray,
+    daily_return: float,
+    daily_volatility: float,
+    initial_value: float
+) -> np.ndarray:
+    """Grow (num_paths, time_horizon) standard normal shocks into value paths"""
+    num_paths, time_horizon = shocks.shape
+    paths = np.empty((num_paths, time_horizon + 1))
+    paths[:, 0] = initial_value
+    np.cumprod(1 + daily_return + daily_volatility * shocks, axis=1, out=paths[:, 1:])
+    paths[:, 1:] *= initial_value
+    return paths
+
+
+def simulate_paths(
+    rng: np.random.Generator,
+    num_paths: int,
+    time_horizon: int,
+    daily_return: float,
+    daily_volatility: float,
+    initial_value: float
+) -> np.ndarray:
+    """Simulate a (num_paths, time_horizon + 1) block of portfolio value paths"""
+    shocks = standard_normals(rng, num_paths, time_horizon)
+    return paths_from_shocks(shocks, daily_return, daily_volatility, initial_value)
+
+
+def simulate_correlated_paths(
+    rng: np.random.Generator,
+    num_paths: int,
+    time_horizon: int,
+    expected_returns: np.ndarray,
+    cholesky_factor: np.ndarray,
+    initial_values: np.ndarray,
+    block_size: int = DEFAULT_BLOCK_SIZE
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Simulate correlated geometric Brownian motion for several assets.
+
+    ``expected_returns`` are annual drifts and ``cholesky_factor`` is the lower
+    Cholesky factor of the annual covariance matrix. Shocks are drawn for a
+    block of time steps at a time and correlated with one batched matrix
+    multiply, so only a (num_paths, block_size, num_assets) slab is alive.
+
+    Returns the buy-and-hold portfolio paths, shape (num_paths, time_horizon + 1),
+    and the final value of every asset, shape (num_paths, num_assets).
+    """
+    num_assets = len(initial_values)
+    dt = 1 / TRADING_DAYS
+    variances = np.sum(cholesky_factor ** 2, axis=1)
+    drift = (expected_returns - 0.5 * variances) * dt
+    shock_factor = cholesky_factor.T * np.sqrt(dt)
+
+    portfolio_paths = np.empty((num_paths, time_horizon + 1))
+    portfolio_paths[:, 0] = np.sum(initial_values)
+    log_levels = np.zeros((num_paths, num_assets))
+
+    for start in range(0, time_horizon, block_size):
+        steps = min(block_size, time_horizon - start)
+        shocks = rng.standard_normal((num_paths, steps, num_assets)) @ shock_factor
+        block_levels = log_levels[:, None, :] + np.cumsum(shocks + drift, axis=1)
+        portfolio_paths[:, start + 1:start + 1 + steps] = np.exp(block_levels) @ initial_values
+        log_levels = block_levels[:, -1, :]
+
+    return portfolio_paths, initial_values * np.exp(log_levels)
+
+
+def simulate_terminal_growth(
+    rng: np.random.Generator,
+    num_paths: int,
+    time_horizon: int,
+    expected_returns: np.ndarray,
+    cholesky_factor: np.ndarray
+) -> np.ndarray:
+    """
+    Draw correlated GBM growth factors S_T / S_0 for every asset at the horizon.
+
+    The terminal log-return of a GBM is normal, so no time stepping is needed;
+    the result is a (num_paths, num_assets) matrix that any number of
+    portfolios over the same assets can be revalued against.
+    """
+    horizon = time_horizon / TRADING_DAYS
+    variances = np.sum(cholesky_factor ** 2, axis=1)
+    drift = (expected_returns - 0.5 * variances) * horizon
+    shocks = rng.standard_normal((num_paths, len(expected_returns))) @ (cholesky_factor.T * np.sqrt(horizon))
+    return np.exp(drift + shocks)
+
+
+class RunningMoments:
+    """
+    Running count, mean and variance that can be merged exactly (Chan et al.).
+
+    Batches may be 1-D (one series) or 2-D (one column per series), in which
+    case the mean and variance are arrays with one entry per column.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values: np.ndarray) -> None:
+        """Fold a batch of observations into the running moments"""
+        other = RunningMoments()
+        other.count = len(values)
+        if other.count == 0:
+            return
+        other.mean = np.mean(values, axis=0)
+        other.m2 = np.sum((values - other.mean) ** 2, axis=0)
+        self.merge(other)
+
+    def merge(self, other: "RunningMoments") -> None:
+        """Combine another set of moments into this one"""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with a fixed relative accuracy.
+
+    Positive values are counted in logarithmically spaced buckets, so any
+    quantile is reported within ``relative_accuracy`` of the true value and two
+    sketches merge exactly by adding their bucket counts. Values <= 0 are kept
+    in a separate zero bucket.
+    """
+
+    def __init__(self, relative_accuracy: float = 1e-4):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.zero_count = 0
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum()) + self.zero_count
+
+    def update(self, values: np.ndarray) -> None:
+        """Add a batch of observations to the sketch"""
+        values = np.asarray(values, dtype=float)
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        if len(positive) == 0:
+            return
+
+        keys = np.ceil(np.log(positive) / self._log_gamma).astype(np.int64)
+        offset = int(keys.min())
+        self._add_counts(offset, np.bincount(keys - offset))
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Combine another sketch with the same accuracy into this one"""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self.zero_count += other.zero_count
+        if len(other.counts):
+            self._add_counts(other.offset, other.counts)
+
+    def _add_counts(self, offset: int, counts: np.ndarray) -> None:
+        if len(self.counts) == 0:
+            self.offset, self.counts = offset, counts.astype(np.int64)
+            return
+
+        start = min(self.offset, offset)
+        end = max(self.offset + len(self.counts), offset + len(counts))
+        merged = np.zeros(end - start, dtype=np.int64)
+        merged[self.offset - start:self.offset - start + len(self.counts)] += self.counts
+        merged[offset - start:offset - start + len(counts)] += counts
+        self.offset, self.counts = start, merged
+
+    def _bucket_values(self) -> np.ndarray:
+        keys = np.arange(self.offset, self.offset + len(self.counts))
+        return 2 * self.gamma ** keys / (self.gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile (0 <= q <= 1) of the observed values"""
+        total = self.count
+        if total == 0:
+            return float('nan')
+
+        rank = q * (total - 1)
+        if rank < self.zero_count:
+            return 0.0
+        bucket = int(np.searchsorted(np.cumsum(self.counts), rank - self.zero_count, side='right'))
+        return float(self._bucket_values()[bucket])
+
+    def percentile(self, p: float) -> float:
+        return self.quantile(p / 100)
+
+    def tail_mean(self, q: float) -> float:
+        """Estimate the mean of the values at or below the q-quantile"""
+        total = self.count
+        if total == 0:
+            return float('nan')
+
+        needed = int(np.floor(q * (total - 1))) + 1
+        from_zero = min(needed, self.zero_count)
+        remaining = needed - from_zero
+
+        cumulative = np.cumsum(self.counts)
+        taken = np.minimum(self.counts, np.maximum(remaining - (cumulative - self.counts), 0))
+        return float(np.dot(taken, self._bucket_values()) / needed)
+
+
+def drawdown_profile(paths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Maximum drawdown and time to recovery for every path.
+
+    Works on a (num_paths, num_steps) matrix along the time axis. Time to
+    recovery is the number of steps from the trough of each path's maximum
+    drawdown until it regains the preceding peak, 0 for paths that never
+    draw down and NaN for paths still under water at the horizon.
+    """
+    rows = np.arange(len(paths))
+    running_peak = np.maximum.accumulate(paths, axis=1)
+    drawdowns = 1 - paths / running_peak
+
+    trough = drawdowns.argmax(axis=1)
+    max_drawdowns = drawdowns[rows, trough]
+
+    steps = np.arange(paths.shape[1])
+    recovered_at = (steps > trough[:, None]) & (paths >= running_peak[rows, trough][:, None])
+    recovered = recovered_at.any(axis=1)
+    time_to_recovery = np.where(recovered, recovered_at.argmax(axis=1) - trough, np.nan)
+    time_to_recovery[max_drawdowns == 0] = 0
+    return max_drawdowns, time_to_recovery
+
+
+class DrawdownAccumulator:
+    """Running distribution of per-path maximum drawdowns and recovery times"""
+
+    def __init__(self, relative_accuracy: float = 1e-3):
+        self.moments = RunningMoments()
+        self.sketch = QuantileSketch(relative_accuracy)
+        self.worst = 0.0
+        self.recovery_moments = RunningMoments()
+
+    def update(self, paths: np.ndarray) -> None:
+        """Fold a block of paths into the drawdown distribution"""
+        max_drawdowns, time_to_recovery = drawdown_profile(paths)
+        self.moments.update(max_drawdowns)
+        self.sketch.update(max_drawdowns)
+        self.worst = max(self.worst, float(max_drawdowns.max(initial=0.0)))
+        self.recovery_moments.update(time_to_recovery[~np.isnan(time_to_recovery)])
+
+    def merge(self, other: "DrawdownAccumulator") -> None:
+        """Combine another drawdown distribution into this one"""
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        self.worst = max(self.worst, other.worst)
+        self.recovery_moments.merge(other.recovery_moments)
+
+    def statistics(self) -> Dict[str, float]:
+        """Drawdowns as fractions of the running peak, recovery times in steps"""
+        count = self.moments.count
+        return {
+            'mean': float(self.moments.mean),
+            'median': self.sketch.quantile(0.5),
+            'percentile_5': self.sketch.percentile(5),
+            'percentile_95': self.sketch.percentile(95),
+            'percentile_99': self.sketch.percentile(99),
+            'max': self.worst,
+            'probability_of_recovery': self.recovery_moments.count / count if count else 0.0,
+            'mean_time_to_recovery': float(self.recovery_moments.mean) if self.recovery_moments.count else float('nan')
+        }
+
+
+class PathAccumulator:
+    """Running statistics over simulated portfolio paths"""
+
+    def __init__(self, initial_value: float, relative_accuracy: float = 1e-4):
+        self.initial_value = initial_value
+        self.final_moments = RunningMoments()
+        self.final_sketch = QuantileSketch(relative_accuracy)
+        self.loss_count = 0
+        self.drawdowns = DrawdownAccumulator()
+
+    @property
+    def count(self) -> int:
+        return self.final_moments.count
+
+    def update(self, paths: np.ndarray) -> None:
+        """Fold a (num_paths, time_horizon + 1) block of paths into the statistics"""
+        final_values = paths[:, -1]
+        self.final_moments.update(final_values)
+        self.final_sketch.update(final_values)
+        self.loss_count += int(np.count_nonzero(final_values < self.initial_value))
+        self.drawdowns.update(paths)
+
+    def merge(self, other: "PathAccumulator") -> None:
+        """Combine the statistics of another accumulator into this one"""
+        self.final_moments.merge(other.final_moments)
+        self.final_sketch.merge(other.final_sketch)
+        self.loss_count += other.loss_count
+        self.drawdowns.merge(other.drawdowns)
+
+    def statistics(self) -> Dict[str, float]:
+        """Summary statistics in the shape returned by ScenarioAnalyzer"""
+        mean_final_value = float(self.final_moments.mean)
+        drawdown = self.drawdowns.statistics()
+        return {
+            'mean_final_value': mean_final_value,
+            'median_final_value': self.final_sketch.quantile(0.5),
+            'std_final_value': float(self.final_moments.std),
+            'percentile_1': self.final_sketch.percentile(1),
+            'percentile_5': self.final_sketch.percentile(5),
+            'percentile_95': self.final_sketch.percentile(95),
+            'tail_mean_5': self.final_sketch.tail_mean(0.05),
+            'probability_of_loss': self.loss_count / self.count if self.count else 0.0,
+            'expected_return': (mean_final_value - self.initial_value) / self.initial_value,
+            'max_drawdown': drawdown['max'],
+            'drawdown': drawdown,
+            'num_simulations': self.count,
+            'initial_value': self.initial_value
+        }
+
+
+class MultiAssetAccumulator:
+    """Portfolio path statistics plus final-value statistics for each asset"""
+
+    def __init__(self, initial_values: np.ndarray):
+        self.initial_values = np.asarray(initial_values, dtype=float)
+        self.portfolio = PathAccumulator(float(np.sum(self.initial_values)))
+        self.asset_moments = RunningMoments()
+        self.asset_loss_counts = np.zeros(len(self.initial_values), dtype=np.int64)
+
+    def update(self, portfolio_paths: np.ndarray, asset_final_values: np.ndarray) -> None:
+        """Fold a chunk of portfolio paths and per-asset final values into the statistics"""
+        self.portfolio.update(portfolio_paths)
+        self.asset_moments.update(asset_final_values)
+        self.asset_loss_counts += np.count_nonzero(asset_final_values < self.initial_values, axis=0)
+
+    def merge(self, other: "MultiAssetAccumulator") -> None:
+        """Combine the statistics of another accumulator into this one"""
+        self.portfolio.merge(other.portfolio)
+        self.asset_moments.merge(other.asset_moments)
+        self.asset_loss_counts += other.asset_loss_counts
+
+    def asset_statistics(self, labels: List[str]) -> Dict[str, Dict[str, float]]:
+        """Per-asset final-value statistics keyed by label"""
+        count = self.asset_moments.count
+        means = np.broadcast_to(self.asset_moments.mean, self.initial_values.shape)
+        stds = np.broadcast_to(self.asset_moments.std, self.initial_values.shape)
+        return {
+            label: {
+                'initial_value': float(self.initial_values[i]),
+                'mean_final_value': float(means[i]),
+                'std_final_value': float(stds[i]),
+                'probability_of_loss': int(self.asset_loss_counts[i]) / count if count else 0.0,
+                'expected_return': float((means[i] - self.initial_values[i]) / self.initial_values[i])
+            }
+            for i, label in enumerate(labels)
+        }
+
+
+def control_variate_weights(control: np.ndarray, control_mean: float) -> np.ndarray:
+    """
+    Linear control-variate weights for a sample.
+
+    The weights sum to one and reproduce ``control_mean`` exactly as the
+    weighted mean of ``control``. Any weighted statistic of a quantity that is
+    correlated with the control inherits the variance reduction.
+    """
+    n = len(control)
+    centred = control - control.mean()
+    denominator = np.dot(centred, centred)
+    if denominator == 0:
+        return np.full(n, 1 / n)
+    return 1 / n + (control_mean - control.mean()) * centred / denominator
+
+
+def replicate_estimates(
+    final_values: np.ndarray,
+    initial_value: float,
+    weights: Optional[np.ndarray] = None
+) -> Dict[str, float]:
+    """Point estimates from one replicate of final values, optionally weighted"""
+    if weights is None:
+        percentile_1, percentile_5 = np.percentile(final_values, [1, 5])
+        return {
+            'mean_final_value': float(np.mean(final_values)),
+            'percentile_1': float(percentile_1),
+            'percentile_5': float(percentile_5),
+            'tail_mean_5': float(np.mean(final_values[final_values <= percentile_5])),
+            'probability_of_loss': float(np.mean(final_values < initial_value))
+        }
+
+    order = np.argsort(final_values)
+    sorted_values, sorted_weights = final_values[order], weights[order]
+    cumulative = np.cumsum(sorted_weights)
+
+    def weighted_quantile(q: float) -> float:
+        index = min(int(np.argmax(cumulative >= q)), len(sorted_values) - 1)
+        return float(sorted_values[index])
+
+    percentile_5 = weighted_quantile(0.05)
+    tail = sorted_values <= percentile_5
+    return {
+        'mean_final_value': float(np.dot(weights, final_values)),
+        'percentile_1': weighted_quantile(0.01),
+        'percentile_5': percentile_5,
+        'tail_mean_5': float(np.dot(sorted_weights[tail], sorted_values[tail]) / sorted_weights[tail].sum()),
+        'probability_of_loss': float(np.sum(weights[final_values < initial_value]))
+    }
+
+
+class ReplicateAccumulator:
+    """
+    Path statistics plus per-replicate point estimates.
+
+    Each chunk is an independent replicate, so the spread of the replicate
+    estimates gives a standard error that stays valid for antithetic,
+    control-variate and quasi-random sampling. The POOLED_ESTIMATES are
+    reported over all pooled paths: averaging small-replicate quantiles would
+    bias them towards the centre. Their replicate estimates are unweighted
+    for every scheme, so the standard errors describe the same estimator.
+    """
+
+    def __init__(self, initial_value: float):
+        self.paths = PathAccumulator(initial_value)
+        self.estimates: List[Dict[str, float]] = []
+
+    def merge(self, other: "ReplicateAccumulator") -> None:
+        """Combine another accumulator into this one, keeping replicate order"""
+        self.paths.merge(other.paths)
+        self.estimates.extend(other.estimates)
+
+    def statistics(self) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """Pooled statistics and the standard error of each replicate estimate"""
+        statistics = self.paths.statistics()
+        standard_errors = {}
+        for key in self.estimates[0]:
+            values = np.array([estimate[key] for estimate in self.estimates])
+            if key not in POOLED_ESTIMATES:
+                # Replicates are equal-sized, so their average is the pooled
+                # estimate, control-variate weighted where applicable
+                statistics[key] = float(values.mean())
+            standard_errors[key] = float(values.std(ddof=1) / np.sqrt(len(values))) if len(values) > 1 else float('nan')
+
+        initial_value = self.paths.initial_value
+        statistics['expected_return'] = (statistics['mean_final_value'] - initial_value) / initial_value
+        standard_errors['expected_return'] = standard_errors['mean_final_value'] / initial_value
+        return statistics, standard_errors
+
+
+def replicate_size(num_simulations: int, chunk_size: int, scheme: str) -> int:
+    """Paths per replicate: at least MIN_REPLICATES replicates, each at most chunk_size"""
+    size = max(2, min(chunk_size, num_simulations // MIN_REPLICATES))
+    if scheme == 'sobol':
+        size = 1 << (size.bit_length() - 1)  # Sobol' balance needs a power of two
+    elif scheme == 'antithetic':
+        size -= size % 2
+    return size
+
+
+def chunk_seeds(num_simulations: int, chunk_size: int, seed: Optional[int] = None) -> List[np.random.SeedSequence]:
+    """Spawn one independent SeedSequence per chunk of simulations"""
+    num_chunks = -(-num_simulations // chunk_size)
+    return np.random.SeedSequence(seed).spawn(num_chunks)
+
+
+def _run_chunks(chunk_fn, tasks: List[Tuple], accumulator, workers: int) -> List[np.ndarray]:
+    """Run chunk tasks, merging their accumulators in chunk order; returns any kept paths"""
+    chunks = []
+
+    def consume(results) -> None:
+        for chunk_accumulator, paths in results:
+            accumulator.merge(chunk_accumulator)
+            if paths is not None:
+                chunks.append(paths)
+
+    if workers > 1 and len(tasks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            consume(executor.map(chunk_fn, tasks))
+    else:
+        consume(map(chunk_fn, tasks))
+    return chunks
+
+
+def _collect_paths(result: Dict, chunks: List[np.ndarray], time_horizon: int) -> None:
+    simulations = np.concatenate(chunks) if chunks else np.empty((0, time_horizon + 1))
+    result['simulations'] = simulations
+    result['final_values'] = simulations[:, -1]
+
+
+def _simulate_chunk(args: Tuple) -> Tuple[PathAccumulator, Optional[np.ndarray]]:
+    """Simulate and summarise one chunk; top-level so process pools can pickle it"""
+    seed_sequence, num_paths, time_horizon, daily_return, daily_volatility, initial_value, keep_paths = args
+    paths = simulate_paths(
+        np.random.default_rng(seed_sequence), num_paths, time_horizon,
+        daily_return, daily_volatility, initial_value
+    )
+    accumulator = PathAccumulator(initial_value)
+    accumulator.update(paths)
+    return accumulator, paths if keep_paths else None
+
+
+def _simulate_replicate(args: Tuple) -> Tuple[ReplicateAccumulator, Optional[np.ndarray]]:
+    """Simulate one variance-reduced replicate and record its point estimates"""
+    seed_sequence, num_paths, time_horizon, daily_return, daily_volatility, initial_value, keep_paths, scheme = args
+    shocks = standard_normals(np.random.default_rng(seed_sequence), num_paths, time_horizon, scheme)
+    paths = paths_from_shocks(shocks, daily_return, daily_volatility, initial_value)
+
+    weights = None
+    if scheme == 'control_variate':
+        # Lognormal twin driven by the same shocks, with a known mean
+        control = initial_value * np.exp(
+            (daily_return - 0.5 * daily_volatility ** 2) * time_horizon + daily_volatility * shocks.sum(axis=1)
+        )
+        weights = control_variate_weights(control, initial_value * np.exp(daily_return * time_horizon))
+
+    accumulator = ReplicateAccumulator(initial_value)
+    accumulator.paths.update(paths)
+    estimates = replicate_estimates(paths[:, -1], initial_value, weights)
+    if weights is not None:
+        # Pooled quantiles are unweighted, so their standard errors must be too
+        unweighted = replicate_estimates(paths[:, -1], initial_value)
+        estimates.update({key: unweighted[key] for key in POOLED_ESTIMATES})
+    accumulator.estimates.append(estimates)
+    return accumulator, paths if keep_paths else None
+
+
+def run_simulation(
+    num_simulations: int,
+    time_horizon: int,
+    daily_return: float,
+    daily_volatility: float,
+    initial_value: float,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    return_paths: bool = False,
+    seed: Optional[int] = None,
+    workers: int = 1,
+    variance_reduction: Optional[str] = None
+) -> Dict:
+    """
+    Simulate paths chunk by chunk and accumulate their statistics.
+
+    Only one chunk of paths is alive at a time unless ``return_paths`` is set,
+    in which case the full (num_simulations, time_horizon + 1) matrix is kept.
+    With ``workers`` > 1 the chunks are simulated in a process pool; results
+    for a given ``seed`` do not depend on the number of workers.
+
+    Setting ``variance_reduction`` to one of VARIANCE_REDUCTION_SCHEMES splits
+    the run into equal-sized independent replicates and adds
+    'standard_errors' for the mean, loss probability, 1%/5% percentiles and
+    5% tail mean. The number of paths is rounded down to a whole number of
+    replicates.
+    """
+    if variance_reduction is not None:
+        return _run_replicates(
+            num_simulations, time_horizon, daily_return, daily_volatility, initial_value,
+            chunk_size, return_paths, seed, workers, variance_reduction
+        )
+
+    seeds = chunk_seeds(num_simulations, chunk_size, seed)
+    tasks = [
+        (seed_sequence, min(chunk_size, num_simulations - index * chunk_size), time_horizon,
+         daily_return, daily_volatility, initial_value, return_paths)
+        for index, seed_sequence in enumerate(seeds)
+    ]
+
+    accumulator = PathAccumulator(initial_value)
+    chunks = _run_chunks(_simulate_chunk, tasks, accumulator, workers)
+
+    result: Dict = {'statistics': accumulator.statistics()}
+    if return_paths:
+        _collect_paths(result, chunks, time_horizon)
+    return result
+
+
+def _run_replicates(
+    num_simulations: int,
+    time_horizon: int,
+    daily_return: float,
+    daily_volatility: float,
+    initial_value: float,
+    chunk_size: int,
+    return_paths: bool,
+    seed: Optional[int],
+    workers: int,
+    scheme: str
+) -> Dict:
+    if scheme not in VARIANCE_REDUCTION_SCHEMES:
+        raise ValueError(f"Unknown variance reduction scheme: {scheme}")
+
+    size = replicate_size(num_simulations, chunk_size, scheme)
+    seeds = np.random.SeedSequence(seed).spawn(max(1, num_simulations // size))
+    tasks = [
+        (seed_sequence, size, time_horizon, daily_return, daily_volatility, initial_value, return_paths, scheme)
+        for seed_sequence in seeds
+    ]
+
+    accumulator = ReplicateAccumulator(initial_value)
+    chunks = _run_chunks(_simulate_replicate, tasks, accumulator, workers)
+    statistics, standard_errors = accumulator.statistics()
+
+    result: Dict = {
+        'statistics': statistics,
+        'standard_errors': standard_errors,
+        'variance_reduction': scheme,
+        'num_replicates': len(seeds)
+    }
+    if return_paths:
+        _collect_paths(result, chunks, time_horizon)
+    return result
+
+
+def _simulate_correlated_chunk(args: Tuple) -> Tuple[MultiAssetAccumulator, Optional[np.ndarray]]:
+    """Simulate and summarise one chunk of correlated multi-asset paths"""
+    (seed_sequence, num_paths, time_horizon, expected_returns, cholesky_factor,
+     initial_values, block_size, keep_paths) = args
+    portfolio_paths, asset_final_values = simulate_correlated_paths(
+        np.random.default_rng(seed_sequence), num_paths, time_horizon,
+        expected_returns, cholesky_factor, initial_values, block_size
+    )
+    accumulator = MultiAssetAccumulator(initial_values)
+    accumulator.update(portfolio_paths, asset_final_values)
+    return accumulator, portfolio_paths if keep_paths else None
+
+
+def run_correlated_simulation(
+    num_simulations: int,
+    time_horizon: int,
+    expected_returns: np.ndarray,
+    covariance: np.ndarray,
+    initial_values: np.ndarray,
+    labels: List[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    return_paths: bool = False,
+    seed: Optional[int] = None,
+    workers: int = 1,
+    cholesky_factor: Optional[np.ndarray] = None
+) -> Dict:
+    """
+    Simulate correlated multi-asset GBM paths driven by an annual covariance matrix.
+
+    Chunking, seeding and worker semantics match ``run_simulation``. Returns
+    portfolio-level 'statistics' and per-asset 'asset_statistics' keyed by label.
+    A precomputed ``cholesky_factor`` (any F with F Fᵀ = covariance) skips
+    the factorization.
+    """
+    expected_returns = np.asarray(expected_returns, dtype=float)
+    initial_values = np.asarray(initial_values, dtype=float)
+    if cholesky_factor is None:
+        cholesky_factor = np.linalg.cholesky(np.asarray(covariance, dtype=float))
+
+    seeds = chunk_seeds(num_simulations, chunk_size, seed)
+    tasks = [
+        (seed_sequence, min(chunk_size, num_simulations - index * chunk_size), time_horizon,
+         expected_returns, cholesky_factor, initial_values, block_size, return_paths)
+        for index, seed_sequence in enumerate(seeds)
+    ]
+
+    accumulator = MultiAssetAccumulator(initial_values)
+    chunks = _run_chunks(_simulate_correlated_chunk, tasks, accumulator, workers)
+
+    result: Dict = {
+        'statistics': accumulator.portfolio.statistics(),
+        'asset_statistics': accumulator.asset_statistics(labels)
+    }
+    if return_paths:
+        _collect_paths(result, chunks, time_horizon)
+    return result
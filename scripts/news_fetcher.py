@@ -0,0 +1,221 @@
+"""
+Async NewsAPI fetcher for the news agent.
+
+General finance headlines and a query per top holding are requested in
+parallel over one pooled keep-alive client. Responses are cached per query:
+within the TTL no request is made at all, and after it the request is
+revalidated with If-None-Match / If-Modified-Since so an unchanged result
+costs a 304 instead of a full payload. Expired entries are kept for
+revalidation, so the cache is bounded by dropping the least recently used
+query instead. Articles returned by several queries are deduplicated by
+normalised URL.
+
+``base_url`` (or NEWS_API_BASE_URL) points the fetcher at another server,
+such as a local fake NewsAPI.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+from scripts.portfolio_manager import PortfolioManager
+
+DEFAULT_BASE_URL = "https://newsapi.org/v2"
+DEFAULT_TTL = 10 * 60.0  # seconds
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TOP_HOLDINGS = 3
+DEFAULT_PAGE_SIZE = 5
+REQUEST_TIMEOUT = 10.0
+
+# Query-string parameters that only track where a click came from
+TRACKING_PARAMETERS = ("utm_", "fbclid", "gclid", "cmpid", "ncid")
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of an article URL, used to detect duplicates"""
+    parts = urlsplit(url.strip())
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query)
+        if not key.lower().startswith(TRACKING_PARAMETERS)
+    ]
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return urlunsplit(("https", host, parts.path.rstrip("/"), urlencode(sorted(query)), ""))
+
+
+@dataclass
+class CachedResponse:
+    articles: List[Dict[str, Any]]
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+@dataclass
+class NewsQuery:
+    """One NewsAPI request: an endpoint and its query parameters"""
+    endpoint: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def key(self) -> Tuple:
+        return (self.endpoint, tuple(sorted(self.params.items())))
+
+
+class NewsFetcher:
+    """
+    Concurrent NewsAPI client with a conditional-request cache.
+
+    Args:
+        api_key: NewsAPI key (defaults to NEWS_API_KEY)
+        base_url: API root (defaults to NEWS_API_BASE_URL, then newsapi.org)
+        ttl: Seconds a cached query is served without contacting the server
+        page_size: Articles requested per query
+        max_entries: Cached queries kept before the least recently used is dropped
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        ttl: float = DEFAULT_TTL,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        self.api_key = api_key or os.getenv("NEWS_API_KEY", "")
+        self.base_url = (base_url or os.getenv("NEWS_API_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.ttl = ttl
+        self.page_size = page_size
+        self.max_entries = max_entries
+        self._client: Optional[httpx.AsyncClient] = None
+        self._cache: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        self.requests = 0
+        self.cache_hits = 0
+        self.not_modified = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled keep-alive client, created on first use inside the event loop"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"X-Api-Key": self.api_key},
+                timeout=REQUEST_TIMEOUT,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=10)
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def headline_queries(
+        self,
+        portfolio_manager: Optional[PortfolioManager] = None,
+        top_n: int = DEFAULT_TOP_HOLDINGS,
+        topic: str = "finance"
+    ) -> List[NewsQuery]:
+        """Top headlines for ``topic`` plus one query per largest non-cash holding"""
+        queries = [NewsQuery("top-headlines", {"q": topic, "language": "en", "pageSize": self.page_size})]
+        if portfolio_manager is None or top_n <= 0:
+            return queries
+
+        holdings = sorted(
+            (asset for asset in portfolio_manager.portfolio.assets if asset.asset_type != "cash"),
+            key=lambda asset: asset.value,
+            reverse=True
+        )
+        for asset in holdings[:top_n]:
+            queries.append(NewsQuery("everything", {
+                "q": f'"{asset.name}" OR {asset.symbol}',
+                "searchIn": "title",
+                "language": "en",
+                "sortBy": "publishedAt",
+                "pageSize": self.page_size,
+            }))
+        return queries
+
+    async def fetch(self, query: NewsQuery) -> List[Dict[str, Any]]:
+        """Articles for one query, served from cache or revalidated when possible"""
+        cached = self._cache.get(query.key)
+        if cached is not None:
+            self._cache.move_to_end(query.key)
+        now = time.time()
+        if cached is not None and cached.expires_at > now:
+            self.cache_hits += 1
+            return cached.articles
+
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        self.requests += 1
+        response = await self.client.get(f"/{query.endpoint}", params=query.params, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            self.not_modified += 1
+            cached.expires_at = now + self.ttl
+            return cached.articles
+
+        response.raise_for_status()
+        result = response.json()
+        if result.get("status") != "ok":
+            raise RuntimeError(f"NewsAPI returned status: {result.get('status')} ({result.get('message', '')})")
+
+        articles = result.get("articles", [])
+        self._cache[query.key] = CachedResponse(
+            articles=articles,
+            expires_at=now + self.ttl,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified")
+        )
+        self._cache.move_to_end(query.key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return articles
+
+    async def fetch_articles(self, queries: List[NewsQuery]) -> List[Dict[str, Any]]:
+        """Run queries concurrently; articles in query order, duplicates removed"""
+        results = await asyncio.gather(*(self.fetch(query) for query in queries), return_exceptions=True)
+
+        articles, seen = [], set()
+        for query, result in zip(queries, results):
+            if isinstance(result, Exception):
+                logging.error(f"Error fetching news for {query.params.get('q')}: {result}")
+                continue
+            for article in result:
+                url = article.get("url") or ""
+                key = normalize_url(url) if url else article.get("title", "")
+                if key and key not in seen:
+                    seen.add(key)
+                    articles.append(article)
+        return articles
+
+    async def fetch_headlines(
+        self,
+        portfolio_manager: Optional[PortfolioManager] = None,
+        top_n: int = DEFAULT_TOP_HOLDINGS,
+        topic: str = "finance"
+    ) -> List[str]:
+        """'title (url)' strings for the topic and the portfolio's top holdings"""
+        articles = await self.fetch_articles(self.headline_queries(portfolio_manager, top_n, topic))
+        return [f"{article.get('title', 'No title')} ({article.get('url', '')})" for article in articles]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "not_modified": self.not_modified,
+            "cached_queries": len(self._cache),
+        }
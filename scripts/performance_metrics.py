@@ -0,0 +1,149 @@
+"""
+Performance metrics from time series of portfolio returns.
+
+Every function takes daily simple returns (fractions) with dates along axis 0
+and, optionally, one column per portfolio, so thousands of portfolios are
+evaluated in one pass. Rolling metrics come from differences of cumulative
+sums: each window is two subtractions, without a Python loop over windows or
+a (dates x window x portfolios) intermediate.
+
+Units follow calculate_portfolio_metrics: returns, volatility and tracking
+error in percent (annualized), Sharpe, Sortino and beta as plain ratios, and
+the risk-free rate as an annual percentage.
+
+Run from the repository root to time rolling metrics on random data:
+    poetry run python -m scripts.performance_metrics --dates 2500 --portfolios 2000
+"""
+
+import argparse
+import time
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = 3.0  # annual, percent
+DEFAULT_BENCHMARK = "SPY"
+
+Metric = Union[float, np.ndarray]
+
+
+def portfolio_returns(asset_returns: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Daily returns of fixed-weight portfolios: (dates, assets) returns times
+    (assets,) or (portfolios, assets) weights, giving (dates,) or (dates, portfolios)
+    """
+    return np.asarray(asset_returns, dtype=float) @ np.asarray(weights, dtype=float).T
+
+
+def rolling_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Sums over every window of ``window`` consecutive rows; row i ends at row i + window - 1"""
+    sums = np.cumsum(values, axis=0)
+    totals = sums[window - 1:].copy()
+    totals[1:] -= sums[:-window]
+    return totals
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    # 0 where the denominator vanishes, as calculate_portfolio_metrics does for Sharpe
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, 0.0)
+
+
+def rolling_metrics(
+    returns: np.ndarray,
+    window: int,
+    benchmark: Optional[np.ndarray] = None,
+    risk_free_rate: float = RISK_FREE_RATE,
+    periods_per_year: int = TRADING_DAYS
+) -> Dict[str, np.ndarray]:
+    """
+    Annualized return, volatility, Sharpe and Sortino ratios over every window
+    of ``window`` days, plus beta and tracking error against ``benchmark``
+    (daily returns on the same dates) when given.
+
+    Row i of each result covers returns[i:i + window], so results line up with
+    dates[window - 1:]. Columns follow the columns of ``returns``; 1-D input
+    gives 1-D results.
+    """
+    returns = np.asarray(returns, dtype=float)
+    if not 2 <= window <= len(returns):
+        raise ValueError(f"window must be between 2 and the number of dates ({len(returns)})")
+    squeeze = returns.ndim == 1
+    if squeeze:
+        returns = returns[:, None]
+
+    n = window
+    daily_risk_free = (1 + risk_free_rate / 100) ** (1 / periods_per_year) - 1
+    excess = returns - daily_risk_free
+    # Centering first keeps the sum-of-squares variance accurate over long histories
+    centered = returns - returns.mean(axis=0)
+    sum_centered = rolling_sums(centered, n)
+    variance = np.maximum(rolling_sums(centered ** 2, n) - sum_centered ** 2 / n, 0) / (n - 1)
+    volatility = np.sqrt(variance * periods_per_year)
+
+    mean_excess = rolling_sums(excess, n) / n
+    downside = np.sqrt(rolling_sums(np.minimum(excess, 0) ** 2, n) / n)
+    growth = rolling_sums(np.log1p(returns), n) * (periods_per_year / n)
+
+    metrics = {
+        "annualized_return": np.expm1(growth) * 100,
+        "volatility": volatility * 100,
+        "sharpe_ratio": _ratio(mean_excess * periods_per_year, volatility),
+        "sortino_ratio": _ratio(mean_excess * np.sqrt(periods_per_year), downside),
+    }
+
+    if benchmark is not None:
+        benchmark = np.asarray(benchmark, dtype=float).reshape(len(returns), -1)
+        centered_benchmark = benchmark - benchmark.mean(axis=0)
+        sum_benchmark = rolling_sums(centered_benchmark, n)
+        benchmark_variance = rolling_sums(centered_benchmark ** 2, n) - sum_benchmark ** 2 / n
+        covariance = rolling_sums(centered * centered_benchmark, n) - sum_centered * sum_benchmark / n
+        active = centered - centered_benchmark
+        sum_active = rolling_sums(active, n)
+        active_variance = np.maximum(rolling_sums(active ** 2, n) - sum_active ** 2 / n, 0) / (n - 1)
+        metrics["beta"] = _ratio(covariance, benchmark_variance)
+        metrics["tracking_error"] = np.sqrt(active_variance * periods_per_year) * 100
+
+    if squeeze:
+        metrics = {name: values[:, 0] for name, values in metrics.items()}
+    return metrics
+
+
+def performance_metrics(
+    returns: np.ndarray,
+    benchmark: Optional[np.ndarray] = None,
+    risk_free_rate: float = RISK_FREE_RATE,
+    periods_per_year: int = TRADING_DAYS
+) -> Dict[str, Metric]:
+    """The rolling_metrics over the whole series: floats for 1-D input, one value per column otherwise"""
+    metrics = rolling_metrics(returns, len(returns), benchmark, risk_free_rate, periods_per_year)
+    return {name: float(values[0]) if values.ndim == 1 else values[0] for name, values in metrics.items()}
+
+
+def benchmark(num_dates: int, num_portfolios: int, window: int, seed: int = 0) -> None:
+    """Time rolling metrics for random portfolios and check one window against numpy"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0004, 0.01, (num_dates, num_portfolios))
+    market = rng.normal(0.0003, 0.009, num_dates)
+
+    start = time.perf_counter()
+    metrics = rolling_metrics(returns, window, market)
+    elapsed = time.perf_counter() - start
+
+    last = returns[-window:, 0]
+    expected_beta = np.cov(last, market[-window:])[0, 1] / np.var(market[-window:], ddof=1)
+    assert np.isclose(metrics["volatility"][-1, 0], last.std(ddof=1) * np.sqrt(TRADING_DAYS) * 100)
+    assert np.isclose(metrics["beta"][-1, 0], expected_beta)
+    windows = (num_dates - window + 1) * num_portfolios
+    print(f"{windows:,} windows of {window} days in {elapsed:.2f}s ({windows / elapsed:,.0f} windows/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark rolling performance metrics")
+    parser.add_argument("--dates", type=int, default=2500)
+    parser.add_argument("--portfolios", type=int, default=2000)
+    parser.add_argument("--window", type=int, default=TRADING_DAYS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    benchmark(args.dates, args.portfolios, args.window, args.seed)
@@ -0,0 +1,263 @@
+"""
+Vectorized analytics for many portfolios over a shared asset universe.
+
+A batch is a (num_portfolios, num_assets) weights matrix plus each account's
+total value. Allocations, metrics and rebalancing gaps are matrix products
+over the universe's columnar holdings, and Monte Carlo risk revalues every
+account against one simulated return tensor instead of re-simulating per
+account.
+"""
+
+import os
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Union
+import numpy as np
+
+if __package__ in (None, ""):
+    # Run as a file (python scripts/<name>.py): make the repository root importable for scripts.*
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.historical_var import DEFAULT_DECAY, DEFAULT_HORIZON, historical_risk, value_at_risk
+from scripts.monte_carlo import simulate_terminal_growth
+from scripts.performance_metrics import performance_metrics, portfolio_returns, rolling_metrics
+from scripts.portfolio_manager import HoldingsStore, PortfolioManager
+from scripts.scenario_analysis import asset_class_inputs
+
+
+def _concatenate(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Join per-block risk results (nested dicts of per-portfolio arrays) along the portfolio axis"""
+    return {
+        key: _concatenate([result[key] for result in results]) if isinstance(value, dict)
+        else np.concatenate([result[key] for result in results])
+        for key, value in results[0].items()
+    }
+
+
+class PortfolioBatch:
+    """
+    Many portfolios over one asset universe.
+
+    Args:
+        universe: Holdings store describing every asset (prices, daily change,
+            asset type and region); its value/allocation columns are ignored
+        weights: (num_portfolios, num_assets) fractions of each account's
+            value held in each universe asset, rows summing to 1
+        total_values: Total value of each account
+        account_ids: Optional identifiers, one per row of ``weights``
+    """
+
+    def __init__(
+        self,
+        universe: HoldingsStore,
+        weights: np.ndarray,
+        total_values: Sequence[float],
+        account_ids: Optional[List[str]] = None
+    ):
+        self.universe = universe
+        self.weights = np.asarray(weights, dtype=float)
+        self.total_values = np.asarray(total_values, dtype=float)
+        if self.weights.shape != (len(self.total_values), len(universe)):
+            raise ValueError(
+                f"weights must have shape ({len(self.total_values)}, {len(universe)}), got {self.weights.shape}"
+            )
+        self.account_ids = account_ids or [str(i) for i in range(len(self.total_values))]
+
+    @classmethod
+    def from_managers(
+        cls,
+        managers: Sequence[PortfolioManager],
+        account_ids: Optional[List[str]] = None
+    ) -> "PortfolioBatch":
+        """Build a batch from individual managers over the union of their holdings"""
+        universe = HoldingsStore()
+        for manager in managers:
+            universe.append(
+                asset.as_tuple() for asset in manager.portfolio.assets if asset.symbol not in universe
+            )
+
+        weights = np.zeros((len(managers), len(universe)))
+        for i, manager in enumerate(managers):
+            holdings = manager.portfolio.holdings
+            rows = [universe.row(symbol) for symbol in holdings.symbols]
+            weights[i, rows] = holdings.allocation / 100
+
+        total_values = [manager.portfolio.total_value for manager in managers]
+        return cls(universe, weights, total_values, account_ids)
+
+    def __len__(self) -> int:
+        return len(self.total_values)
+
+    def _group_weights(self, field: str) -> np.ndarray:
+        """(num_portfolios, num_categories) weights per asset_type or region"""
+        categories = self.universe.categories[field]
+        one_hot = np.eye(len(categories))[self.universe.codes[field]]
+        return self.weights @ one_hot
+
+    def asset_allocation(self) -> Dict[str, np.ndarray]:
+        """Allocation (%) by asset type, one array entry per portfolio"""
+        allocation = self._group_weights("asset_type") * 100
+        return dict(zip(self.universe.categories["asset_type"], allocation.T))
+
+    def geographic_allocation(self) -> Dict[str, np.ndarray]:
+        """Allocation (%) by region, one array entry per portfolio"""
+        allocation = self._group_weights("region") * 100
+        return dict(zip(self.universe.categories["region"], allocation.T))
+
+    def calculate_metrics(self) -> Dict[str, np.ndarray]:
+        """
+        Per-portfolio metrics from today's price changes, as
+        PortfolioManager.calculate_portfolio_metrics reports them without
+        stored history ('daily_change' basis); historical_metrics gives the
+        history-based figures
+        """
+        returns = self.universe.change_percent
+        held = self.weights > 0
+        num_assets = held.sum(axis=1)
+
+        portfolio_return = self.weights @ returns
+
+        # Volatility (simplified): dispersion of daily change across held assets
+        counts = np.maximum(num_assets, 1)
+        mean_return = (held @ returns) / counts
+        dispersion = (held * (returns - mean_return[:, None]) ** 2).sum(axis=1) / counts
+        portfolio_volatility = np.sqrt(dispersion) * np.sqrt(252)  # Annualized
+
+        # Sharpe ratio (assuming 3% risk-free rate)
+        risk_free_rate = 3.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sharpe_ratio = np.where(
+                portfolio_volatility > 0,
+                (portfolio_return * 252 - risk_free_rate) / portfolio_volatility,
+                0.0
+            )
+
+        return {
+            "portfolio_return": portfolio_return,
+            "portfolio_volatility": portfolio_volatility,
+            "sharpe_ratio": sharpe_ratio,
+            "total_value": self.total_values,
+            "num_assets": num_assets
+        }
+
+    def historical_metrics(
+        self,
+        asset_returns: np.ndarray,
+        window: Optional[int] = None,
+        benchmark: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Annualized return, volatility, Sharpe, Sortino and, given benchmark
+        returns, beta and tracking error from a (num_dates, num_assets) history
+        of daily returns in universe order. Without ``window`` one value per
+        portfolio covers the whole history; with it, rolling values of shape
+        (num_dates - window + 1, num_portfolios).
+        """
+        returns = portfolio_returns(asset_returns, self.weights)
+        if window is None:
+            return performance_metrics(returns, benchmark)
+        return rolling_metrics(returns, window, benchmark)
+
+    def rebalancing_gaps(
+        self,
+        target_allocation: Union[Dict[str, float], np.ndarray],
+        threshold: float = 1.0
+    ) -> Dict[str, Any]:
+        """
+        Gap between current and target asset type allocation for every portfolio.
+
+        ``target_allocation`` is either one dict of percentages applied to all
+        portfolios or a (num_portfolios, num_asset_types) array in the order of
+        the returned 'categories'. As in PortfolioManager.rebalance_portfolio,
+        only gaps above ``threshold`` percentage points call for action.
+        """
+        categories = self.universe.categories["asset_type"]
+        current = self._group_weights("asset_type") * 100
+
+        if isinstance(target_allocation, dict):
+            target = np.array([target_allocation.get(category, 0.0) for category in categories])
+            target = np.broadcast_to(target, current.shape)
+        else:
+            target = np.asarray(target_allocation, dtype=float)
+
+        difference = target - current
+        actions_needed = np.abs(difference) > threshold
+        return {
+            "categories": categories,
+            "current_allocation": current,
+            "target_allocation": target,
+            "difference": difference,
+            "actions_needed": actions_needed,
+            "rebalancing_needed": actions_needed.any(axis=1)
+        }
+
+    def monte_carlo_risk(
+        self,
+        num_simulations: int = 10000,
+        time_horizon: int = 21,
+        by: str = "asset_class",
+        seed: Optional[int] = None,
+        portfolio_block: int = 256
+    ) -> Dict[str, Any]:
+        """
+        Monte Carlo VaR and expected shortfall for every portfolio.
+
+        One (num_simulations, num_factors) tensor of correlated GBM growth
+        factors is drawn, either per asset class (the default, cheap for large
+        universes) or per asset, and every portfolio is revalued against it with
+        a matrix product. Portfolios are processed ``portfolio_block`` at a time
+        to bound memory, and each block is summarized by value_at_risk as in
+        historical_risk.
+        """
+        if by == "asset_class":
+            labels = self.universe.categories["asset_type"]
+            exposures = self._group_weights("asset_type")
+        elif by == "asset":
+            labels = self.universe.labels("asset_type")
+            exposures = self.weights
+        else:
+            raise ValueError(f"Unknown simulation granularity: {by}")
+
+        expected_returns, covariance = asset_class_inputs(labels)
+        growth = simulate_terminal_growth(
+            np.random.default_rng(seed), num_simulations, time_horizon,
+            expected_returns, np.linalg.cholesky(covariance)
+        )
+
+        num_portfolios = len(self)
+        blocks = [slice(start, start + portfolio_block) for start in range(0, num_portfolios, portfolio_block)]
+        # Simulated horizon returns, (num_simulations, block portfolios)
+        return _concatenate([
+            value_at_risk(growth @ exposures[block].T - 1, self.total_values[block]) for block in blocks
+        ])
+
+    def historical_risk(
+        self,
+        asset_returns: np.ndarray,
+        horizon: int = DEFAULT_HORIZON,
+        filtered: bool = False,
+        decay: float = DEFAULT_DECAY
+    ) -> Dict[str, Any]:
+        """
+        Historical (or volatility-filtered historical) VaR and expected
+        shortfall for every portfolio, in the structure of monte_carlo_risk.
+
+        ``asset_returns`` is a (num_days, num_assets) history of daily returns
+        in universe order; each overlapping ``horizon``-day window is one
+        scenario, and all portfolios are revalued against all scenarios with
+        one matrix product.
+        """
+        return historical_risk(asset_returns, self.weights, self.total_values, horizon, filtered, decay)
+
+
+if __name__ == "__main__":
+    # Compare a handful of randomly weighted accounts over the sample universe
+    rng = np.random.default_rng(0)
+    universe = PortfolioManager().portfolio.holdings
+    weights = rng.dirichlet(np.ones(len(universe)), size=5)
+    batch = PortfolioBatch(universe, weights, rng.uniform(5e4, 5e5, size=5))
+
+    metrics = batch.calculate_metrics()
+    risk = batch.monte_carlo_risk(seed=0)
+    for i, account_id in enumerate(batch.account_ids):
+        print(f"Account {account_id}: Value ${batch.total_values[i]:,.2f} | "
+              f"Return {metrics['portfolio_return'][i]:.2f}% | "
+              f"VaR (95%) ${risk['value_at_risk']['var_95'][i]:,.2f}")
@@ -1,99 +1,449 @@
-import os
 import json
-from typing import Dict, List, Any
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, List, Any, Iterable, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 import numpy as np
-import pandas as pd
 
-@dataclass
+if TYPE_CHECKING:
+    from scripts.market_data import DateLike, MarketDataStore
+    from scripts.return_stats import ReturnStats
+
+# Default categories, kept first so allocation dicts always list them in this order
+ASSET_TYPES = ["stock", "bond", "crypto", "cash"]
+REGIONS = ["US", "Developed", "Emerging", "Global"]
+
+class HoldingsStore:
+    """
+    Columnar storage for portfolio holdings.
+    
+    Numeric fields are parallel NumPy arrays and asset_type/region are integer
+    codes into per-field category lists, so aggregations over many positions
+    are vectorized group-bys. ``version`` is bumped on every write.
+    """
+    
+    NUMERIC_FIELDS = ("allocation", "value", "current_price", "change_percent")
+    CATEGORICAL_FIELDS = ("asset_type", "region")
+    
+    def __init__(self):
+        self.symbols: List[str] = []
+        self.names: List[str] = []
+        self.categories: Dict[str, List[str]] = {"asset_type": list(ASSET_TYPES), "region": list(REGIONS)}
+        self.codes: Dict[str, np.ndarray] = {field: np.zeros(0, dtype=np.int64) for field in self.CATEGORICAL_FIELDS}
+        self.allocation = np.zeros(0)
+        self.value = np.zeros(0)
+        self.current_price = np.zeros(0)
+        self.change_percent = np.zeros(0)
+        self.version = 0
+        self._rows: Dict[str, int] = {}
+    
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple]) -> "HoldingsStore":
+        """Build a store from (symbol, name, asset_type, region, allocation, value, current_price, change_percent) tuples"""
+        store = cls()
+        store.append(records)
+        return store
+    
+    @classmethod
+    def from_assets(cls, assets: Iterable["Asset"]) -> "HoldingsStore":
+        """Build a store by copying existing Asset objects"""
+        return cls.from_records(asset.as_tuple() for asset in assets)
+    
+    def __len__(self) -> int:
+        return len(self.symbols)
+    
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._rows
+    
+    def row(self, symbol: str) -> int:
+        """Row index of a symbol"""
+        return self._rows[symbol]
+    
+    def _encode(self, field: str, labels: Iterable[str]) -> np.ndarray:
+        categories = self.categories[field]
+        lookup = {label: code for code, label in enumerate(categories)}
+        codes = []
+        for label in labels:
+            if label not in lookup:
+                lookup[label] = len(categories)
+                categories.append(label)
+            codes.append(lookup[label])
+        return np.array(codes, dtype=np.int64)
+    
+    def labels(self, field: str) -> List[str]:
+        """Decoded asset_type or region label for every row"""
+        categories = self.categories[field]
+        return [categories[code] for code in self.codes[field].tolist()]
+    
+    def append(self, records: Iterable[Tuple]) -> None:
+        """Append holdings given as 8-field tuples; a symbol may be held only once"""
+        records = list(records)
+        if not records:
+            return
+        symbols, names, asset_types, regions, *numeric = zip(*records)
+        # Checked before anything is written, so a rejected batch leaves the store unchanged
+        seen = set(self._rows)
+        for symbol in symbols:
+            if symbol in seen:
+                raise ValueError(f"Duplicate holding for symbol {symbol!r}")
+            seen.add(symbol)
+        
+        for offset, symbol in enumerate(symbols):
+            self._rows[symbol] = len(self.symbols) + offset
+        self.symbols.extend(symbols)
+        self.names.extend(names)
+        for field, labels in zip(self.CATEGORICAL_FIELDS, (asset_types, regions)):
+            self.codes[field] = np.concatenate([self.codes[field], self._encode(field, labels)])
+        for field, values in zip(self.NUMERIC_FIELDS, numeric):
+            setattr(self, field, np.concatenate([getattr(self, field), np.asarray(values, dtype=float)]))
+        self.version += 1
+    
+    def remove(self, symbols: Iterable[str]) -> None:
+        """Drop holdings by symbol; row indices of later holdings shift down"""
+        drop = {self._rows[symbol] for symbol in symbols if symbol in self._rows}
+        if not drop:
+            return
+        keep = np.array([row not in drop for row in range(len(self))], dtype=bool)
+        
+        self.symbols = [symbol for symbol, kept in zip(self.symbols, keep) if kept]
+        self.names = [name for name, kept in zip(self.names, keep) if kept]
+        for field in self.CATEGORICAL_FIELDS:
+            self.codes[field] = self.codes[field][keep]
+        for field in self.NUMERIC_FIELDS:
+            setattr(self, field, getattr(self, field)[keep])
+        self._rows = {symbol: row for row, symbol in enumerate(self.symbols)}
+        self.version += 1
+    
+    def get(self, field: str, row: int) -> Any:
+        """Read one field of one row"""
+        if field == "symbol":
+            return self.symbols[row]
+        if field == "name":
+            return self.names[row]
+        if field in self.codes:
+            return self.categories[field][self.codes[field][row]]
+        return float(getattr(self, field)[row])
+    
+    def set(self, field: str, row: int, value: Any) -> None:
+        """Write one field of one row"""
+        if field == "symbol":
+            del self._rows[self.symbols[row]]
+            self.symbols[row] = value
+            self._rows[value] = row
+        elif field == "name":
+            self.names[row] = value
+        elif field in self.codes:
+            self.codes[field][row] = self._encode(field, [value])[0]
+        else:
+            getattr(self, field)[row] = value
+        self.version += 1
+    
+    def group_sum(self, field: str, weights: np.ndarray) -> Dict[str, float]:
+        """Sum ``weights`` per asset_type or region category"""
+        categories = self.categories[field]
+        totals = np.bincount(self.codes[field], weights=weights, minlength=len(categories))
+        return dict(zip(categories, totals.tolist()))
+    
+    def records(self) -> List[Dict[str, Any]]:
+        """Holdings as a list of plain dicts"""
+        columns = zip(
+            self.symbols, self.names, self.labels("asset_type"), self.labels("region"),
+            *(getattr(self, field).tolist() for field in self.NUMERIC_FIELDS)
+        )
+        return [dict(zip(Asset.FIELDS, row)) for row in columns]
+
+def _column(field: str) -> property:
+    return property(
+        lambda self: self._store.get(field, self._row),
+        lambda self, value: self._store.set(field, self._row, value)
+    )
+
 class Asset:
-    symbol: str
-    name: str
-    asset_type: str  # 'stock', 'bond', 'crypto', 'cash'
-    region: str  # 'US', 'Developed', 'Emerging'
-    allocation: float
-    value: float
-    current_price: float
-    change_percent: float
+    """
+    A single holding, as a lightweight view onto one row of a HoldingsStore.
+    
+    Constructing an Asset directly creates a detached one-row store; assets
+    returned from ``Portfolio.assets`` read and write the portfolio's store.
+    """
+    
+    __slots__ = ("_store", "_row")
+    FIELDS = ("symbol", "name", "asset_type", "region", "allocation", "value", "current_price", "change_percent")
+    
+    symbol = _column("symbol")
+    name = _column("name")
+    asset_type = _column("asset_type")  # 'stock', 'bond', 'crypto', 'cash'
+    region = _column("region")  # 'US', 'Developed', 'Emerging', 'Global'
+    allocation = _column("allocation")
+    value = _column("value")
+    current_price = _column("current_price")
+    change_percent = _column("change_percent")
+    
+    def __init__(self, symbol: str, name: str, asset_type: str, region: str, allocation: float,
+                 value: float, current_price: float, change_percent: float):
+        self._store = HoldingsStore.from_records(
+            [(symbol, name, asset_type, region, allocation, value, current_price, change_percent)]
+        )
+        self._row = 0
+    
+    @classmethod
+    def view(cls, store: HoldingsStore, row: int) -> "Asset":
+        """Asset backed by an existing store row"""
+        asset = cls.__new__(cls)
+        asset._store = store
+        asset._row = row
+        return asset
+    
+    def as_tuple(self) -> Tuple:
+        return tuple(getattr(self, field) for field in self.FIELDS)
+    
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Asset) and self.as_tuple() == other.as_tuple()
+    
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.FIELDS)
+        return f"Asset({fields})"
 
 @dataclass
 class Portfolio:
-    total_value: float
-    assets: List[Asset]
+    holdings: HoldingsStore
     risk_profile: str
     last_updated: datetime
+    
+    @property
+    def total_value(self) -> float:
+        return float(self.holdings.value.sum())
+    
+    @property
+    def assets(self) -> List[Asset]:
+        """Holdings as Asset views; writes go straight to the store"""
+        return [Asset.view(self.holdings, row) for row in range(len(self.holdings))]
 
 class PortfolioManager:
-    def __init__(self):
-        self.portfolio = self._initialize_portfolio()
+    def __init__(self, portfolio: Optional[Portfolio] = None, market_data: Optional["MarketDataStore"] = None):
+        self.portfolio = portfolio or self._initialize_portfolio()
+        # Guards holdings mutations against snapshot builds, so a snapshot is
+        # never cached for a half-applied update
+        self.lock = threading.RLock()
+        # Snapshots are reused while the holdings store version is unchanged
+        self._snapshot_key: Tuple[int, int] = (0, -1)
+        self._snapshot: Dict[str, Any] = {}
+        self._snapshot_json: bytes = b""
+        # Local price history (MARKET_DATA_PATH by default); the sample prices are used without one
+        if market_data is None and os.getenv("MARKET_DATA_PATH"):
+            from scripts.market_data import default_market_data
+
+            market_data = default_market_data()
+        self.market_data = market_data
+        self.return_stats: Optional["ReturnStats"] = None
+        if self.market_data is not None and portfolio is None:
+            self.refresh_market_data()
+    
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple], risk_profile: str = "moderate") -> "PortfolioManager":
+        """
+        Manager for an account's holdings, given as HoldingsStore.from_records
+        tuples; allocations are recomputed from the values.
+        """
+        portfolio = Portfolio(
+            holdings=HoldingsStore.from_records(records),
+            risk_profile=risk_profile,
+            last_updated=datetime.now()
+        )
+        manager = cls(portfolio)
+        manager.invalidate()
+        return manager
+    
+    @property
+    def version(self) -> int:
+        """Monotonic counter of holdings mutations"""
+        return self.portfolio.holdings.version
+    
+    def invalidate(self) -> None:
+        """Recompute allocations from values and mark the portfolio as changed"""
+        holdings = self.portfolio.holdings
+        total_value = holdings.value.sum()
+        holdings.allocation = holdings.value / total_value * 100 if total_value else np.zeros(len(holdings))
+        holdings.version += 1
+        self.portfolio.last_updated = datetime.now()
+    
+    def update_prices(self, prices: Dict[str, float]) -> None:
+        """Reprice holdings by symbol, updating values, daily change and allocations"""
+        with self.lock:
+            holdings = self.portfolio.holdings
+            known = [(holdings.row(symbol), price) for symbol, price in prices.items() if symbol in holdings]
+            if known:
+                rows, new_prices = map(np.array, zip(*known))
+                ratio = new_prices / holdings.current_price[rows]
+                holdings.value[rows] *= ratio
+                holdings.change_percent[rows] = (ratio - 1) * 100
+                holdings.current_price[rows] = new_prices
+            self.invalidate()
+    
+    def price_from_market_data(self, as_of: "DateLike" = None) -> List[str]:
+        """
+        Reprice holdings at their last close on or before ``as_of`` in the
+        market data store; change_percent becomes that bar's daily change.
+        Holdings without stored bars keep their prices. Returns the symbols priced.
+        """
+        if self.market_data is None:
+            return []
+        with self.lock:
+            holdings = self.portfolio.holdings
+            quotes = self.market_data.latest_quotes(holdings.symbols, as_of)
+            if quotes:
+                rows = np.array([holdings.row(symbol) for symbol in quotes])
+                prices, changes = map(np.array, zip(*quotes.values()))
+                holdings.value[rows] *= prices / holdings.current_price[rows]
+                holdings.current_price[rows] = prices
+                holdings.change_percent[rows] = changes
+                self.invalidate()
+        return list(quotes)
+    
+    def refresh_market_data(self, as_of: "DateLike" = None) -> Dict[str, Any]:
+        """
+        Reprice from the market data store and fold bars stored since the last
+        refresh, by this or another process, into the return statistics of the
+        held symbols. Only the new rows are computed unless the set of stored
+        holdings changed.
+        """
+        if self.market_data is None:
+            return {"priced": [], "rows_added": 0, "rows_recomputed": 0, "symbols_updated": 0}
+        from scripts.return_stats import ReturnStats
+
+        with self.lock:
+            self.market_data.reload(self.portfolio.holdings.symbols)
+            priced = self.price_from_market_data(as_of)
+            symbols = [symbol for symbol in self.portfolio.holdings.symbols if symbol in self.market_data]
+            if self.return_stats is None or self.return_stats.symbols != symbols:
+                self.return_stats = ReturnStats(self.market_data, symbols)
+            updated = self.return_stats.update()
+            if updated["rows_recomputed"]:
+                # Snapshot metrics come from the return stats
+                self.portfolio.holdings.version += 1
+            return {"priced": priced, **updated}
+    
+    def add_asset(self, asset: Asset) -> None:
+        """Add a holding to the portfolio"""
+        with self.lock:
+            self.portfolio.holdings.append([asset.as_tuple()])
+            self.invalidate()
+    
+    def remove_asset(self, symbol: str) -> None:
+        """Remove a holding from the portfolio by symbol"""
+        with self.lock:
+            self.portfolio.holdings.remove([symbol])
+            self.invalidate()
     
     def _initialize_portfolio(self) -> Portfolio:
         """Initialize a sample portfolio"""
-        assets = [
-            Asset("AAPL", "Apple Inc.", "stock", "US", 15.0, 18862.58, 185.50, 1.8),
-            Asset("MSFT", "Microsoft Corp.", "stock", "US", 12.0, 15090.06, 380.25, 2.4),
-            Asset("GOOGL", "Alphabet Inc.", "stock", "US", 8.0, 10060.04, 142.30, -0.8),
-            Asset("BTC", "Bitcoin", "crypto", "Global", 5.0, 6287.53, 45200.00, 12.1),
-            Asset("TLT", "20+ Year Treasury Bond ETF", "bond", "US", 15.0, 18862.58, 95.40, -0.3),
-            Asset("VEA", "Developed Markets ETF", "stock", "Developed", 20.0, 25150.10, 48.75, 1.5),
-            Asset("VWO", "Emerging Markets ETF", "stock", "Emerging", 15.0, 18862.58, 42.30, 4.2),
-            Asset("CASH", "Cash & Equivalents", "cash", "US", 10.0, 12575.05, 1.0, 0.0),
-        ]
-        
-        total_value = sum(asset.value for asset in assets)
+        holdings = HoldingsStore.from_records([
+            ("AAPL", "Apple Inc.", "stock", "US", 15.0, 18862.58, 185.50, 1.8),
+            ("MSFT", "Microsoft Corp.", "stock", "US", 12.0, 15090.06, 380.25, 2.4),
+            ("GOOGL", "Alphabet Inc.", "stock", "US", 8.0, 10060.04, 142.30, -0.8),
+            ("BTC", "Bitcoin", "crypto", "Global", 5.0, 6287.53, 45200.00, 12.1),
+            ("TLT", "20+ Year Treasury Bond ETF", "bond", "US", 15.0, 18862.58, 95.40, -0.3),
+            ("VEA", "Developed Markets ETF", "stock", "Developed", 20.0, 25150.10, 48.75, 1.5),
+            ("VWO", "Emerging Markets ETF", "stock", "Emerging", 15.0, 18862.58, 42.30, 4.2),
+            ("CASH", "Cash & Equivalents", "cash", "US", 10.0, 12575.05, 1.0, 0.0),
+        ])
         
         return Portfolio(
-            total_value=total_value,
-            assets=assets,
+            holdings=holdings,
             risk_profile="moderate",
             last_updated=datetime.now()
         )
     
     def get_asset_allocation(self) -> Dict[str, float]:
         """Get allocation by asset type"""
-        allocation = {"stock": 0, "bond": 0, "crypto": 0, "cash": 0}
-        
-        for asset in self.portfolio.assets:
-            allocation[asset.asset_type] += asset.allocation
-            
-        return allocation
+        holdings = self.portfolio.holdings
+        return holdings.group_sum("asset_type", holdings.allocation)
     
     def get_geographic_allocation(self) -> Dict[str, float]:
         """Get allocation by geographic region"""
-        allocation = {"US": 0, "Developed": 0, "Emerging": 0, "Global": 0}
-        
-        for asset in self.portfolio.assets:
-            allocation[asset.region] += asset.allocation
-            
-        return allocation
+        holdings = self.portfolio.holdings
+        return holdings.group_sum("region", holdings.allocation)
+    
+    def _benchmark_returns(self, dates: np.ndarray) -> Optional[np.ndarray]:
+        """Daily returns of BENCHMARK_SYMBOL between consecutive ``dates``, if it is stored that far back"""
+        from scripts.performance_metrics import DEFAULT_BENCHMARK
+
+        symbol = os.getenv("BENCHMARK_SYMBOL", DEFAULT_BENCHMARK)
+        if self.market_data is None or symbol not in self.market_data:
+            return None
+        history = self.market_data.history(symbol, end=dates[-1], fields=())
+        rows = np.searchsorted(history.date, dates, side="right") - 1
+        if rows[0] < 0:
+            return None
+        closes = history.close[rows]
+        return closes[1:] / closes[:-1] - 1
+    
+    def historical_metrics(self, days: int = 252) -> Optional[Dict[str, float]]:
+        """
+        Annualized return, volatility, Sharpe, Sortino and (with a stored
+        benchmark) beta and tracking error of the current weights over the
+        last ``days`` of stored history; None without enough history.
+        """
+        stats = self.return_stats
+        if stats is None or len(stats) < 3:
+            return None
+        from scripts.performance_metrics import performance_metrics, portfolio_returns
+
+        holdings = self.portfolio.holdings
+        weights = holdings.allocation[[holdings.row(symbol) for symbol in stats.symbols]] / 100
+        # The first row has no previous close, so its returns are placeholders
+        rows = slice(max(len(stats) - days, 1), len(stats))
+        returns = portfolio_returns(stats.returns[rows], weights)
+        benchmark = self._benchmark_returns(stats.dates[rows.start - 1:])
+        metrics = performance_metrics(returns, benchmark)
+        metrics["history_days"] = len(returns)
+        return metrics
     
     def calculate_portfolio_metrics(self) -> Dict[str, Any]:
-        """Calculate key portfolio metrics"""
-        returns = [asset.change_percent for asset in self.portfolio.assets]
-        weights = [asset.allocation / 100 for asset in self.portfolio.assets]
+        """
+        Calculate key portfolio metrics: from stored return history when the
+        market data store has it, otherwise from today's price changes.
+        'daily_return' is always today's weighted price change
+        """
+        holdings = self.portfolio.holdings
+        returns = holdings.change_percent
+        weights = holdings.allocation / 100
         
         # Portfolio return
-        portfolio_return = sum(r * w for r, w in zip(returns, weights))
+        portfolio_return = float(returns @ weights)
         
         # Portfolio volatility (simplified)
-        portfolio_volatility = np.std(returns) * np.sqrt(252)  # Annualized
+        portfolio_volatility = float(np.std(returns) * np.sqrt(252)) if len(returns) else 0.0  # Annualized
         
         # Sharpe ratio (assuming 3% risk-free rate)
         risk_free_rate = 3.0
         sharpe_ratio = (portfolio_return * 252 - risk_free_rate) / portfolio_volatility if portfolio_volatility > 0 else 0
         
-        return {
+        metrics = {
             "portfolio_return": portfolio_return,
             "portfolio_volatility": portfolio_volatility,
             "sharpe_ratio": sharpe_ratio,
             "total_value": self.portfolio.total_value,
-            "num_assets": len(self.portfolio.assets)
+            "num_assets": len(holdings),
+            "daily_return": portfolio_return
         }
+        # Holdings without stored bars count as riskless in the historical figures.
+        # Return, volatility and Sharpe are replaced together so they share one basis
+        historical = self.historical_metrics()
+        if historical is not None:
+            metrics.update({
+                "portfolio_return": historical.pop("annualized_return"),
+                "portfolio_volatility": historical.pop("volatility"),
+                "sharpe_ratio": historical.pop("sharpe_ratio"),
+                **historical
+            })
+        metrics["metrics_basis"] = "history" if historical is not None else "daily_change"
+        return metrics
     
     def rebalance_portfolio(self, target_allocation: Dict[str, float]) -> Dict[str, Any]:
         """Rebalance portfolio to target allocation"""
-        current_allocation = self.get_asset_allocation()
+        with self.lock:
+            current_allocation = self.get_asset_allocation()
         
         rebalancing_actions = []
         for asset_type, target_pct in target_allocation.items():
@@ -118,22 +468,31 @@ class PortfolioManager:
         }
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert portfolio to dictionary for JSON serialization"""
+        """Convert portfolio to dictionary for JSON serialization
+        
+        The snapshot is cached until the portfolio changes, so repeated calls
+        return the same dict; treat it as read-only.
+        """
+        with self.lock:
+            snapshot_key = (id(self.portfolio.holdings), self.version)
+            if self._snapshot_key != snapshot_key:
+                self._snapshot = self._build_snapshot()
+                self._snapshot_json = b""
+                self._snapshot_key = snapshot_key
+            return self._snapshot
+    
+    def to_json_bytes(self) -> bytes:
+        """Pre-serialized JSON form of ``to_dict()``, cached alongside it"""
+        with self.lock:
+            snapshot = self.to_dict()
+            if not self._snapshot_json:
+                self._snapshot_json = json.dumps(snapshot).encode()
+            return self._snapshot_json
+    
+    def _build_snapshot(self) -> Dict[str, Any]:
         return {
             "total_value": self.portfolio.total_value,
-            "assets": [
-                {
-                    "symbol": asset.symbol,
-                    "name": asset.name,
-                    "asset_type": asset.asset_type,
-                    "region": asset.region,
-                    "allocation": asset.allocation,
-                    "value": asset.value,
-                    "current_price": asset.current_price,
-                    "change_percent": asset.change_percent
-                }
-                for asset in self.portfolio.assets
-            ],
+            "assets": self.portfolio.holdings.records(),
             "risk_profile": self.portfolio.risk_profile,
             "last_updated": self.portfolio.last_updated.isoformat(),
             "metrics": self.calculate_portfolio_metrics(),
@@ -147,7 +506,7 @@ if __name__ == "__main__":
     portfolio_data = pm.to_dict()
 
     # 1️⃣  Emit machine-readable JSON for the API route
-    print(json.dumps(portfolio_data))
+    print(pm.to_json_bytes().decode())
 
     # 2️⃣  Human-readable summary follows
     print("\nPortfolio Summary:")
@@ -0,0 +1,237 @@
+"""
+Return statistics kept up to date incrementally from the market data store.
+
+ReturnStats holds, for a fixed list of symbols on the union of their trading
+dates:
+
+* forward-filled closes and daily simple returns (0 where a symbol has no bar);
+* prefix sums of returns and squared returns, from which the rolling
+  volatility of any row is two subtractions;
+* the sums behind the covariance of the latest ``window`` rows.
+
+``update`` reads only bars after what it has already consumed, including
+bars another process appended to the store since. Rows from the
+first new date onwards are recomputed and everything before is kept, so a
+daily refresh costs O(new rows x symbols) for returns and volatility and
+O(new rows x symbols^2) for the covariance, however long the history is.
+After a full rewrite of a symbol's history call ``rebuild``.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from scripts.market_data import MarketDataStore
+
+TRADING_DAYS = 252
+DEFAULT_WINDOW = 63  # about three months of trading days
+# Incremental covariance updates between exact recomputations, to bound float drift
+REBUILD_COVARIANCE_EVERY = 64
+
+
+class GrowableArray:
+    """Row-appendable array with amortized O(1) appends and O(1) truncation"""
+
+    def __init__(self, shape_tail: Sequence[int] = (), dtype=float):
+        self._data = np.empty((16, *shape_tail), dtype=dtype)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def view(self) -> np.ndarray:
+        return self._data[:self._size]
+
+    def truncate(self, size: int) -> None:
+        self._size = min(self._size, size)
+
+    def extend(self, rows: np.ndarray) -> None:
+        needed = self._size + len(rows)
+        if needed > len(self._data):
+            grown = np.empty((max(needed, 2 * len(self._data)), *self._data.shape[1:]), dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:needed] = rows
+        self._size = needed
+
+
+def _forward_fill(matrix: np.ndarray, seed: np.ndarray) -> np.ndarray:
+    """Fill NaNs down each column, starting from ``seed`` (the row before ``matrix``)"""
+    filled = np.vstack([seed[None, :], matrix])
+    rows = np.where(~np.isnan(filled), np.arange(len(filled))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return filled[rows, np.arange(filled.shape[1])][1:]
+
+
+class ReturnStats:
+    """
+    Daily returns, rolling volatility and rolling covariance for a set of symbols.
+
+    Args:
+        store: Market data store the bars are read from
+        symbols: Symbols, in column order
+        window: Rolling window in trading days
+    """
+
+    def __init__(self, store: MarketDataStore, symbols: Sequence[str], window: int = DEFAULT_WINDOW):
+        if window < 2:
+            raise ValueError("window must be at least 2")
+        self.store = store
+        self.symbols: List[str] = list(symbols)
+        self.window = window
+        self.rebuild(update=False)
+
+    def rebuild(self, update: bool = True) -> Dict[str, int]:
+        """Drop everything computed and, by default, recompute from the full history"""
+        k = len(self.symbols)
+        self._dates = GrowableArray(dtype="datetime64[D]")
+        self._closes = GrowableArray((k,))
+        self._returns = GrowableArray((k,))
+        # Row t of the prefix sums covers returns [0, t)
+        self._sum = GrowableArray((k,))
+        self._sum_squares = GrowableArray((k,))
+        self._sum.extend(np.zeros((1, k)))
+        self._sum_squares.extend(np.zeros((1, k)))
+        self._window_sum = np.zeros(k)
+        self._window_cross = np.zeros((k, k))
+        self._window_start = 0
+        self._incremental_updates = 0
+        self._consumed: Dict[str, Optional[np.datetime64]] = {symbol: None for symbol in self.symbols}
+        return self.update() if update else {"rows_added": 0, "rows_recomputed": 0, "symbols_updated": 0}
+
+    # Views
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self._dates.view
+
+    @property
+    def returns(self) -> np.ndarray:
+        """Daily simple returns, one row per date and one column per symbol"""
+        return self._returns.view
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+    def rolling_volatility(self, start_row: int = 0) -> np.ndarray:
+        """Annualized rolling volatility for rows ``start_row`` onwards (NaN until a full window)"""
+        sums, squares = self._sum.view, self._sum_squares.view
+        end = np.arange(max(start_row, 0), len(self)) + 1
+        begin = np.maximum(end - self.window, 0)
+        total = sums[end] - sums[begin]
+        total_squares = squares[end] - squares[begin]
+        variance = (total_squares - total ** 2 / self.window) / (self.window - 1)
+        volatility = np.sqrt(np.maximum(variance, 0) * TRADING_DAYS)
+        volatility[end < self.window] = np.nan
+        return volatility
+
+    def volatility(self) -> np.ndarray:
+        """Latest annualized rolling volatility of each symbol"""
+        return self.rolling_volatility(len(self) - 1)[-1] if len(self) else np.full(len(self.symbols), np.nan)
+
+    def covariance(self) -> np.ndarray:
+        """Daily return covariance over the latest window (fewer rows early in the history)"""
+        n = len(self) - self._window_start
+        if n < 2:
+            return np.full((len(self.symbols), len(self.symbols)), np.nan)
+        return (self._window_cross - np.outer(self._window_sum, self._window_sum) / n) / (n - 1)
+
+    def portfolio_volatility(self, weights: np.ndarray) -> float:
+        """Annualized volatility of a portfolio with these weights (fractions, one per symbol)"""
+        return float(np.sqrt(max(weights @ self.covariance() @ weights, 0.0) * TRADING_DAYS))
+
+    # Updates
+
+    def _new_bars(self) -> Dict[int, Any]:
+        new = {}
+        for column, symbol in enumerate(self.symbols):
+            consumed = self._consumed[symbol]
+            if symbol not in self.store:
+                continue
+            history = self.store.history(symbol, start=None if consumed is None else consumed + 1, fields=())
+            if len(history):
+                new[column] = history
+        return new
+
+    def _cross(self, rows: np.ndarray) -> np.ndarray:
+        return rows.T @ rows
+
+    def update(self) -> Dict[str, int]:
+        """Fold in bars stored since the last update; returns how many rows were added and recomputed"""
+        self.store.reload(self.symbols)
+        new = self._new_bars()
+        if not new:
+            return {"rows_added": 0, "rows_recomputed": 0, "symbols_updated": 0}
+
+        k = len(self.symbols)
+        old_length = len(self)
+        old_returns = self.returns
+        first_new = min(history.date[0] for history in new.values())
+        # Every row from the first new date onwards is recomputed; earlier rows are final
+        start = int(np.searchsorted(self.dates, first_new, side="left"))
+
+        # A symbol consumed only up to before first_new has its whole tail in ``new``
+        tail_histories = {}
+        for column, symbol in enumerate(self.symbols):
+            consumed = self._consumed[symbol]
+            if consumed is not None and consumed >= first_new:
+                tail_histories[symbol] = self.store.history(symbol, start=first_new, fields=())
+            elif column in new:
+                tail_histories[symbol] = new[column]
+        tail_dates = np.unique(np.concatenate(
+            [self.dates[start:]] + [history.date for history in tail_histories.values()]
+        ))
+        tail_closes = np.full((len(tail_dates), k), np.nan)
+        for column, symbol in enumerate(self.symbols):
+            history = tail_histories.get(symbol)
+            if history is not None and len(history):
+                tail_closes[np.searchsorted(tail_dates, history.date), column] = history.close
+        seed = self._closes.view[start - 1] if start > 0 else np.full(k, np.nan)
+        tail_closes = _forward_fill(tail_closes, seed)
+        previous = np.vstack([seed[None, :], tail_closes[:-1]])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            tail_returns = tail_closes / previous - 1
+        tail_returns[~np.isfinite(tail_returns)] = 0.0
+
+        # Covariance window sums: take out rows leaving the window and rows being replaced
+        new_length = start + len(tail_dates)
+        new_window_start = max(new_length - self.window, 0)
+        incremental = (
+            self._incremental_updates < REBUILD_COVARIANCE_EVERY
+            and self._window_start <= new_window_start < start
+        )
+        if incremental:
+            leaving = old_returns[self._window_start:new_window_start]
+            replaced = old_returns[start:old_length]
+            self._window_sum -= leaving.sum(axis=0) + replaced.sum(axis=0)
+            self._window_cross -= self._cross(leaving) + self._cross(replaced)
+
+        for array in (self._dates, self._closes, self._returns):
+            array.truncate(start)
+        self._sum.truncate(start + 1)
+        self._sum_squares.truncate(start + 1)
+        self._dates.extend(tail_dates)
+        self._closes.extend(tail_closes)
+        self._returns.extend(tail_returns)
+        self._sum.extend(self._sum.view[start] + np.cumsum(tail_returns, axis=0))
+        self._sum_squares.extend(self._sum_squares.view[start] + np.cumsum(tail_returns ** 2, axis=0))
+
+        if incremental:
+            self._window_sum += tail_returns.sum(axis=0)
+            self._window_cross += self._cross(tail_returns)
+            self._incremental_updates += 1
+        else:
+            window = self.returns[new_window_start:]
+            self._window_sum = window.sum(axis=0)
+            self._window_cross = self._cross(window)
+            self._incremental_updates = 0
+        self._window_start = new_window_start
+
+        for column, history in new.items():
+            self._consumed[self.symbols[column]] = history.date[-1]
+        return {
+            "rows_added": new_length - old_length,
+            "rows_recomputed": len(tail_dates),
+            "symbols_updated": len(new),
+        }
@@ -1,76 +1,259 @@
+import os
+import sys
 import numpy as np
-import pandas as pd
-from typing import Dict, List, Tuple
-import matplotlib.pyplot as plt
-from portfolio_manager import PortfolioManager
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if __package__ in (None, ""):
+    # Run as a file (python scripts/<name>.py): make the repository root importable for scripts.*
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.portfolio_manager import PortfolioManager
+from scripts.monte_carlo import (
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_CHUNK_SIZE,
+    DrawdownAccumulator,
+    run_correlated_simulation,
+    run_simulation,
+)
+from scripts.historical_var import (
+    DEFAULT_HORIZON,
+    DEFAULT_LOOKBACK,
+    ENGINES,
+    filtered_returns,
+    historical_risk,
+    horizon_paths,
+)
+
+if TYPE_CHECKING:
+    from scripts.covariance import CovarianceEstimate, CovarianceService
+
+# Asset class expected returns and volatilities (simplified, annualized)
+ASSET_CLASS_ASSUMPTIONS = {
+    'stock': {'return': 0.10, 'volatility': 0.16},
+    'bond': {'return': 0.04, 'volatility': 0.05},
+    'crypto': {'return': 0.15, 'volatility': 0.60},
+    'cash': {'return': 0.02, 'volatility': 0.01}
+}
+
+# Correlations between asset classes; pairs not listed are uncorrelated
+ASSET_CLASS_CORRELATIONS = {
+    ('stock', 'bond'): -0.20,
+    ('stock', 'crypto'): 0.40,
+    ('bond', 'crypto'): -0.05,
+    ('bond', 'cash'): 0.10
+}
+
+# Correlation between two different holdings of the same asset class
+INTRA_CLASS_CORRELATION = 0.80
+
+def asset_class_inputs(classes: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Annual expected returns and covariance for holdings of the given asset classes"""
+    class_names = list(ASSET_CLASS_ASSUMPTIONS)
+    codes = np.array([class_names.index(c) for c in classes], dtype=int)
+    
+    class_correlation = np.full((len(class_names), len(class_names)), 0.0)
+    for (class_a, class_b), rho in ASSET_CLASS_CORRELATIONS.items():
+        a, b = class_names.index(class_a), class_names.index(class_b)
+        class_correlation[a, b] = class_correlation[b, a] = rho
+    np.fill_diagonal(class_correlation, INTRA_CLASS_CORRELATION)
+    
+    correlation = class_correlation[np.ix_(codes, codes)]
+    np.fill_diagonal(correlation, 1.0)
+    
+    volatilities = np.array([ASSET_CLASS_ASSUMPTIONS[c]['volatility'] for c in class_names])[codes]
+    expected_returns = np.array([ASSET_CLASS_ASSUMPTIONS[c]['return'] for c in class_names])[codes]
+    return expected_returns, correlation * np.outer(volatilities, volatilities)
 
 class ScenarioAnalyzer:
-    def __init__(self):
-        self.portfolio_manager = PortfolioManager()
+    def __init__(
+        self,
+        portfolio_manager: Optional[PortfolioManager] = None,
+        covariance_service: Optional["CovarianceService"] = None
+    ):
+        self.portfolio_manager = portfolio_manager or PortfolioManager()
+        # Historical covariance needs the market data store; the assumptions are used without it
+        if covariance_service is None and self.portfolio_manager.market_data is not None:
+            from scripts.covariance import CovarianceService
+            
+            covariance_service = CovarianceService(self.portfolio_manager.market_data)
+        self.covariance_service = covariance_service
+    
+    def historical_covariance(self, method: str = 'ledoit_wolf', window: int = 252) -> Optional["CovarianceEstimate"]:
+        """Covariance estimate of the holdings with stored history, or None without any"""
+        if self.covariance_service is None:
+            return None
+        from scripts.covariance import METHODS
         
-    def monte_carlo_simulation(self, num_simulations: int = 1000, time_horizon: int = 252) -> Dict:
-        """Run Monte Carlo simulation for portfolio returns"""
-        portfolio_data = self.portfolio_manager.to_dict()
+        if method not in METHODS:
+            raise ValueError(f"Unknown covariance method: {method}")
+        store = self.covariance_service.store
+        symbols = [s for s in self.portfolio_manager.portfolio.holdings.symbols if s in store]
+        if not symbols:
+            return None
+        try:
+            return self.covariance_service.estimate(symbols, window=window, method=method)
+        except ValueError:
+            return None  # not enough common history
+    
+    def simulation_inputs(self, by: str = 'asset', covariance_method: Optional[str] = 'ledoit_wolf') -> Dict:
+        """Build labels, values, expected returns and covariance for the simulator
         
-        # Asset expected returns and volatilities (simplified)
-        asset_returns = {
-            'stock': {'return': 0.10, 'volatility': 0.16},
-            'bond': {'return': 0.04, 'volatility': 0.05},
-            'crypto': {'return': 0.15, 'volatility': 0.60},
-            'cash': {'return': 0.02, 'volatility': 0.01}
+        Args:
+            by: 'asset' for one factor per holding, 'asset_class' to aggregate
+                holdings into stock/bond/crypto/cash
+            covariance_method: 'sample', 'ewma' or 'ledoit_wolf' estimate from
+                stored history for the holdings that have it; None, or no
+                history, uses the asset class assumptions throughout
+        """
+        holdings = self.portfolio_manager.portfolio.holdings
+        if by not in ('asset', 'asset_class'):
+            raise ValueError(f"Unknown simulation granularity: {by}")
+        
+        estimate = self.historical_covariance(covariance_method) if covariance_method else None
+        if estimate is None:
+            if by == 'asset':
+                labels = list(holdings.symbols)
+                classes = holdings.labels('asset_type')
+                initial_values = holdings.value.copy()
+            else:
+                class_values = holdings.group_sum('asset_type', holdings.value)
+                labels = classes = [c for c, value in class_values.items() if value > 0]
+                initial_values = np.array([class_values[c] for c in classes])
+            expected_returns, covariance = asset_class_inputs(classes)
+            return {
+                'labels': labels,
+                'initial_values': initial_values,
+                'expected_returns': expected_returns,
+                'covariance': covariance,
+                'covariance_source': 'assumptions'
+            }
+        
+        # Holdings with history take the estimate; the rest keep the assumptions
+        # and are treated as uncorrelated with them, which keeps the matrix PSD
+        expected_returns, assumed = asset_class_inputs(holdings.labels('asset_type'))
+        estimated = np.array([holdings.row(symbol) for symbol in estimate.symbols])
+        rest = np.setdiff1d(np.arange(len(holdings)), estimated)
+        covariance = np.zeros_like(assumed)
+        covariance[np.ix_(estimated, estimated)] = estimate.matrix
+        covariance[np.ix_(rest, rest)] = assumed[np.ix_(rest, rest)]
+        factor = np.zeros_like(assumed)
+        factor[np.ix_(estimated, estimated)] = estimate.cholesky
+        if len(rest):
+            factor[np.ix_(rest, rest)] = np.linalg.cholesky(assumed[np.ix_(rest, rest)])
+        
+        if by == 'asset':
+            return {
+                'labels': list(holdings.symbols),
+                'initial_values': holdings.value.copy(),
+                'expected_returns': expected_returns,
+                'covariance': covariance,
+                'cholesky_factor': factor,
+                'covariance_source': estimate.method
+            }
+        
+        # Each asset class is the value-weighted basket of its holdings
+        class_values = holdings.group_sum('asset_type', holdings.value)
+        labels = [c for c, value in class_values.items() if value > 0]
+        asset_classes = holdings.labels('asset_type')
+        basket = np.array([
+            [value / class_values[c] if asset_class == c else 0.0
+             for asset_class, value in zip(asset_classes, holdings.value)]
+            for c in labels
+        ])
+        return {
+            'labels': labels,
+            'initial_values': np.array([class_values[c] for c in labels]),
+            'expected_returns': basket @ expected_returns,
+            'covariance': basket @ covariance @ basket.T,
+            'covariance_source': estimate.method
         }
         
-        # Portfolio weights
-        weights = portfolio_data['asset_allocation']
-        total_weight = sum(weights.values())
-        normalized_weights = {k: v/total_weight for k, v in weights.items()}
+    def monte_carlo_simulation(
+        self,
+        num_simulations: int = 1000,
+        time_horizon: int = 252,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        return_paths: bool = False,
+        seed: Optional[int] = None,
+        workers: int = 1,
+        variance_reduction: Optional[str] = None
+    ) -> Dict:
+        """Run Monte Carlo simulation for portfolio returns
+        
+        Paths are simulated in chunks of ``chunk_size`` and folded into running
+        statistics, so memory stays flat regardless of ``num_simulations``.
+        Pass ``return_paths=True`` to also get the full path matrix as a
+        (num_simulations, time_horizon + 1) array under 'simulations', along
+        with 'final_values'.
+        
+        Chunks can be spread over ``workers`` processes. For a given ``seed``
+        the results are bit-identical whatever the number of workers.
         
-        # Calculate portfolio expected return and volatility
-        portfolio_return = sum(normalized_weights[asset] * asset_returns[asset]['return'] 
-                             for asset in normalized_weights)
+        ``variance_reduction`` selects 'none', 'antithetic', 'control_variate'
+        or 'sobol' sampling and adds 'standard_errors' to the result.
+        """
+        portfolio_data = self.portfolio_manager.to_dict()
         
-        portfolio_volatility = np.sqrt(sum((normalized_weights[asset] * asset_returns[asset]['volatility'])**2 
-                                         for asset in normalized_weights))
+        # Portfolio expected return and volatility from the asset class
+        # covariance (historical where the holdings have stored history), so
+        # correlation between classes is taken into account
+        inputs = self.simulation_inputs(by='asset_class')
+        weights = inputs['initial_values'] / inputs['initial_values'].sum()
+        portfolio_return = float(weights @ inputs['expected_returns'])
+        portfolio_volatility = float(np.sqrt(weights @ inputs['covariance'] @ weights))
         
         # Run simulations
-        initial_value = portfolio_data['total_value']
-        simulations = []
-        
-        for _ in range(num_simulations):
-            daily_returns = np.random.normal(
-                portfolio_return / 252,  # Daily return
-                portfolio_volatility / np.sqrt(252),  # Daily volatility
-                time_horizon
-            )
-            
-            # Calculate cumulative portfolio value
-            portfolio_values = [initial_value]
-            for daily_return in daily_returns:
-                new_value = portfolio_values[-1] * (1 + daily_return)
-                portfolio_values.append(new_value)
-            
-            simulations.append(portfolio_values)
+        return run_simulation(
+            num_simulations,
+            time_horizon,
+            portfolio_return / 252,  # Daily return
+            portfolio_volatility / np.sqrt(252),  # Daily volatility
+            portfolio_data['total_value'],
+            chunk_size=chunk_size,
+            return_paths=return_paths,
+            seed=seed,
+            workers=workers,
+            variance_reduction=variance_reduction
+        )
+    
+    def correlated_monte_carlo(
+        self,
+        num_simulations: int = 1000,
+        time_horizon: int = 252,
+        by: str = 'asset',
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        return_paths: bool = False,
+        seed: Optional[int] = None,
+        workers: int = 1
+    ) -> Dict:
+        """Run a correlated multi-asset GBM simulation of the portfolio
         
-        # Calculate statistics
-        final_values = [sim[-1] for sim in simulations]
+        Each holding (or asset class, with ``by='asset_class'``) follows its own
+        geometric Brownian motion, correlated through the covariance matrix
+        from ``simulation_inputs``. Returns portfolio-level 'statistics' in the
+        same shape as ``monte_carlo_simulation`` plus per-asset
+        'asset_statistics'.
+        """
+        inputs = self.simulation_inputs(by=by)
         
-        return {
-            'simulations': simulations,
-            'final_values': final_values,
-            'statistics': {
-                'mean_final_value': np.mean(final_values),
-                'median_final_value': np.median(final_values),
-                'std_final_value': np.std(final_values),
-                'percentile_5': np.percentile(final_values, 5),
-                'percentile_95': np.percentile(final_values, 95),
-                'probability_of_loss': sum(1 for val in final_values if val < initial_value) / len(final_values),
-                'expected_return': (np.mean(final_values) - initial_value) / initial_value,
-                'initial_value': initial_value
-            }
-        }
+        return run_correlated_simulation(
+            num_simulations,
+            time_horizon,
+            inputs['expected_returns'],
+            inputs['covariance'],
+            inputs['initial_values'],
+            inputs['labels'],
+            chunk_size=chunk_size,
+            block_size=block_size,
+            return_paths=return_paths,
+            seed=seed,
+            workers=workers,
+            cholesky_factor=inputs.get('cholesky_factor')
+        )
     
-    def interest_rate_scenarios(self) -> Dict:
+    def interest_rate_scenarios(self, seed: Optional[int] = None) -> Dict:
         """Analyze portfolio under different interest rate scenarios"""
+        rng = np.random.default_rng(seed)
         portfolio_data = self.portfolio_manager.to_dict()
         initial_value = portfolio_data['total_value']
         
@@ -102,17 +285,12 @@ class ScenarioAnalyzer:
                     portfolio_impact += impact
             
             # Generate 12-month projection
-            months = list(range(1, 13))
-            monthly_values = []
+            # Gradual impact over time with some randomness
+            time_factor = np.arange(1, 13) / 12
+            random_factor = rng.normal(0, 0.02, 12)  # 2% monthly volatility
             
-            for month in months:
-                # Gradual impact over time with some randomness
-                time_factor = month / 12
-                random_factor = np.random.normal(0, 0.02)  # 2% monthly volatility
-                
-                monthly_return = (portfolio_impact * time_factor + random_factor) / 100
-                monthly_value = initial_value * (1 + monthly_return)
-                monthly_values.append(monthly_value)
+            monthly_return = (portfolio_impact * time_factor + random_factor) / 100
+            monthly_values = (initial_value * (1 + monthly_return)).tolist()
             
             scenario_results[scenario_key] = {
                 'name': scenario['name'],
@@ -125,35 +303,111 @@ class ScenarioAnalyzer:
         
         return scenario_results
     
-    def risk_analysis(self) -> Dict:
-        """Comprehensive risk analysis of the portfolio"""
+    @staticmethod
+    def _drawdown_distribution(drawdown: Dict[str, float]) -> Dict[str, float]:
+        return {
+            'mean_percent': drawdown['mean'] * 100,
+            'median_percent': drawdown['median'] * 100,
+            'percentile_95_percent': drawdown['percentile_95'] * 100,
+            'percentile_99_percent': drawdown['percentile_99'] * 100,
+            'probability_of_recovery': drawdown['probability_of_recovery'],
+            'mean_days_to_recovery': drawdown['mean_time_to_recovery']
+        }
+    
+    def historical_risk_analysis(
+        self,
+        filtered: bool = False,
+        lookback: int = DEFAULT_LOOKBACK,
+        horizon: int = DEFAULT_HORIZON
+    ) -> Dict:
+        """Risk analysis from the stored history of the holdings' joint returns
+        
+        Every overlapping ``horizon``-day window of the last ``lookback`` days
+        is applied to the current holdings (rescaled to current volatility if
+        ``filtered``). Holdings without stored history are held flat; the
+        share of value covered is reported as 'history_coverage_percent'.
+        """
+        if self.covariance_service is None:
+            raise ValueError("Historical VaR needs stored price history (set MARKET_DATA_PATH)")
+        portfolio_data = self.portfolio_manager.to_dict()
+        holdings = self.portfolio_manager.portfolio.holdings
+        store = self.covariance_service.store
+        symbols = [s for s in holdings.symbols if s in store]
+        if not symbols:
+            raise ValueError("No market data history for the portfolio's holdings")
+        _, returns = self.covariance_service.returns(symbols, window=lookback)
+        if len(returns) <= horizon:
+            raise ValueError(f"Need more than {horizon} days of common history, got {len(returns)}")
+        if filtered:
+            returns = filtered_returns(returns)
+        
+        initial_value = portfolio_data['total_value']
+        weights = holdings.value[[holdings.row(symbol) for symbol in symbols]] / initial_value
+        risk = historical_risk(returns, weights[None, :], np.array([initial_value]), horizon)
+        drawdowns = DrawdownAccumulator()
+        drawdowns.update(horizon_paths(returns, weights, horizon))
+        drawdown = drawdowns.statistics()
+        
+        var = risk['value_at_risk']
+        return {
+            'value_at_risk': {key: float(value[0]) for key, value in var.items()},
+            'expected_shortfall': float(risk['expected_shortfall'][0]),
+            'expected_shortfall_percent': float(risk['expected_shortfall_percent'][0]),
+            'max_drawdown_estimate': drawdown['max'] * 100,
+            'drawdown_distribution': self._drawdown_distribution(drawdown),
+            'portfolio_volatility': portfolio_data['metrics']['portfolio_volatility'],
+            'sharpe_ratio': portfolio_data['metrics']['sharpe_ratio'],
+            'engine': 'filtered_historical' if filtered else 'historical',
+            'scenarios': risk['scenarios'],
+            'history_coverage_percent': float(weights.sum() * 100)
+        }
+    
+    def risk_analysis(
+        self,
+        seed: Optional[int] = None,
+        workers: int = 1,
+        variance_reduction: Optional[str] = None,
+        num_simulations: int = 10000,
+        engine: str = 'monte_carlo',
+        lookback: int = DEFAULT_LOOKBACK
+    ) -> Dict:
+        """Comprehensive risk analysis of the portfolio
+        
+        With ``variance_reduction`` set, the result also carries the standard
+        errors of the VaR and expected shortfall estimates.
+        
+        ``engine`` selects simulated 'monte_carlo' VaR or 'historical' /
+        'filtered_historical' VaR from the last ``lookback`` days of stored
+        returns (see ``historical_risk_analysis``). All engines return the
+        same keys, plus the engine name under 'engine'.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown risk engine: {engine} (expected one of {', '.join(ENGINES)})")
+        if engine != 'monte_carlo':
+            return self.historical_risk_analysis(engine == 'filtered_historical', lookback)
+        
         portfolio_data = self.portfolio_manager.to_dict()
         
         # Value at Risk (VaR) calculation
-        monte_carlo_results = self.monte_carlo_simulation(num_simulations=10000, time_horizon=21)  # 1 month
-        final_values = monte_carlo_results['final_values']
+        monte_carlo_results = self.monte_carlo_simulation(
+            num_simulations=num_simulations, time_horizon=21,  # 1 month
+            seed=seed, workers=workers, variance_reduction=variance_reduction
+        )
+        stats = monte_carlo_results['statistics']
         initial_value = portfolio_data['total_value']
         
         # Calculate VaR at different confidence levels
-        var_95 = initial_value - np.percentile(final_values, 5)
-        var_99 = initial_value - np.percentile(final_values, 1)
+        var_95 = initial_value - stats['percentile_5']
+        var_99 = initial_value - stats['percentile_1']
         
         # Expected Shortfall (Conditional VaR)
-        var_95_threshold = np.percentile(final_values, 5)
-        expected_shortfall = initial_value - np.mean([val for val in final_values if val <= var_95_threshold])
-        
-        # Maximum Drawdown estimation
-        max_drawdown = 0
-        for simulation in monte_carlo_results['simulations'][:100]:  # Sample 100 simulations
-            peak = simulation[0]
-            for value in simulation:
-                if value > peak:
-                    peak = value
-                drawdown = (peak - value) / peak
-                if drawdown > max_drawdown:
-                    max_drawdown = drawdown
+        expected_shortfall = initial_value - stats['tail_mean_5']
         
-        return {
+        # Maximum Drawdown: worst case and distribution across all simulated paths
+        max_drawdown = stats['max_drawdown']
+        drawdown = stats['drawdown']
+        
+        risk = {
             'value_at_risk': {
                 'var_95': var_95,
                 'var_99': var_99,
@@ -163,9 +417,22 @@ class ScenarioAnalyzer:
             'expected_shortfall': expected_shortfall,
             'expected_shortfall_percent': (expected_shortfall / initial_value) * 100,
             'max_drawdown_estimate': max_drawdown * 100,
+            'drawdown_distribution': self._drawdown_distribution(drawdown),
             'portfolio_volatility': portfolio_data['metrics']['portfolio_volatility'],
-            'sharpe_ratio': portfolio_data['metrics']['sharpe_ratio']
+            'sharpe_ratio': portfolio_data['metrics']['sharpe_ratio'],
+            'engine': engine
         }
+        
+        if 'standard_errors' in monte_carlo_results:
+            errors = monte_carlo_results['standard_errors']
+            risk['standard_errors'] = {
+                'var_95': errors['percentile_5'],
+                'var_99': errors['percentile_1'],
+                'expected_shortfall': errors['tail_mean_5']
+            }
+            risk['variance_reduction'] = monte_carlo_results['variance_reduction']
+        
+        return risk
 
 if __name__ == "__main__":
     analyzer = ScenarioAnalyzer()
@@ -1,12 +1,13 @@
 import os
-from groq import Groq
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
 
 def test_groq_connection():
     """Test the Groq API connection with Poetry environment"""
+    from dotenv import load_dotenv
+    from groq import Groq
+
+    # Load environment variables
+    load_dotenv()
+
     try:
         print("🔍 Testing Groq API connection...")
         
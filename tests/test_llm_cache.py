@@ -0,0 +1,87 @@
+"""ResponseCache and SQLiteResponseCache: hits, misses, TTL expiry and LRU eviction"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from scripts import llm_cache
+from scripts.llm_cache import ResponseCache, SQLiteResponseCache, cache_key
+
+
+class FakeClock:
+    """Stands in for the time module; every reading advances by one second"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        self.now += 1.0
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_cache, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path, clock):
+    def make(max_entries=3, ttl=60.0):
+        if request.param == "sqlite":
+            return SQLiteResponseCache(str(tmp_path / "responses.db"), max_entries, ttl)
+        return ResponseCache(max_entries, ttl)
+    return make
+
+
+def test_cache_key_depends_on_every_request_field():
+    messages = [{"role": "user", "content": "How is my portfolio?"}]
+    key = cache_key("model", messages, 0.7, 500)
+    assert key == cache_key("model", [dict(m) for m in messages], 0.7, 500)
+    assert key != cache_key("other-model", messages, 0.7, 500)
+    assert key != cache_key("model", messages, 0.6, 500)
+    assert key != cache_key("model", messages, 0.7, 600)
+    assert key != cache_key("model", [{"role": "user", "content": "How is my portfolio??"}], 0.7, 500)
+
+
+def test_hit_and_miss(make_cache):
+    cache = make_cache()
+    assert cache.get("a") is None
+    cache.set("a", "answer")
+    assert cache.get("a") == "answer"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl(make_cache, clock):
+    cache = make_cache(ttl=10.0)
+    cache.set("a", "answer")
+    assert cache.get("a") == "answer"
+    clock.now += 10.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted(make_cache):
+    cache = make_cache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sqlite_entries_survive_reopening(tmp_path, clock):
+    path = str(tmp_path / "responses.db")
+    SQLiteResponseCache(path).set("a", "answer")
+    assert SQLiteResponseCache(path).get("a") == "answer"
+
+
+def test_max_entries_must_be_positive():
+    with pytest.raises(ValueError):
+        ResponseCache(max_entries=0)
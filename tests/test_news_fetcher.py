@@ -0,0 +1,91 @@
+"""NewsFetcher query cache: TTL hits, ETag/304 revalidation and the LRU cap"""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from scripts import news_fetcher
+from scripts.news_fetcher import NewsFetcher, NewsQuery, normalize_url
+
+
+class FakeNewsAPI:
+    """MockTransport handler serving one article per query, tagged with an ETag"""
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        q = request.url.params["q"]
+        etag = f'"{q}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304)
+        articles = [{"title": q, "url": f"https://example.com/{q}"}]
+        return httpx.Response(200, json={"status": "ok", "articles": articles}, headers={"ETag": etag})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(news_fetcher, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture
+def server():
+    return FakeNewsAPI()
+
+
+@pytest.fixture
+def make_fetcher(server, clock):
+    def make(**kwargs):
+        fetcher = NewsFetcher(api_key="test", base_url="https://news.test", **kwargs)
+        fetcher._client = httpx.AsyncClient(base_url=fetcher.base_url, transport=httpx.MockTransport(server))
+        return fetcher
+    return make
+
+
+def fetch_all(fetcher, *topics):
+    async def run():
+        return [await fetcher.fetch(NewsQuery("everything", {"q": topic})) for topic in topics]
+    return asyncio.run(run())
+
+
+def test_query_is_served_from_cache_within_ttl(make_fetcher, server):
+    fetcher = make_fetcher(ttl=60.0)
+    first, second = fetch_all(fetcher, "aapl", "aapl")
+    assert first == second
+    assert len(server.requests) == 1
+    assert fetcher.stats()["cache_hits"] == 1
+
+
+def test_expired_query_is_revalidated_and_304_reuses_articles(make_fetcher, server, clock):
+    fetcher = make_fetcher(ttl=60.0)
+    [first] = fetch_all(fetcher, "aapl")
+    clock.now += 61.0
+    [second] = fetch_all(fetcher, "aapl")
+    assert second == first
+    assert server.requests[-1].headers["If-None-Match"] == '"aapl"'
+    assert fetcher.stats()["not_modified"] == 1
+
+    # The 304 renewed the entry, so the next call within the TTL makes no request
+    fetch_all(fetcher, "aapl")
+    assert len(server.requests) == 2
+
+
+def test_least_recently_used_query_is_dropped(make_fetcher, server):
+    fetcher = make_fetcher(max_entries=2)
+    fetch_all(fetcher, "a", "b", "a", "c")
+    assert fetcher.stats()["cached_queries"] == 2
+    assert len(server.requests) == 3
+
+    # "a" was used after "b", so "b" was evicted and has to be fetched again
+    fetch_all(fetcher, "a", "c", "b")
+    assert [request.url.params["q"] for request in server.requests[3:]] == ["b"]
+    assert "If-None-Match" not in server.requests[-1].headers
+
+
+def test_normalize_url_drops_tracking_parameters():
+    assert normalize_url("http://www.Example.com/story/?utm_source=x&id=1") == "https://example.com/story?id=1"